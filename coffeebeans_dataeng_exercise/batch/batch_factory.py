@@ -1,34 +1,54 @@
 import logging
 
-from coffeebeans_dataeng_exercise.constants.constants import DB_FILE, OperationType
-from coffeebeans_dataeng_exercise.ingest_jobs.ingest_data import IngestVotes
-from coffeebeans_dataeng_exercise.outlier_jobs.detect_outlier import CalculateOutlier
+from coffeebeans_dataeng_exercise.constants.constants import DB_FILE, BackendType, OperationType
 
 
 # Factory Method Pattern: Factory class for creating different types of batch jobs
 class BatchFactory:
 
     @staticmethod
-    def operation(type, schemas, db_file=DB_FILE):
+    def operation(type, schemas, db_file=DB_FILE, backend=BackendType.DUCKDB, **options):
         """
         Static method to create and return an instance of a batch job based on the operation type.
 
         Args:
-            type (OperationType): The type of operation to be performed (INGEST or OUTLIER).
+            type (OperationType): The type of operation to be performed (INGEST, OUTLIER or MAINTENANCE).
             schemas (list): A list of schemas needed for the operation.
             db_file (str): Path to the database file. Defaults to DB_FILE from constants.
+            backend (BackendType): Engine executing the job: single process DuckDB, or the workers
+                of a Dask cluster. Defaults to BackendType.DUCKDB.
+            **options: Job specific options passed to the batch job (e.g. incremental=True, or
+                pool=ConnectionPool(db_file) to borrow a connection instead of opening one).
 
         Returns:
-            Instance of IngestVotes or CalculateOutlier based on the operation type.
+            Instance of IngestVotes, CalculateOutlier or CompactVotes based on the operation type, or
+            of their Dask counterparts with the Dask backend.
 
         Raises:
-            ValueError: If an unknown operation type is provided.
+            ValueError: If an unknown operation type or backend is provided.
         """
-        # Check the type of operation and create the corresponding batch job
+        if backend == BackendType.DASK:
+            # Imported on demand, so that the single process jobs do not load Dask
+            from coffeebeans_dataeng_exercise.dask_jobs.dask_ingest import DaskIngestVotes
+            from coffeebeans_dataeng_exercise.dask_jobs.dask_outlier import DaskCalculateOutlier
+            if type == OperationType.INGEST:
+                return DaskIngestVotes(db_file, schemas, **options)
+            if type == OperationType.OUTLIER:
+                return DaskCalculateOutlier(db_file, schemas, **options)
+        elif backend != BackendType.DUCKDB:
+            logging.error(f"Unknown backend: {backend}")
+            raise ValueError(f"Unknown backend: {backend}")
+        # Check the type of operation and create the corresponding batch job; the job modules are
+        # imported on demand, so that a run only loads the code of its own job
         if type == OperationType.INGEST:
-            return IngestVotes(db_file, schemas)
+            from coffeebeans_dataeng_exercise.ingest_jobs.ingest_data import IngestVotes
+            return IngestVotes(db_file, schemas, **options)
         if type == OperationType.OUTLIER:
-            return CalculateOutlier(db_file, schemas)
+            from coffeebeans_dataeng_exercise.outlier_jobs.detect_outlier import CalculateOutlier
+            return CalculateOutlier(db_file, schemas, **options)
+        if type == OperationType.MAINTENANCE:
+            from coffeebeans_dataeng_exercise.maintenance_jobs.compact_votes import CompactVotes
+            return CompactVotes(db_file, schemas, **options)
         else:
             # Log an error if an unknown operation type is provided
             logging.error(f"Unknown ingest type: {type}")
@@ -1,6 +1,10 @@
 import logging
+import os
+import tempfile
 from abc import ABC, abstractmethod
 
+from coffeebeans_dataeng_exercise.batch.job_metrics import JobMetrics
+from coffeebeans_dataeng_exercise.db.catalog_versions import CatalogVersions
 from coffeebeans_dataeng_exercise.db.db import DatabaseConnection
 from coffeebeans_dataeng_exercise.db.schema_factory import SchemaFactory
 from coffeebeans_dataeng_exercise.db.schema_manager import SchemaManager
@@ -9,20 +13,67 @@ from coffeebeans_dataeng_exercise.db.schema_manager import SchemaManager
 # Template Method Pattern: Define the skeleton of the batch process
 class BatchJob(ABC):
 
-    def __init__(self, db_file, schemas: list[str]):
+    def __init__(self, db_file, schemas: list[str], pool=None, metrics_file=None, profile=False,
+                 coordinator=None):
         """
         Initializes the BatchJob with a database connection and schema information.
 
         Args:
             db_file (str): Path to the database file.
             schemas (list[str]): List of schema names to be managed.
+            pool (ConnectionPool, optional): Pool the job borrows its connection from, which stays
+                open after the job. Defaults to None: the job opens its own connection to `db_file`
+                and closes it at the end.
+            metrics_file (str, optional): File the metrics of the run are written to: a Prometheus
+                textfile if it ends with ".prom", JSON otherwise. Defaults to None, which only logs them.
+            profile (bool): Record the DuckDB profile of every query in the metrics. Defaults to False.
+            coordinator (WarehouseCoordinator, optional): Coordinator whose writer lease the job takes
+                before opening the database, and releases once it is closed. The job publishes a
+                snapshot for the readers after its run, a copy of the whole database: the jobs only
+                pay for it when a coordinator is given, which the CLIs only do with
+                --publish-snapshot. Defaults to None.
+
+        Raises:
+            TimeoutError: If another process holds the writer lease of the coordinator.
+            duckdb.Error: If the database cannot be opened; the writer lease is released.
         """
-        # Create a database connection
-        self.db_connection = DatabaseConnection(db_file)
+        self.pool = pool
+        self.coordinator = coordinator
+        if coordinator is not None:
+            # Wait for the other writers, instead of failing on the lock of the database file
+            coordinator.acquire_writer()
+        try:
+            if pool is not None:
+                # Borrow the connection of the current thread
+                self.db_connection = pool.connection()
+            else:
+                # Create a database connection
+                self.db_connection = DatabaseConnection(db_file)
+        except Exception:
+            if coordinator is not None:
+                # The lease would otherwise be held until the process exits
+                coordinator.release_writer()
+            raise
         # Dictionary to hold schema managers for each schema
         self.schema_managers: dict[str, SchemaManager] = {}
         # List of schemas to be managed
         self.schemas = schemas
+        # Options passed to the schema manager of each schema, keyed by schema name
+        self.schema_options: dict[str, dict] = {}
+        # Stage timings, counters and query profiles of the run
+        self.metrics = JobMetrics(type(self).__name__)
+        self.metrics_file = metrics_file
+        self.db_connection.metrics = self.metrics
+        self.profile_path = None
+        if profile:
+            profile_fd, self.profile_path = tempfile.mkstemp(prefix="profile-", suffix=".json")
+            os.close(profile_fd)
+            try:
+                self.db_connection.enable_profiling(self.profile_path)
+            except Exception:
+                # Closes the connection and releases the writer lease
+                self.close_connection()
+                raise
         logging.info("Batch Job initialized")
 
     def set_schema_manager(self, schemas):
@@ -39,29 +90,58 @@ class BatchJob(ABC):
             if schema not in self.schema_managers:
                 # Create and store a schema manager for each schema
                 self.schema_managers[schema] = SchemaFactory.schema(
-                    schema, self.db_connection)
+                    schema, self.db_connection, **self.schema_options.get(schema, {}))
         return self.schema_managers
 
     def run_schema_managers(self):
         """
-        Executes the schema creation process for all schema managers.
+        Executes the schema creation process for the schema managers whose objects are missing
+        or outdated according to the catalog version markers, then marks them as up to date.
         """
-        for schema_obj in self.schema_managers.values():
+        catalog_versions = CatalogVersions(self.db_connection)
+        outdated = catalog_versions.outdated(list(self.schema_managers.values()))
+        for schema_obj in outdated:
             # Create the schema and associated tables
             schema_obj.create_schema_and_table()
+        catalog_versions.record(outdated)
+
+    def setup(self):
+        """
+        Sets up the schema managers and creates the missing schemas and tables. Called by `run`,
+        or once by a long-running caller that transforms several batches on the same connection.
+        """
+        with self.metrics.stage("schema_setup"):
+            self.set_schema_manager(self.schemas)  # Set up schema managers
+            self.run_schema_managers()  # Create schemas and tables
 
     def run(self, file_path):
         """
         Runs the batch job process: sets schema managers, runs schema managers,
-        transforms data from the given file, and closes the database connection.
+        transforms data from the given file, publishes a snapshot for the readers of the
+        coordinator, closes the database connection and exports the metrics of the run.
+        The connection is closed, and the writer lease released, even if the run fails.
 
         Args:
-            file_path (str): Path to the file to be processed.
+            file_path (str | list): Path(s) to the file(s) to be processed.
+        """
+        try:
+            self.setup()
+            with self.metrics.stage("transform"):
+                self.transform(file_path)  # Process and transform the data
+            self.publish_snapshot()  # Make the new data visible to the readers
+        finally:
+            self.close_connection()  # Close the database connection
+        self.metrics.log_summary()
+        if self.metrics_file:
+            self.metrics.write(self.metrics_file)
+
+    def publish_snapshot(self):
+        """
+        Publishes a snapshot of the database for the readers of the coordinator, if any.
         """
-        self.set_schema_manager(self.schemas)  # Set up schema managers
-        self.run_schema_managers()  # Create schemas and tables
-        self.transform(file_path)  # Process and transform the data
-        self.close_connection()  # Close the database connection
+        if self.coordinator is not None:
+            with self.metrics.stage("snapshot_publish"):
+                self.coordinator.publish_snapshot(self.db_connection)
 
     @abstractmethod
     def transform(self, file_path):
@@ -75,7 +155,21 @@ class BatchJob(ABC):
 
     def close_connection(self):
         """
-        Closes the database connection and logs the closure.
+        Closes the database connection and logs the closure. A connection borrowed from a pool
+        is left open for the next jobs.
         """
-        self.db_connection.close()
-        logging.info("Batch Job connection closed")
+        self.db_connection.metrics = None
+        if self.profile_path is not None:
+            if self.pool is not None:
+                # The next job borrowing the connection is not profiled
+                self.db_connection.disable_profiling()
+            if os.path.exists(self.profile_path):
+                os.remove(self.profile_path)
+        if self.pool is not None:
+            logging.info("Batch Job connection returned to the pool")
+        else:
+            self.db_connection.close()
+            logging.info("Batch Job connection closed")
+        if self.coordinator is not None:
+            # The next writer can open the database
+            self.coordinator.release_writer()
@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from coffeebeans_dataeng_exercise.db.db import query_summary
+
+# Prefix of the metric names of the Prometheus textfile
+PROMETHEUS_PREFIX = "exercise_batch"
+# Extension selecting the Prometheus textfile format, any other file is written as JSON
+PROMETHEUS_EXTENSION = ".prom"
+
+
+class JobMetrics:
+    """
+    Collects the timings of the stages of one batch job run, the time spent in the queries of
+    each stage, counters such as rows and bytes read, and optionally the DuckDB profile of every
+    query. Stages can be nested: a query is accounted to the innermost stage running it.
+    """
+
+    def __init__(self, job):
+        """
+        Initialize the JobMetrics with no recorded stage.
+
+        Args:
+            job (str): Name of the job, used as the `job` label of the exported metrics.
+        """
+        self.job = job
+        self.started_at = datetime.now(timezone.utc)
+        self.stages = {}  # Seconds, calls, query seconds and query count, keyed by stage
+        self.counters = {}  # Totals such as rows_staged or bytes_read, keyed by name
+        self.gauges = {}  # Latest values such as freshness_seconds, keyed by name
+        self.profiles = []  # DuckDB profile of every query, when profiling is enabled
+        self._running = []  # Names of the stages being timed, innermost last
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time the statements run inside the `with` block as the stage `name`. A stage entered
+        several times, e.g. once per chunk, adds up its times.
+
+        Args:
+            name (str): Name of the stage.
+        """
+        self._running.append(name)
+        start_time = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self._running.pop()
+            stage = self._stage(name)
+            stage["seconds"] += elapsed
+            stage["calls"] += 1
+
+    def count(self, name, value):
+        """
+        Add `value` to the counter `name`.
+
+        Args:
+            name (str): Name of the counter, e.g. "rows_staged".
+            value (int | float | None): Amount to add; None is ignored.
+        """
+        if value is not None:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        """
+        Set the gauge `name` to `value`, replacing its previous value.
+
+        Args:
+            name (str): Name of the gauge, e.g. "freshness_seconds".
+            value (int | float): The current value.
+        """
+        self.gauges[name] = value
+
+    def record_query(self, query, elapsed, profile=None):
+        """
+        Account a query to the current stage.
+
+        Args:
+            query (str): The executed query.
+            elapsed (float): Seconds taken by the query.
+            profile (dict, optional): DuckDB profile of the query. Defaults to None.
+        """
+        name = self._running[-1] if self._running else "other"
+        stage = self._stage(name)
+        stage["query_seconds"] += elapsed
+        stage["queries"] += 1
+        if profile is not None:
+            self.profiles.append({"stage": name, "query": query_summary(query),
+                                  "seconds": round(elapsed, 6), "profile": profile})
+
+    def _stage(self, name):
+        """
+        The timings of a stage, created empty on first use.
+        """
+        return self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "query_seconds": 0.0, "queries": 0})
+
+    def as_dict(self):
+        """
+        The collected metrics as a JSON serializable dictionary.
+
+        Returns:
+            dict: The metrics of the run.
+        """
+        return {
+            "job": self.job,
+            "started_at": self.started_at.isoformat(),
+            "stages": {name: {key: round(value, 6) if isinstance(value, float) else value
+                              for key, value in stage.items()}
+                       for name, stage in self.stages.items()},
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "profiles": self.profiles,
+        }
+
+    def log_summary(self):
+        """
+        Log the seconds spent in each stage and the counters.
+        """
+        stages = ", ".join(f"{name} {stage['seconds']:.3f}s" for name, stage in self.stages.items())
+        counters = ", ".join(f"{name} {value}" for name, value in {**self.counters, **self.gauges}.items())
+        logging.info(f"{self.job} stages: {stages}" + (f"; {counters}" if counters else ""))
+
+    def write(self, path):
+        """
+        Write the metrics to `path`: as a Prometheus textfile if it ends with PROMETHEUS_EXTENSION,
+        as JSON otherwise. The file is replaced atomically, so that a collector never reads it
+        half written.
+
+        Args:
+            path (str): The metrics file.
+        """
+        if path.endswith(PROMETHEUS_EXTENSION):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.as_dict(), indent=2) + "\n"
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as metrics_file:
+            metrics_file.write(content)
+        os.replace(temp_path, path)
+        logging.info(f"Wrote the metrics of {self.job} to {path}")
+
+    def to_prometheus(self):
+        """
+        Render the metrics in the Prometheus text exposition format, as read by the textfile
+        collector of the node exporter. Profiles are only exported as JSON.
+
+        Returns:
+            str: The textfile content.
+        """
+        job = self.job.replace("\\", "\\\\").replace('"', '\\"')
+        lines = []
+
+        def gauge(name, help_text, samples):
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{label}"' for key, label in [("job", job)] + labels)
+                lines.append(f"{PROMETHEUS_PREFIX}_{name}{{{label_text}}} {value}")
+
+        gauge("last_run_timestamp_seconds", "Start time of the last run of the job.",
+              [([], self.started_at.timestamp())])
+        gauge("stage_seconds", "Seconds spent in each stage of the last run.",
+              [([("stage", name)], stage["seconds"]) for name, stage in self.stages.items()])
+        gauge("stage_query_seconds", "Seconds spent executing the queries of each stage of the last run.",
+              [([("stage", name)], stage["query_seconds"]) for name, stage in self.stages.items()])
+        gauge("stage_queries", "Queries executed by each stage of the last run.",
+              [([("stage", name)], stage["queries"]) for name, stage in self.stages.items()])
+        for name, value in self.counters.items():
+            gauge(name, f"Total {name.replace('_', ' ')} of the last run.", [([], value)])
+        for name, value in self.gauges.items():
+            gauge(name, f"Current {name.replace('_', ' ')}.", [([], value)])
+        return "\n".join(lines) + "\n"
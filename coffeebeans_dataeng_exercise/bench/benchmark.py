@@ -0,0 +1,219 @@
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.bench.votes_generator import generate_votes
+from coffeebeans_dataeng_exercise.constants.constants import (
+    OperationType,  # Enumeration of operation types
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SchemaType,  # Enumeration of schema types
+)
+
+# Stages timed by a benchmark run, in order
+STAGES = ["generate", "ingest", "reingest", "outliers", "read_outliers"]
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of the process and of its finished children, in megabytes.
+
+    Returns:
+        float: The peak RSS.
+    """
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak / unit
+
+
+class Stopwatch:
+    """
+    Times the stages of a benchmark run and records their throughput and the peak RSS reached.
+    """
+
+    def __init__(self):
+        """
+        Initialize the Stopwatch with no recorded stage.
+        """
+        self.stages = {}
+
+    def time(self, stage, function, rows=None, bytes_read=None):
+        """
+        Run and time one stage.
+
+        Args:
+            stage (str): Name of the stage.
+            function (callable): The work of the stage, called without arguments.
+            rows (int, optional): Rows processed by the stage, to compute rows per second.
+            bytes_read (int, optional): Bytes read by the stage, to compute MB per second.
+
+        Returns:
+            The result of `function`.
+        """
+        start_time = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start_time
+        metrics = {"seconds": round(seconds, 4), "peak_rss_mb": round(peak_rss_mb(), 1)}
+        if rows is not None:
+            metrics["rows_per_second"] = round(rows / seconds, 1) if seconds else None
+        if bytes_read is not None:
+            metrics["mb_per_second"] = round(bytes_read / 1024 / 1024 / seconds, 2) if seconds else None
+        self.stages[stage] = metrics
+        logging.info(f"Benchmark stage {stage}: {metrics}")
+        return result
+
+
+def run_benchmark(rows, work_dir, duplicate_rate=0.05, date_skew=0.0, seed=42, **job_options):
+    """
+    Generate a votes file and time its ingestion, its re-ingestion, the outlier detection and
+    a read of the outlier view, in a new database.
+
+    Args:
+        rows (int): Number of lines of the generated file.
+        work_dir (str): Directory receiving the generated file and the database.
+        duplicate_rate (float): Share of the lines that update an earlier vote. Defaults to 0.05.
+        date_skew (float): Skew of the vote dates towards the end of the period. Defaults to 0.0.
+        seed (int): Seed of the generated file. Defaults to 42.
+        **job_options: Options passed to both batch jobs (e.g. backend, storage).
+
+    Returns:
+        dict: The parameters of the run and the metrics of every stage.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    file_path = os.path.join(work_dir, f"votes_{rows}.jsonl")
+    db_file = os.path.join(work_dir, f"bench_{rows}.db")
+    if os.path.exists(db_file):
+        os.remove(db_file)
+
+    stopwatch = Stopwatch()
+    file_size = stopwatch.time("generate", lambda: generate_votes(
+        file_path, rows, duplicate_rate=duplicate_rate, date_skew=date_skew, seed=seed), rows=rows)
+
+    def ingest():
+        BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], db_file, **job_options).run(file_path)
+
+    def detect_outliers():
+        BatchFactory.operation(OperationType.OUTLIER, [SchemaType.VOTES, SchemaType.OUTLIER], db_file,
+                               **job_options).run(None)
+
+    def read_outliers():
+        con = duckdb.connect(db_file, read_only=True)
+        try:
+            return con.execute("SELECT * FROM blog_analysis.outlier_weeks;").fetchall()
+        finally:
+            con.close()
+
+    stopwatch.time("ingest", ingest, rows=rows, bytes_read=file_size)
+    # Every record is already stored: measures the upsert of a fully overlapping batch
+    stopwatch.time("reingest", ingest, rows=rows, bytes_read=file_size)
+    stopwatch.time("outliers", detect_outliers, rows=rows)
+    outlier_weeks = stopwatch.time("read_outliers", read_outliers)
+
+    return {
+        "rows": rows,
+        "duplicate_rate": duplicate_rate,
+        "date_skew": date_skew,
+        "seed": seed,
+        "job_options": {name: str(value) for name, value in job_options.items()},
+        "file_bytes": file_size,
+        "db_bytes": os.path.getsize(db_file),
+        "outlier_weeks": len(outlier_weeks),
+        "stages": stopwatch.stages,
+    }
+
+
+def run_isolated(rows, work_dir, **options):
+    """
+    Run `run_benchmark` in a new process, so that the peak RSS measured only covers this run.
+
+    Returns:
+        dict: The result of `run_benchmark`.
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_benchmark, (rows, work_dir), options)
+
+
+def environment():
+    """
+    Description of the machine and versions a benchmark ran with.
+
+    Returns:
+        dict: The environment.
+    """
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "duckdb": duckdb.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare_with_baseline(results, baseline):
+    """
+    Compare the stage timings of a benchmark with a stored baseline. Runs are matched on their
+    number of rows, duplicate rate, date skew and job options.
+
+    Args:
+        results (dict): The benchmark results, as saved by `save_results`.
+        baseline (dict): The baseline results, in the same format.
+
+    Returns:
+        list[dict]: One entry per stage found in both, with the ratio of the durations
+        (above 1 when slower than the baseline).
+    """
+    def key(run):
+        return run["rows"], run["duplicate_rate"], run["date_skew"], json.dumps(run.get("job_options", {}),
+                                                                                sort_keys=True)
+
+    baseline_runs = {key(run): run for run in baseline.get("runs", [])}
+    comparison = []
+    for run in results["runs"]:
+        baseline_run = baseline_runs.get(key(run))
+        if baseline_run is None:
+            continue
+        for stage, metrics in run["stages"].items():
+            baseline_metrics = baseline_run["stages"].get(stage)
+            if not baseline_metrics or not baseline_metrics["seconds"]:
+                continue
+            comparison.append({
+                "rows": run["rows"],
+                "stage": stage,
+                "seconds": metrics["seconds"],
+                "baseline_seconds": baseline_metrics["seconds"],
+                "ratio": round(metrics["seconds"] / baseline_metrics["seconds"], 3),
+            })
+    return comparison
+
+
+def save_results(runs, output_path, baseline_path=None):
+    """
+    Save benchmark runs as JSON, with the environment and, if a baseline is given, the comparison.
+
+    Args:
+        runs (list[dict]): The results of `run_benchmark`.
+        output_path (str): Path of the JSON file written.
+        baseline_path (str, optional): Path of the JSON results to compare with. Defaults to None.
+
+    Returns:
+        dict: The saved results.
+    """
+    results = {"environment": environment(), "runs": runs}
+    if baseline_path:
+        with open(baseline_path) as baseline_file:
+            results["comparison"] = compare_with_baseline(results, json.load(baseline_file))
+    with open(output_path, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+    logging.info(f"Saved benchmark results to {output_path}")
+    return results
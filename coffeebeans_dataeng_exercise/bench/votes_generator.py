@@ -0,0 +1,43 @@
+import logging
+import os
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    GENERATE_VOTES_PATH,  # Path to the SQL file generating synthetic votes
+)
+from coffeebeans_dataeng_exercise.db.db import DatabaseConnection
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+# Number of rows of the standard benchmark files
+BENCH_SIZES = {"1M": 1_000_000, "10M": 10_000_000, "100M": 100_000_000}
+
+
+def generate_votes(output_path, rows, duplicate_rate=0.05, date_skew=0.0, start_date="2020-01-01",
+                   days=3 * 365, seed=42):
+    """
+    Write a synthetic votes JSON lines file with the layout of the source data.
+
+    Args:
+        output_path (str): Path of the file written.
+        rows (int): Number of lines of the file.
+        duplicate_rate (float): Share of the lines that are a new version of an earlier vote
+            (same Id, other values). Defaults to 0.05.
+        date_skew (float): 0 spreads the votes evenly over the period; higher values concentrate
+            them towards its end, as a growing site does. Defaults to 0.0.
+        start_date (str): First day of the period (YYYY-MM-DD). Defaults to "2020-01-01".
+        days (int): Length of the period in days. Defaults to three years.
+        seed (int): Seed of the generated values; the same seed gives the same file. Defaults to 42.
+
+    Returns:
+        int: The size of the file in bytes.
+    """
+    db_connection = DatabaseConnection(":memory:")
+    try:
+        db_connection.execute(Reader.format(
+            GENERATE_VOTES_PATH, output_path=output_path.replace("'", "''"), rows=int(rows),
+            duplicate_rate=float(duplicate_rate), date_skew=float(date_skew), start_date=start_date,
+            days=int(days), seed=int(seed)))
+    finally:
+        db_connection.close()
+    file_size = os.path.getsize(output_path)
+    logging.info(f"Generated {rows} votes ({file_size / 1024 / 1024:.1f} MB) in {output_path}")
+    return file_size
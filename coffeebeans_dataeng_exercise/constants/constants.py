@@ -4,6 +4,7 @@ class OperationType:
     """
     INGEST = "Ingest"  # Operation type for data ingestion
     OUTLIER = "Outlier"  # Operation type for outlier detection
+    MAINTENANCE = "Maintenance"  # Operation type for the compaction of the votes table
 
 
 class SchemaType:
@@ -12,24 +13,264 @@ class SchemaType:
     """
     VOTES = "votes"  # Schema for voting data
     OUTLIER = "outlier_weeks"  # Schema for outlier detection data
+    MANIFEST = "ingest_manifest"  # Schema for the record of already ingested files
+    WEEKLY_COUNTS = "weekly_vote_counts"  # Schema for the maintained weekly vote counts
+    PARTITIONS = "votes_partitions"  # Schema for the statistics of the Parquet votes partitions
+    REJECTS = "votes_rejects"  # Schema for the malformed records set aside by the tolerant ingestion
+    ROLLUPS = "votes_rollups"  # Schema for the vote counts pre-aggregated per period and vote type
+
+
+class StorageType:
+    """
+    Defines where the ingested votes are stored.
+    """
+    DUCKDB = "duckdb"  # Votes stored in the DuckDB votes table
+    PARQUET = "parquet"  # Votes stored as Hive partitioned Parquet files by year and week
+
+
+class WriteStrategy:
+    """
+    Defines how the staged records of a batch are written over the stored votes.
+    """
+    UPSERT = "upsert"  # Insert new votes and overwrite every stored vote with the same Id
+    INSERT_NEW_ONLY = "insert-new-only"  # Only insert the votes whose Id is not stored yet
+    MERGE_CHANGED_ONLY = "merge-changed-only"  # Insert new votes and overwrite only the ones that changed
+
+
+class CompressionType:
+    """
+    Defines the compression of the input files, named as the `compression` option of read_json.
+    """
+    NONE = "none"  # Plain JSON lines
+    GZIP = "gzip"  # Gzip, possibly made of several concatenated members
+    ZSTD = "zstd"  # Zstandard, possibly made of several concatenated frames
+
+
+class OutlierMethod:
+    """
+    Defines how an outlier rule scores the vote count of a week against its baseline.
+    """
+    RELATIVE = "relative"  # |1 - count / mean|, as the outlier_weeks view
+    ZSCORE = "zscore"  # |count - mean| / standard deviation
+    MAD = "mad"  # |count - median| / scaled median absolute deviation, robust to the outliers themselves
+
+
+class OutlierBaseline:
+    """
+    Defines the weeks an outlier rule compares a week with.
+    """
+    GLOBAL = "global"  # Every week
+    YEAR = "year"  # The weeks of the same year
+    ROLLING = "rolling"  # The N weeks before the week
+
+
+class RollupGrain:
+    """
+    Defines the periods the votes are pre-aggregated by, named as the parts of date_trunc.
+    """
+    DAY = "day"  # One row per day and vote type
+    WEEK = "week"  # One row per ISO week (starting on Monday) and vote type
+    MONTH = "month"  # One row per month and vote type
+
+
+class BackendType:
+    """
+    Defines the engine that executes the batch jobs.
+    """
+    DUCKDB = "duckdb"  # Single process DuckDB statements
+    DASK = "dask"  # Shards processed in parallel by the workers of a Dask cluster
 
 
 # Constants related to database configuration and file paths
 DB_FILE = "warehouse.db"  # Default path to the database file
 SCHEMA = "blog_analysis"  # Default schema name for the database
 VOTES_TABLE = "votes"  # Table name for storing vote data
+YEAR_WEEK_COLUMN = "year_week"  # Column of the votes table holding the integer week key computed at load
 OUTLIERS_TABLE = "outlier_weeks"  # Table name for storing outlier data
+MANIFEST_TABLE = "ingest_manifest"  # Table name for storing the state of ingested files
+CATALOG_VERSIONS_TABLE = "catalog_versions"  # Table name for storing the version of the objects created by the jobs
+DATA_VERSION_TABLE = "data_version"  # Table name for storing the version of the data, bumped by every write
+REJECTS_TABLE = "votes_rejects"  # Table name for storing the malformed records of the input files
+WEEKLY_COUNTS_TABLE = "weekly_vote_counts"  # Table name for storing the number of votes per week
+PARTITIONS_TABLE = "votes_partitions"  # Table name for storing the row count of each Parquet partition
+PARQUET_VOTES_VIEW = "votes_parquet"  # View reading the votes stored as Parquet files
+OUTLIER_RULE_TABLE_PREFIX = "outliers_"  # Prefix of the tables holding the weeks flagged by each outlier rule
+OUTLIER_SLICE_COUNTS_TABLE = "outlier_slice_counts"  # Table holding the weekly counts the rules read during a run
+OUTLIER_RULE_STAGED_SUFFIX = "__staged"  # Suffix of the table a rule is written to before it replaces its table
+ROLLUP_TABLE_PREFIX = "votes_rollup_"  # Prefix of the rollup tables, followed by their grain
+ROLLUP_DELTA_TABLE = "rollup_delta"  # Temporary table holding the daily changes of a batch to the rollups
+STAGING_TABLE = "staged_votes"  # Temporary table holding the deduplicated records of a batch
+PARTITION_ROWS_TABLE = "partition_rows"  # Temporary table holding the rows of the partitions being rewritten
+TOUCHED_PARTITIONS_TABLE = "touched_partitions"  # Temporary table holding the keys of the partitions being rewritten
+TEMP_SCHEMA = "temp"  # Catalog holding the temporary tables of a connection
+JSON_FORMAT = "newline_delimited"  # Layout of the input files: one JSON record per line
+JSON_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"  # Format of the timestamps of the input files
+DASK_SHARD_SIZE = 256 * 1024 * 1024  # Bytes of input read by one Dask ingestion task
+RECORD_BATCH_SIZE = 100_000  # Records of an iterable of dicts staged and committed together
+RECORDS_VIEW = "ingested_records"  # View exposing the in-memory records handed to the ingestion
+QUERY_CACHE_SIZE = 256 * 1024 * 1024  # Bytes of query results kept by the query result cache
+QUERY_CACHE_DATABASE = "warehouse"  # Name the warehouse is attached under by the query result cache
+COMPACTED_SUFFIX = ".compacted"  # Suffix of the copy of the database written by the maintenance job
+COMPACTION_SOURCE_DATABASE = "source"  # Name the database being compacted is attached under
+COMPACTION_TARGET_DATABASE = "compacted"  # Name the compacted copy of the database is attached under
+WRITER_LOCK_SUFFIX = ".writer.lock"  # Suffix of the file locked by the process owning the database for writing
+SNAPSHOT_SUFFIX = ".snapshot"  # Suffix of the copy of the database published for the readers
+SNAPSHOT_DATABASE = "snapshot"  # Name the snapshot being published is attached under
+WRITER_LEASE_TIMEOUT = 60.0  # Seconds a job waits for the writer lease held by another process
+DAEMON_POLL_INTERVAL = 1.0  # Seconds between two scans of the landing directory by the ingestion daemon
+DAEMON_BATCH_BYTES = 64 * 1024 * 1024  # Bytes of landed files that trigger a micro-batch of the daemon
+DAEMON_MAX_LATENCY = 5.0  # Seconds a landed file waits at most before the daemon commits it
+DAEMON_PUBLISH_INTERVAL = 60.0  # Seconds at least between two snapshots published by the ingestion daemon
 
 FILE_PATH = "uncommitted/votes.jsonl"  # Path to the input file for votes data
+# Patterns used to pick up vote files, plain or compressed, when a directory is ingested
+INPUT_FILE_PATTERNS = ("*.jsonl", "*.jsonl.gz", "*.jsonl.zst")
+PARQUET_ROOT = "warehouse_parquet/votes"  # Root directory of the Parquet votes storage
 
 # Paths to SQL scripts for database operations
 # SQL script to create the outlier view
 CREATE_OUTLIER_VIEW_PATH = "coffeebeans_dataeng_exercise/db/sql/create_outlier_view.sql"
+# SQL script to create the outlier view on top of the weekly counts aggregate
+CREATE_MATERIALIZED_OUTLIER_VIEW_PATH = "coffeebeans_dataeng_exercise/db/sql/create_materialized_outlier_view.sql"
 # SQL script to create the schema
 CREATE_SCHEMA_PATH = "coffeebeans_dataeng_exercise/db/sql/create_schema.sql"
 # SQL script to create the votes table
 CREATE_VOTES_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_votes_table.sql"
+# SQL script to create the votes table with integer, decimal and timestamp columns
+CREATE_TYPED_VOTES_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_typed_votes_table.sql"
+# SQL script to migrate a string typed votes table to the typed layout
+MIGRATE_TO_TYPED_VOTES_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/migrate_to_typed_votes_table.sql"
+# SQL script to create the macro computing the integer week key of a timestamp
+CREATE_YEAR_WEEK_MACRO_PATH = "coffeebeans_dataeng_exercise/db/sql/create_year_week_macro.sql"
+# SQL script to migrate a votes table created before the week key column
+MIGRATE_TO_YEAR_WEEK_VOTES_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/migrate_to_year_week_votes_table.sql"
 # SQL script to drop tables
 DROP_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/drop_table.sql"
-# SQL script to insert data into the votes table
-INSERT_INTO_VOTES_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/insert_into_votes_table.sql"
+# SQL script to replace a table with a new table written next to it
+REPLACE_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/replace_table.sql"
+# SQL script to check whether a table exists
+SELECT_TABLE_EXISTS_PATH = "coffeebeans_dataeng_exercise/db/sql/select_table_exists.sql"
+# SQL script to read the columns and data types of a table
+SELECT_COLUMN_TYPES_PATH = "coffeebeans_dataeng_exercise/db/sql/select_column_types.sql"
+# SQL script to create the temporary staging table of a batch
+CREATE_STAGING_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_staging_table.sql"
+# SQL script to stage the deduplicated records of JSON files
+STAGE_VOTES_PATH = "coffeebeans_dataeng_exercise/db/sql/stage_votes.sql"
+# SQL script to drop the staged records older than the stored ones
+PRUNE_OLDER_STAGED_VOTES_PATH = "coffeebeans_dataeng_exercise/db/sql/prune_older_staged_votes.sql"
+# SQL script to drop the staged records whose Id is already stored
+REMOVE_EXISTING_STAGED_VOTES_PATH = "coffeebeans_dataeng_exercise/db/sql/remove_existing_staged_votes.sql"
+# SQL script to drop the staged records identical to the stored ones
+REMOVE_UNCHANGED_STAGED_VOTES_PATH = "coffeebeans_dataeng_exercise/db/sql/remove_unchanged_staged_votes.sql"
+# SQL script to append the staged records to the votes table
+INSERT_VOTES_PATH = "coffeebeans_dataeng_exercise/db/sql/insert_votes.sql"
+# SQL script to upsert the staged records into the votes table
+UPSERT_VOTES_PATH = "coffeebeans_dataeng_exercise/db/sql/upsert_votes.sql"
+# SQL script to deduplicate the records of one shard and write them as a Parquet file
+DEDUP_SHARD_PATH = "coffeebeans_dataeng_exercise/db/sql/dedup_shard.sql"
+# SQL script to stage the deduplicated records of the shards of a batch
+STAGE_SHARDS_PATH = "coffeebeans_dataeng_exercise/db/sql/stage_shards.sql"
+# SQL script to count the votes of each week of one shard
+SELECT_WEEKLY_PARTIAL_COUNTS_PATH = "coffeebeans_dataeng_exercise/db/sql/select_weekly_partial_counts.sql"
+# SQL script to count the votes of each week of one shard without partition keys
+SELECT_WEEKLY_PARTIAL_COUNTS_BY_DATE_PATH = "coffeebeans_dataeng_exercise/db/sql/select_weekly_partial_counts_by_date.sql"
+# SQL script to delete every row of a table
+DELETE_ALL_ROWS_PATH = "coffeebeans_dataeng_exercise/db/sql/delete_all_rows.sql"
+# SQL script to insert the vote count of one week
+INSERT_WEEKLY_COUNT_PATH = "coffeebeans_dataeng_exercise/db/sql/insert_weekly_count.sql"
+# SQL script to generate a synthetic votes file for the benchmarks
+GENERATE_VOTES_PATH = "coffeebeans_dataeng_exercise/db/sql/generate_votes.sql"
+# SQL script to create the table of the rejected records
+CREATE_REJECTS_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_rejects_table.sql"
+# SQL script to insert a rejected record
+INSERT_REJECT_PATH = "coffeebeans_dataeng_exercise/db/sql/insert_reject.sql"
+# SQL script to count the records of files that cannot be written
+COUNT_INVALID_VOTES_PATH = "coffeebeans_dataeng_exercise/db/sql/count_invalid_votes.sql"
+# SQL script to create the table of the catalog version markers
+CREATE_CATALOG_VERSIONS_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_catalog_versions_table.sql"
+# SQL script to read the catalog version markers of the existing objects
+SELECT_CATALOG_VERSIONS_PATH = "coffeebeans_dataeng_exercise/db/sql/select_catalog_versions.sql"
+# SQL script to write the catalog version marker of an object
+UPSERT_CATALOG_VERSION_PATH = "coffeebeans_dataeng_exercise/db/sql/upsert_catalog_version.sql"
+# SQL script to count the votes per week, in total and per value of every dimension, for the outlier rules
+STAGE_OUTLIER_SLICE_COUNTS_PATH = "coffeebeans_dataeng_exercise/db/sql/stage_outlier_slice_counts.sql"
+# SQL script to read the weekly counts of the outlier rules from the weekly counts aggregate
+STAGE_OUTLIER_SLICE_WEEKLY_COUNTS_PATH = "coffeebeans_dataeng_exercise/db/sql/stage_outlier_slice_weekly_counts.sql"
+# SQL script to keep only the values of a dimension with the most votes
+DELETE_MINOR_DIMENSION_VALUES_PATH = "coffeebeans_dataeng_exercise/db/sql/delete_minor_dimension_values.sql"
+# SQL script to write the weeks flagged by an outlier rule to its table
+CREATE_OUTLIER_RULE_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_outlier_rule_table.sql"
+# SQL script to count the rows of a table
+COUNT_ROWS_PATH = "coffeebeans_dataeng_exercise/db/sql/count_rows.sql"
+# SQL script to create the weekly vote counts table
+CREATE_WEEKLY_COUNTS_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_weekly_counts_table.sql"
+# SQL script to recompute the weekly vote counts from the votes table
+REBUILD_WEEKLY_COUNTS_PATH = "coffeebeans_dataeng_exercise/db/sql/rebuild_weekly_counts.sql"
+# SQL script to apply the staged batch to the weekly vote counts
+APPLY_WEEKLY_COUNTS_DELTA_PATH = "coffeebeans_dataeng_exercise/db/sql/apply_weekly_counts_delta.sql"
+# SQL script to create a rollup table of the vote counts per period and vote type
+CREATE_ROLLUP_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_rollup_table.sql"
+# SQL script to recompute a rollup table from the votes, or from a finer rollup
+REBUILD_ROLLUP_PATH = "coffeebeans_dataeng_exercise/db/sql/rebuild_rollup.sql"
+# SQL script to count the daily changes of the staged batch to the rollups
+STAGE_ROLLUP_DELTA_PATH = "coffeebeans_dataeng_exercise/db/sql/stage_rollup_delta.sql"
+# SQL script to apply the daily changes of the staged batch to a rollup table
+APPLY_ROLLUP_DELTA_PATH = "coffeebeans_dataeng_exercise/db/sql/apply_rollup_delta.sql"
+# SQL script to stage the deduplicated records of an in-memory relation
+STAGE_RECORDS_PATH = "coffeebeans_dataeng_exercise/db/sql/stage_records.sql"
+# SQL script to create the table of the data version
+CREATE_DATA_VERSION_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_data_version_table.sql"
+# SQL script to read the data version
+SELECT_DATA_VERSION_PATH = "coffeebeans_dataeng_exercise/db/sql/select_data_version.sql"
+# SQL script to increment the data version
+BUMP_DATA_VERSION_PATH = "coffeebeans_dataeng_exercise/db/sql/bump_data_version.sql"
+# SQL script to attach the warehouse read-only to the query result cache
+ATTACH_READ_ONLY_PATH = "coffeebeans_dataeng_exercise/db/sql/attach_read_only.sql"
+# SQL script to detach the warehouse from the query result cache
+DETACH_DATABASE_PATH = "coffeebeans_dataeng_exercise/db/sql/detach_database.sql"
+# SQL script to rewrite the votes into a new table ordered by CreationDate
+REWRITE_VOTES_SORTED_PATH = "coffeebeans_dataeng_exercise/db/sql/rewrite_votes_sorted.sql"
+# SQL script to write the checkpointed data to the database file and truncate the WAL
+CHECKPOINT_PATH = "coffeebeans_dataeng_exercise/db/sql/checkpoint.sql"
+# SQL script to read the row groups of a table and the block usage of the database
+SELECT_STORAGE_STATS_PATH = "coffeebeans_dataeng_exercise/db/sql/select_storage_stats.sql"
+# SQL script to copy a database into a new file without its free blocks
+COMPACT_DATABASE_PATH = "coffeebeans_dataeng_exercise/db/sql/compact_database.sql"
+# SQL script to read the name of the database of a connection
+SELECT_CURRENT_DATABASE_PATH = "coffeebeans_dataeng_exercise/db/sql/select_current_database.sql"
+# SQL script to copy the database into a new snapshot file
+PUBLISH_SNAPSHOT_PATH = "coffeebeans_dataeng_exercise/db/sql/publish_snapshot.sql"
+# SQL script to keep the result of a query in the query result cache
+CREATE_CACHE_ENTRY_PATH = "coffeebeans_dataeng_exercise/db/sql/create_cache_entry.sql"
+# SQL script to load a query result cached as a Parquet file
+LOAD_CACHE_ENTRY_PATH = "coffeebeans_dataeng_exercise/db/sql/load_cache_entry.sql"
+# SQL script to write a cached query result as a Parquet file
+EXPORT_CACHE_ENTRY_PATH = "coffeebeans_dataeng_exercise/db/sql/export_cache_entry.sql"
+# SQL script to estimate the size in bytes of a cached query result
+SELECT_CACHE_ENTRY_SIZE_PATH = "coffeebeans_dataeng_exercise/db/sql/select_cache_entry_size.sql"
+# SQL script to create the statistics table of the Parquet partitions
+CREATE_PARTITION_STATS_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_partition_stats_table.sql"
+# SQL script to collect the staged rows with their partition keys
+STAGE_PARTITION_ROWS_PATH = "coffeebeans_dataeng_exercise/db/sql/stage_partition_rows.sql"
+# SQL script to collect the keys of the partitions rewritten by a batch
+STAGE_TOUCHED_PARTITIONS_PATH = "coffeebeans_dataeng_exercise/db/sql/stage_touched_partitions.sql"
+# SQL script to read the partition keys of the touched partitions
+SELECT_PARTITION_KEYS_PATH = "coffeebeans_dataeng_exercise/db/sql/select_partition_keys.sql"
+# SQL script to add the rows already stored in the touched partitions
+MERGE_EXISTING_PARTITION_ROWS_PATH = "coffeebeans_dataeng_exercise/db/sql/merge_existing_partition_rows.sql"
+# SQL script to write the touched partitions as Parquet files
+COPY_PARTITION_ROWS_PATH = "coffeebeans_dataeng_exercise/db/sql/copy_partition_rows.sql"
+# SQL script to update the statistics of the rewritten partitions
+UPDATE_PARTITION_STATS_PATH = "coffeebeans_dataeng_exercise/db/sql/update_partition_stats.sql"
+# SQL script to create the view reading the Parquet votes
+CREATE_PARQUET_VOTES_VIEW_PATH = "coffeebeans_dataeng_exercise/db/sql/create_parquet_votes_view.sql"
+# SQL script to create the view of the Parquet votes before any file is written
+CREATE_EMPTY_PARQUET_VOTES_VIEW_PATH = "coffeebeans_dataeng_exercise/db/sql/create_empty_parquet_votes_view.sql"
+# SQL script to create the ingestion manifest table
+CREATE_MANIFEST_TABLE_PATH = "coffeebeans_dataeng_exercise/db/sql/create_manifest_table.sql"
+# SQL script to read the manifest entries of a list of files
+SELECT_MANIFEST_ENTRIES_PATH = "coffeebeans_dataeng_exercise/db/sql/select_manifest_entries.sql"
+# SQL script to read the manifest entries matching a list of content hashes
+SELECT_MANIFEST_HASHES_PATH = "coffeebeans_dataeng_exercise/db/sql/select_manifest_hashes.sql"
+# SQL script to insert or update the manifest entry of a file
+UPSERT_MANIFEST_ENTRY_PATH = "coffeebeans_dataeng_exercise/db/sql/upsert_manifest_entry.sql"
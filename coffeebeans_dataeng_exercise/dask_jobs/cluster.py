@@ -0,0 +1,34 @@
+import logging
+from contextlib import contextmanager
+
+from dask.distributed import Client, LocalCluster
+
+
+@contextmanager
+def dask_client(n_workers=None, scheduler_address=None):
+    """
+    Connect to a Dask cluster for the duration of a job.
+
+    Args:
+        n_workers (int, optional): Number of worker processes of the local cluster. Defaults to
+            None, which lets Dask pick one per core.
+        scheduler_address (str, optional): Address of an existing scheduler (e.g. "tcp://host:8786")
+            to run the tasks on several nodes. Defaults to None, which starts a LocalCluster.
+
+    Yields:
+        distributed.Client: The client submitting the tasks.
+    """
+    if scheduler_address:
+        client = Client(scheduler_address)
+        cluster = None
+    else:
+        # One thread per worker process: every task runs its own single threaded DuckDB connection
+        cluster = LocalCluster(n_workers=n_workers, threads_per_worker=1, processes=True)
+        client = Client(cluster)
+    logging.info(f"Connected to Dask cluster: {client.scheduler.address}")
+    try:
+        yield client
+    finally:
+        client.close()
+        if cluster is not None:
+            cluster.close()
@@ -0,0 +1,106 @@
+import logging
+import os
+import tempfile
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DASK_SHARD_SIZE,  # Default number of bytes read by one ingestion task
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DB_FILE,  # Default path to the database file
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    STAGE_SHARDS_PATH,  # Path to the SQL file for staging the records of the deduplicated shards
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    STAGING_TABLE,  # Name of the temporary staging table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SchemaType,  # Enumeration of schema types
+)
+from coffeebeans_dataeng_exercise.dask_jobs.cluster import dask_client
+from coffeebeans_dataeng_exercise.dask_jobs.shards import dedup_shard, split_shards
+from coffeebeans_dataeng_exercise.db.parquet_storage import sql_string_list
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+from coffeebeans_dataeng_exercise.ingest_jobs.compression import readable_path
+from coffeebeans_dataeng_exercise.ingest_jobs.ingest_data import IngestVotes
+
+
+class DaskIngestVotes(IngestVotes):
+    """
+    Ingestion job parsing and deduplicating the input files on the workers of a Dask cluster.
+
+    The files are cut into shards that the workers parse and deduplicate in parallel, each into
+    its own Parquet file. The shards are then merged, deduplicated across shards and written with
+    the same upsert as the single process ingestion, to the DuckDB table or the Parquet storage.
+    """
+
+    def __init__(self, db_file=DB_FILE, schemas=[SchemaType.VOTES], n_workers=None, scheduler_address=None,
+                 shard_size=DASK_SHARD_SIZE, shard_dir=None, **options):
+        """
+        Initialize the DaskIngestVotes job.
+
+        Args:
+            db_file (str): Path to the database file. Defaults to DB_FILE from constants.
+            schemas (list): List of schema types. Defaults to [SchemaType.VOTES].
+            n_workers (int, optional): Number of worker processes of the local cluster. Defaults to
+                None, which uses one per core.
+            scheduler_address (str, optional): Address of an existing Dask scheduler. Defaults to None,
+                which starts a LocalCluster.
+            shard_size (int): Bytes of input read by one task. Defaults to DASK_SHARD_SIZE.
+            shard_dir (str, optional): Directory receiving the deduplicated shards; it must be shared
+                with the workers when they run on other nodes. Defaults to None, a temporary directory.
+            **options: Options of IngestVotes (incremental, typed, storage, ...).
+        """
+        super().__init__(db_file, schemas, **options)
+        self.n_workers = n_workers
+        self.scheduler_address = scheduler_address
+        self.shard_size = shard_size
+        self.shard_dir = shard_dir
+
+    def insert_files(self, file_paths, work_dir):
+        """
+        Deduplicate the records of the given files on the Dask workers and upsert them.
+
+        Args:
+            file_paths (list[str]): The files to read.
+            work_dir (str): Unused: links to compressed files are created in the shard directory,
+                which the workers can see.
+        """
+        with tempfile.TemporaryDirectory(dir=self.shard_dir) as shard_dir:
+            read_paths = [readable_path(os.path.abspath(path), os.path.join(shard_dir, f"input_{index}"))
+                          for index, path in enumerate(file_paths)]
+            shards = split_shards(read_paths, self.shard_size)
+            # The workers parse the records straight into the types of the votes table
+            columns = self.schema_managers[SchemaType.VOTES].read_json_columns()
+            with dask_client(self.n_workers, self.scheduler_address) as client:
+                futures = client.map(
+                    dedup_shard,
+                    [file_path for file_path, _, _ in shards],
+                    [start for _, start, _ in shards],
+                    [end for _, _, end in shards],
+                    [os.path.join(shard_dir, f"shard_{index}.parquet") for index in range(len(shards))],
+                    columns=columns)
+                results = client.gather(futures)
+
+            shard_files = [output_path for output_path, row_count in results if row_count]
+            logging.info(f"Deduplicated {len(shards)} shard(s) into {sum(row_count for _, row_count in results)} "
+                         f"record(s) on the Dask workers")
+            if not shard_files:
+                return
+
+            # Merge the shards into the staging table, then write them as the single process job does
+            self.stage_shards(shard_files)
+            self.upsert_staged()
+
+    def stage_shards(self, shard_files):
+        """
+        Load the records of the deduplicated shards into the temporary staging table.
+
+        Args:
+            shard_files (list[str]): The Parquet files written by the workers.
+        """
+        self.create_staging_table()
+        stage_shards_query = Reader.format(
+            STAGE_SHARDS_PATH, staging_table=STAGING_TABLE, shard_files=sql_string_list(shard_files))
+        with self.db_connection.stage("read"):
+            self.metrics.count("rows_staged", self.db_connection.execute(stage_shards_query).fetchone()[0])
@@ -0,0 +1,86 @@
+import logging
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DB_FILE,  # Default path to the database file
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DELETE_ALL_ROWS_PATH,  # Path to the SQL file deleting every row of a table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    INSERT_WEEKLY_COUNT_PATH,  # Path to the SQL file inserting the vote count of one week
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SchemaType,  # Enumeration of schema types
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    StorageType,  # Enumeration of storage backends
+)
+from coffeebeans_dataeng_exercise.dask_jobs.cluster import dask_client
+from coffeebeans_dataeng_exercise.dask_jobs.shards import merge_weekly_counts, weekly_partial_counts
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+from coffeebeans_dataeng_exercise.outlier_jobs.detect_outlier import CalculateOutlier
+
+
+class DaskCalculateOutlier(CalculateOutlier):
+    """
+    Outlier detection job counting the votes of each week on the workers of a Dask cluster.
+
+    With the Parquet storage, every worker counts the votes per week of one data file of the
+    storage, read in place. The partial counts are added up into the weekly vote counts aggregate,
+    from which the outlier view is created as in materialized mode. Votes stored in the DuckDB
+    table are counted by a single GROUP BY of the table instead: the workers cannot read the
+    database file, and exporting the table for them would cost more than the count itself.
+    """
+
+    def __init__(self, db_file=DB_FILE, schemas=[SchemaType.VOTES, SchemaType.OUTLIER], n_workers=None,
+                 scheduler_address=None, **options):
+        """
+        Initialize the DaskCalculateOutlier job.
+
+        Args:
+            db_file (str): Path to the database file. Defaults to DB_FILE from constants.
+            schemas (list): List of schema types. Defaults to [SchemaType.VOTES, SchemaType.OUTLIER].
+            n_workers (int, optional): Number of worker processes of the local cluster. Defaults to
+                None, which uses one per core.
+            scheduler_address (str, optional): Address of an existing Dask scheduler. Defaults to None,
+                which starts a LocalCluster.
+            **options: Options of CalculateOutlier (storage, parquet_root).
+        """
+        # The weekly counts are always recomputed: by the workers for the Parquet storage, by the
+        # rebuild of CalculateOutlier for the votes table
+        options["materialized"] = True
+        options["refresh"] = options.get("storage") != StorageType.PARQUET
+        super().__init__(db_file, schemas, **options)
+        self.n_workers = n_workers
+        self.scheduler_address = scheduler_address
+
+    def materialized_view_query(self):
+        """
+        Recompute the weekly vote counts aggregate, on the Dask workers for the Parquet storage,
+        and build the query creating the outlier view on top of it.
+
+        Returns:
+            str: The SQL query creating the outlier view.
+        """
+        if self.storage != StorageType.PARQUET:
+            # One scan of the votes table by DuckDB
+            return super().materialized_view_query()
+
+        weekly_counts = self.schema_managers[SchemaType.WEEKLY_COUNTS]
+        shard_files = self.parquet_storage().data_files()
+        with dask_client(self.n_workers, self.scheduler_address) as client:
+            partial_counts = client.gather(client.map(weekly_partial_counts, shard_files))
+        counts = merge_weekly_counts(partial_counts)
+        logging.info(f"Counted the votes of {len(counts)} week(s) from {len(shard_files)} shard(s)")
+
+        insert_weekly_count_query = Reader.format(
+            INSERT_WEEKLY_COUNT_PATH, schema=weekly_counts.schema, table=weekly_counts.table)
+        with self.db_connection.transaction():
+            self.db_connection.execute(Reader.format(
+                DELETE_ALL_ROWS_PATH, schema=weekly_counts.schema, table=weekly_counts.table))
+            if counts:
+                self.db_connection.executemany(insert_weekly_count_query, [list(row) for row in counts])
+
+        # The aggregate is now up to date: create the view over it without rebuilding it again
+        weekly_counts.created = False
+        return super().materialized_view_query()
@@ -0,0 +1,166 @@
+import os
+from pathlib import PurePath
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_YEAR_WEEK_MACRO_PATH,  # Path to the SQL file creating the week key macro
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CompressionType,  # Compression of the input files
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DEDUP_SHARD_PATH,  # Path to the SQL file deduplicating the records of one shard
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    JSON_FORMAT,  # Layout of the input files
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    JSON_TIMESTAMP_FORMAT,  # Format of the timestamps of the input files
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_WEEKLY_PARTIAL_COUNTS_BY_DATE_PATH,  # Path to the SQL file counting the votes of each week of a file without partition keys
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_WEEKLY_PARTIAL_COUNTS_PATH,  # Path to the SQL file counting the votes of each week of one shard
+)
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+from coffeebeans_dataeng_exercise.ingest_jobs.compression import extension_compression
+
+# Size of the blocks copied while extracting a shard
+COPY_BLOCK_SIZE = 8 * 1024 * 1024
+# Schema of the in-memory database of a task
+TASK_SCHEMA = "main"
+
+
+def split_shards(file_paths, shard_size):
+    """
+    Cut the files of a batch into shards of about `shard_size` bytes. Byte ranges are aligned
+    on line boundaries by the tasks themselves, so the files are not read here. A compressed file
+    cannot be entered in the middle and makes a single shard.
+
+    Args:
+        file_paths (list[str]): The files of the batch.
+        shard_size (int): Target size of a shard in bytes.
+
+    Returns:
+        list[tuple[str, int, int]]: The (file path, start offset, end offset) of every shard.
+    """
+    shards = []
+    for file_path in file_paths:
+        file_size = os.path.getsize(file_path)
+        if extension_compression(file_path) != CompressionType.NONE:
+            shards.append((file_path, 0, file_size))
+            continue
+        for start in range(0, file_size, shard_size):
+            shards.append((file_path, start, min(start + shard_size, file_size)))
+    return shards
+
+
+def line_start(data, offset):
+    """
+    Offset of the first line starting at or after `offset`.
+
+    Args:
+        data (BinaryIO): The open file.
+        offset (int): Any byte offset of the file.
+
+    Returns:
+        int: The offset of the start of the line.
+    """
+    if offset == 0:
+        return 0
+    # The line containing the previous byte belongs to the previous shard
+    data.seek(offset - 1)
+    data.readline()
+    return data.tell()
+
+
+def dedup_shard(file_path, start, end, output_path, columns):
+    """
+    Dask task: deduplicate the records of the lines starting in [start, end) of a file and write
+    them as a Parquet file.
+
+    Args:
+        file_path (str): The JSON lines file.
+        start (int): Start offset of the shard.
+        end (int): End offset of the shard.
+        output_path (str): Path of the Parquet file written; the extracted lines are written next to it.
+        columns (str): Columns and types of the votes table, as the `columns` argument of `read_json`.
+
+    Returns:
+        tuple[str, int]: The Parquet file and its number of records.
+    """
+    shard_path = file_path
+    if start > 0 or end < os.path.getsize(file_path):
+        shard_path = output_path + ".jsonl"
+        with open(file_path, "rb") as data, open(shard_path, "wb") as shard:
+            first, last = line_start(data, start), line_start(data, end)
+            data.seek(first)
+            remaining = last - first
+            while remaining > 0:
+                block = data.read(min(COPY_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                shard.write(block)
+                remaining -= len(block)
+        if os.path.getsize(shard_path) == 0:
+            # A line longer than the shard: it is read by the shard it starts in
+            os.remove(shard_path)
+            return None, 0
+
+    con = duckdb.connect(config={"threads": 1})
+    try:
+        row_count = con.execute(Reader.format(
+            DEDUP_SHARD_PATH, shard_path=shard_path.replace("'", "''"),
+            output_path=output_path.replace("'", "''"), columns=columns,
+            json_format=JSON_FORMAT, timestamp_format=JSON_TIMESTAMP_FORMAT)).fetchone()[0]
+    finally:
+        con.close()
+        if shard_path != file_path:
+            os.remove(shard_path)
+    return output_path, row_count
+
+
+def weekly_partial_counts(shard_path):
+    """
+    Dask task: count the votes of each week of one Parquet shard, grouped by integer week key.
+    The key of a data file of the Parquet storage comes from the year=/week= partition keys of
+    its path; the key of any other file is computed from CreationDate by the year_week macro.
+
+    Args:
+        shard_path (str): The Parquet file.
+
+    Returns:
+        list[tuple]: The (year, week number, vote count) of every week of the shard.
+    """
+    shard_path_literal = shard_path.replace("'", "''")
+    parts = PurePath(shard_path).parts
+    partitioned = any(part.startswith("year=") for part in parts) and any(part.startswith("week=") for part in parts)
+    con = duckdb.connect(config={"threads": 1})
+    try:
+        if partitioned:
+            return con.execute(Reader.format(
+                SELECT_WEEKLY_PARTIAL_COUNTS_PATH, shard_path=shard_path_literal)).fetchall()
+        con.execute(Reader.format(CREATE_YEAR_WEEK_MACRO_PATH, schema=TASK_SCHEMA))
+        return con.execute(Reader.format(
+            SELECT_WEEKLY_PARTIAL_COUNTS_BY_DATE_PATH, schema=TASK_SCHEMA, shard_path=shard_path_literal)).fetchall()
+    finally:
+        con.close()
+
+
+def merge_weekly_counts(partial_counts):
+    """
+    Add up the weekly counts of the shards.
+
+    Args:
+        partial_counts (list[list[tuple]]): The result of `weekly_partial_counts` for every shard.
+
+    Returns:
+        list[tuple]: The (year, week number, vote count) of every week.
+    """
+    totals = {}
+    for shard_counts in partial_counts:
+        for year, week_number, vote_count in shard_counts:
+            totals[(year, week_number)] = totals.get((year, week_number), 0) + vote_count
+    return [(year, week_number, vote_count) for (year, week_number), vote_count in totals.items()]
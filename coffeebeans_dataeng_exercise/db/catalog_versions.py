@@ -0,0 +1,96 @@
+import logging
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CATALOG_VERSIONS_TABLE,  # Table name for storing the catalog version markers
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_CATALOG_VERSIONS_TABLE_PATH,  # Path to the SQL file for creating the markers table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_SCHEMA_PATH,  # Path to the SQL file for creating the schema
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SCHEMA,  # Default schema name
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_CATALOG_VERSIONS_PATH,  # Path to the SQL file reading the markers
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    UPSERT_CATALOG_VERSION_PATH,  # Path to the SQL file writing a marker
+)
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+
+class CatalogVersions:
+    """
+    Records, for every object created by a schema manager, the version of the DDL it was created
+    with, so that a run against an up to date warehouse can skip the DDL altogether: checking
+    the markers costs a single query.
+    """
+
+    def __init__(self, db_connection, schema=SCHEMA, table=CATALOG_VERSIONS_TABLE):
+        """
+        Initialize the CatalogVersions with database connection, schema, and table.
+
+        Args:
+            db_connection (DatabaseConnection): The connection to the database.
+            schema (str): The schema of the markers table. Defaults to SCHEMA from constants.
+            table (str): The name of the markers table. Defaults to CATALOG_VERSIONS_TABLE from constants.
+        """
+        self.db_connection = db_connection
+        self.schema = schema
+        self.table = table
+
+    def applied(self):
+        """
+        Read the markers whose objects still exist.
+
+        Returns:
+            dict[tuple[str, str], str]: Version keyed by (schema, table); empty on a new warehouse.
+        """
+        select_catalog_versions_query = Reader.format(
+            SELECT_CATALOG_VERSIONS_PATH, schema=self.schema, table=self.table)
+        try:
+            rows = self.db_connection.execute(select_catalog_versions_query).fetchall()
+        except duckdb.CatalogException:
+            # No markers table yet: every object is created
+            return {}
+        return {(schema, table): version for schema, table, version in rows}
+
+    def outdated(self, schema_managers):
+        """
+        Select the schema managers whose objects are missing or were created with another version.
+
+        Args:
+            schema_managers (list[SchemaManager]): The managers of a job.
+
+        Returns:
+            list[SchemaManager]: The managers that have to run their DDL.
+        """
+        applied = self.applied()
+        outdated = [manager for manager in schema_managers
+                    if any(applied.get((manager.schema, table)) != manager.catalog_version()
+                           for table in manager.catalog_tables())]
+        if not outdated:
+            logging.info("Catalog up to date: skipped the schema DDL")
+        return outdated
+
+    def record(self, schema_managers):
+        """
+        Mark the objects of the given schema managers as created with their current version.
+
+        Args:
+            schema_managers (list[SchemaManager]): The managers that ran their DDL.
+        """
+        if not schema_managers:
+            return
+        self.db_connection.execute(Reader.format(CREATE_SCHEMA_PATH, schema=self.schema))
+        self.db_connection.execute(Reader.format(
+            CREATE_CATALOG_VERSIONS_TABLE_PATH, schema=self.schema, table=self.table))
+        upsert_catalog_version_query = Reader.format(
+            UPSERT_CATALOG_VERSION_PATH, schema=self.schema, table=self.table)
+        self.db_connection.executemany(upsert_catalog_version_query, [
+            [manager.schema, table, manager.CREATES_TABLE, manager.catalog_version()]
+            for manager in schema_managers for table in manager.catalog_tables()])
@@ -0,0 +1,73 @@
+import logging
+import threading
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.constants.constants import DB_FILE
+from coffeebeans_dataeng_exercise.db.db import DatabaseConnection
+
+
+class ConnectionPool:
+    """
+    Holds one DuckDB database handle and lends a connection (a cursor of the handle) to every
+    thread, so that successive batch jobs do not reopen the database and replay its WAL, and
+    several threads can work on the same database.
+
+    A process can only open a database file once with a given configuration: use one pool per
+    database file.
+    """
+
+    def __init__(self, db_file=DB_FILE, read_only=False, threads=None, memory_limit=None,
+                 preserve_insertion_order=None):
+        """
+        Open the database handle of the pool.
+
+        Args:
+            db_file (str): Path to the database file. Defaults to DB_FILE from constants.
+            read_only (bool): Open the database read only, for query workloads; several processes
+                can read the same file this way. Defaults to False.
+            threads (int, optional): Number of threads DuckDB uses. Defaults to None, one per core.
+            memory_limit (str, optional): DuckDB memory ceiling (e.g. "4GB"). Defaults to None,
+                the DuckDB default.
+            preserve_insertion_order (bool, optional): Set to False to let DuckDB reorder rows,
+                which lowers the memory needed by large loads and exports. Defaults to None, the
+                DuckDB default.
+        """
+        self.db_file = db_file
+        self.read_only = read_only
+        # Settings applied to the database handle, and so to every connection of the pool
+        config = {name: str(value).lower() if isinstance(value, bool) else str(value)
+                  for name, value in [("threads", threads), ("memory_limit", memory_limit),
+                                      ("preserve_insertion_order", preserve_insertion_order)]
+                  if value is not None}
+        self.handle = duckdb.connect(db_file, read_only=read_only, config=config)
+        self.local = threading.local()  # Connection of each thread
+        self.connections = []  # Every connection lent, closed with the pool
+        self.lock = threading.Lock()
+        logging.info(f"Opened connection pool on {db_file} (read only: {read_only}, settings: {config})")
+
+    def connection(self):
+        """
+        The connection of the calling thread, created on its first call.
+
+        Returns:
+            DatabaseConnection: A connection sharing the database handle of the pool.
+        """
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            with self.lock:
+                connection = DatabaseConnection(self.db_file, con=self.handle.cursor())
+                self.connections.append(connection)
+            self.local.connection = connection
+        return connection
+
+    def close(self):
+        """
+        Close every connection lent by the pool and the database handle.
+        """
+        with self.lock:
+            for connection in self.connections:
+                connection.close()
+            self.connections = []
+            self.handle.close()
+        logging.info(f"Closed connection pool on {self.db_file}")
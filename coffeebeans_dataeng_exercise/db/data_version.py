@@ -0,0 +1,67 @@
+import duckdb
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    BUMP_DATA_VERSION_PATH,  # Path to the SQL file incrementing the data version
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_DATA_VERSION_TABLE_PATH,  # Path to the SQL file for creating the data version table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_SCHEMA_PATH,  # Path to the SQL file for creating the schema
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DATA_VERSION_TABLE,  # Table name for storing the data version
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SCHEMA,  # Default schema name
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_DATA_VERSION_PATH,  # Path to the SQL file reading the data version
+)
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+
+class DataVersion:
+    """
+    Counter of the commits that changed the data of the warehouse. The jobs bump it in the
+    transaction of every write, so that a reader can tell that a result it computed before is
+    still current by comparing a single number.
+    """
+
+    def __init__(self, db_connection, schema=SCHEMA, table=DATA_VERSION_TABLE):
+        """
+        Initialize the DataVersion with database connection, schema, and table.
+
+        Args:
+            db_connection (DatabaseConnection): The connection to the database.
+            schema (str): The schema of the data version table. Defaults to SCHEMA from constants.
+            table (str): The name of the data version table. Defaults to DATA_VERSION_TABLE from constants.
+        """
+        self.db_connection = db_connection
+        self.schema = schema
+        self.table = table
+
+    def current(self):
+        """
+        Read the data version.
+
+        Returns:
+            int: The number of commits that changed the data; 0 before the first write.
+        """
+        select_data_version_query = Reader.format(SELECT_DATA_VERSION_PATH, schema=self.schema, table=self.table)
+        try:
+            row = self.db_connection.execute(select_data_version_query).fetchone()
+        except duckdb.CatalogException:
+            # No data version table yet: nothing was written
+            return 0
+        return row[0] if row else 0
+
+    def bump(self):
+        """
+        Increment the data version. Runs in the transaction of the write, if any, so that the
+        new version becomes visible together with the data.
+        """
+        self.db_connection.execute(Reader.format(CREATE_SCHEMA_PATH, schema=self.schema))
+        self.db_connection.execute(Reader.format(
+            CREATE_DATA_VERSION_TABLE_PATH, schema=self.schema, table=self.table))
+        self.db_connection.execute(Reader.format(BUMP_DATA_VERSION_PATH, schema=self.schema, table=self.table))
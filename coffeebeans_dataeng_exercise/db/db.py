@@ -1,23 +1,53 @@
+import json
 import logging
+import os
+import time
+from contextlib import contextmanager, nullcontext
 
 import duckdb
 
 from coffeebeans_dataeng_exercise.constants.constants import DB_FILE
 
+# Maximum number of characters of a query written to the debug log
+QUERY_LOG_LIMIT = 2000
+
+
+def query_summary(query):
+    """
+    Short description of a query for the log: its first line, which is the leading comment of the
+    SQL templates, cut to 100 characters.
+
+    Args:
+        query (str): The SQL query.
+
+    Returns:
+        str: The summary.
+    """
+    first_line = query.strip().split("\n", 1)[0].strip()
+    return first_line[:100]
+
 
 class DatabaseConnection:
     """
     A class to manage a connection to a DuckDB database and execute queries.
     """
 
-    def __init__(self, db_file=DB_FILE):
+    def __init__(self, db_file=DB_FILE, con=None):
         """
         Initialize the DatabaseConnection object with a connection to the database.
 
         Args:
             db_file (str): Path to the database file. Defaults to DB_FILE from constants.
+            con (duckdb.DuckDBPyConnection, optional): An open connection to use, e.g. a cursor
+                lent by a ConnectionPool. Defaults to None, which opens the database.
         """
         self.db_file = db_file  # Store the path to the database file
+        self.metrics = None  # JobMetrics the queries are accounted to, set by the job using the connection
+        self.profile_path = None  # File DuckDB writes the profile of the last query to, when profiling
+        if con is not None:
+            # Connection sharing the database handle of a pool
+            self.con = con
+            return
         # Establish a connection to the DuckDB database
         self.con = duckdb.connect(self.db_file)
         # Log the successful connection to the database
@@ -30,15 +60,162 @@ class DatabaseConnection:
         Args:
             query (str): The SQL query to execute.
             params (tuple, optional): Parameters to pass to the query. Defaults to None.
+
+        Returns:
+            duckdb.DuckDBPyConnection: The connection holding the result of the query.
         """
+        start_time = time.perf_counter()
         if params:
             # Execute the query with parameters
-            self.con.execute(query, params)
+            result = self.con.execute(query, params)
         else:
             # Execute the query without parameters
-            self.con.execute(query)
-        # Log the executed query
-        logging.info(f"Executed query: {query}")
+            result = self.con.execute(query)
+        elapsed = time.perf_counter() - start_time
+        self.log_query(query, elapsed)
+        self.record_query(query, elapsed)
+        return result
+
+    def executemany(self, query, rows):
+        """
+        Execute a parameterized SQL query once per row of parameters. The statement is prepared
+        once and only the parameters are bound for every row.
+
+        Args:
+            query (str): The SQL query to execute.
+            rows (list): One sequence of parameters per execution.
+
+        Returns:
+            duckdb.DuckDBPyConnection: The connection holding the result of the last execution.
+        """
+        start_time = time.perf_counter()
+        result = self.con.executemany(query, rows)
+        elapsed = time.perf_counter() - start_time
+        self.log_query(query, elapsed, f" for {len(rows)} rows")
+        self.record_query(query, elapsed)
+        return result
+
+    def record_query(self, query, elapsed):
+        """
+        Account a query to the metrics of the job using the connection, with its profile when
+        profiling is enabled.
+
+        Args:
+            query (str): The executed query.
+            elapsed (float): Seconds taken by the query.
+        """
+        if self.metrics is None:
+            return
+        profile = None
+        if self.profile_path is not None:
+            try:
+                with open(self.profile_path) as profile_file:
+                    profile = json.load(profile_file)
+                # Removed once read, so that a statement writing no profile (e.g. SET) gets none
+                os.remove(self.profile_path)
+            except (OSError, ValueError):
+                profile = None
+        self.metrics.record_query(query, elapsed, profile)
+
+    def stage(self, name):
+        """
+        Time the `with` block as a stage of the metrics of the job, if any.
+
+        Args:
+            name (str): Name of the stage.
+
+        Returns:
+            A context manager.
+        """
+        return self.metrics.stage(name) if self.metrics is not None else nullcontext()
+
+    def enable_profiling(self, profile_path):
+        """
+        Make DuckDB write the profile of every query, with the timing and cardinality of each
+        operator as shown by EXPLAIN ANALYZE, to `profile_path`.
+
+        Args:
+            profile_path (str): File receiving the JSON profile of the last query.
+        """
+        self.configure(enable_profiling="json", profiling_output=profile_path)
+        self.profile_path = profile_path
+
+    def disable_profiling(self):
+        """
+        Stop profiling the queries.
+        """
+        self.profile_path = None
+        self.execute("RESET enable_profiling")
+
+    @staticmethod
+    def log_query(query, elapsed, detail=""):
+        """
+        Log the time taken by a query; its text is only logged at DEBUG level, up to QUERY_LOG_LIMIT
+        characters, so that large statements do not slow down the hot path.
+
+        Args:
+            query (str): The executed query.
+            elapsed (float): Seconds taken by the query.
+            detail (str): Text added after the word "query". Defaults to "".
+        """
+        logging.info(f"Executed query{detail} in {elapsed * 1000:.1f} ms: {query_summary(query)}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            text = query if len(query) <= QUERY_LOG_LIMIT else query[:QUERY_LOG_LIMIT] + " [...]"
+            logging.debug(f"Query text: {text}")
+
+    def configure(self, **settings):
+        """
+        Apply DuckDB settings to the connection, e.g. `configure(memory_limit="2GB")`.
+        Settings given as None are left unchanged.
+
+        Args:
+            **settings: Values of the settings, keyed by setting name.
+        """
+        for name, value in settings.items():
+            if value is not None:
+                # Settings cannot be bound as parameters: quote the value as a string literal
+                value = str(value).replace("'", "''")
+                self.execute(f"SET {name} = '{value}'")
+
+    def register(self, view, data):
+        """
+        Expose an in-memory object (PyArrow table or record batch reader, pandas DataFrame, ...) as
+        a view of the connection. DuckDB scans the object in place, without copying it.
+
+        Args:
+            view (str): Name of the view.
+            data (object): The object to expose.
+        """
+        self.con.register(view, data)
+        logging.info(f"Registered {type(data).__name__} as view: {view}")
+
+    def unregister(self, view):
+        """
+        Remove a view created by `register`, releasing the object it exposes.
+
+        Args:
+            view (str): Name of the view.
+        """
+        self.con.unregister(view)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run the statements executed inside the `with` block in a single transaction.
+        The transaction is committed when the block exits and rolled back if it raises.
+
+        Yields:
+            DatabaseConnection: This connection.
+        """
+        self.execute("BEGIN TRANSACTION")
+        try:
+            yield self
+        except BaseException:
+            # Undo every statement of the block before propagating the error
+            self.execute("ROLLBACK")
+            raise
+        with self.stage("commit"):
+            self.execute("COMMIT")
 
     def close(self):
         """
@@ -19,6 +19,9 @@ class OutliersSchemaManager(SchemaManager):
     Inherits from SchemaManager.
     """
 
+    # The outliers view is created by the outlier job, the manager only creates the schema
+    CREATES_TABLE = False
+
     def __init__(self, db_connection, schema=SCHEMA, table=OUTLIERS_TABLE):
         """
         Initialize the OutliersSchemaManager with database connection, schema, and table.
@@ -37,7 +40,7 @@ class OutliersSchemaManager(SchemaManager):
         Create the schema and table in the database if they do not already exist.
         """
         # Read the SQL query for creating the schema from the file and format it with the schema name
-        create_schema_query = Reader.read(CREATE_SCHEMA_PATH).format(schema=self.schema)
+        create_schema_query = Reader.format(CREATE_SCHEMA_PATH, schema=self.schema)
         # Execute the schema creation query on the database
         self.db_connection.execute(create_schema_query)
         # Log the successful creation of the schema
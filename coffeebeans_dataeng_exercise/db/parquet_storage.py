@@ -0,0 +1,213 @@
+import glob
+import logging
+import os
+import shutil
+import tempfile
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    COPY_PARTITION_ROWS_PATH,  # Path to the SQL file writing the partitions as Parquet files
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_EMPTY_PARQUET_VOTES_VIEW_PATH,  # Path to the SQL file for the view before any file exists
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_PARQUET_VOTES_VIEW_PATH,  # Path to the SQL file for the view reading the Parquet files
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DROP_TABLE_PATH,  # Path to the SQL file for dropping a table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    MERGE_EXISTING_PARTITION_ROWS_PATH,  # Path to the SQL file adding the rows already stored
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    PARQUET_ROOT,  # Default root directory of the Parquet votes storage
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    PARQUET_VOTES_VIEW,  # Default name of the view reading the Parquet votes
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    PARTITION_ROWS_TABLE,  # Name of the temporary table holding the rewritten partitions
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_PARTITION_KEYS_PATH,  # Path to the SQL file reading the touched partition keys
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    STAGE_PARTITION_ROWS_PATH,  # Path to the SQL file collecting the staged rows with partition keys
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    STAGE_TOUCHED_PARTITIONS_PATH,  # Path to the SQL file collecting the keys of the rewritten partitions
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    TEMP_SCHEMA,  # Catalog of the temporary tables
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    TOUCHED_PARTITIONS_TABLE,  # Name of the temporary table holding the keys of the rewritten partitions
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    UPDATE_PARTITION_STATS_PATH,  # Path to the SQL file updating the partition statistics
+)
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+
+def sql_string_list(values):
+    """
+    Render a list of strings as a SQL list literal, e.g. ['a', 'b'].
+
+    Args:
+        values (list[str]): The strings to render.
+
+    Returns:
+        str: The SQL list literal.
+    """
+    return "[" + ", ".join("'" + value.replace("'", "''") + "'" for value in values) + "]"
+
+
+class ParquetVotesStorage:
+    """
+    Stores the votes as Hive partitioned Parquet files (`year=<year>/week=<week>/*.parquet`)
+    next to the DuckDB database, which keeps a view over the files and a row count per partition.
+
+    Every batch only rewrites the partitions it touches: the partitions of the staged records,
+    and the partitions holding the stored versions of their Ids, so that a vote whose CreationDate
+    moves to another week is removed from its previous partition. The staged records are merged
+    with the records already stored in those partitions, which they replace by Id, and the new
+    partition directories replace the old ones; a partition left without rows is removed.
+    """
+
+    def __init__(self, db_connection, votes_schema_manager, stats_schema_manager,
+                 root=PARQUET_ROOT, view=PARQUET_VOTES_VIEW):
+        """
+        Initialize the ParquetVotesStorage.
+
+        Args:
+            db_connection (DatabaseConnection): The connection to the database.
+            votes_schema_manager (VotesSchemaManager): Manager of the votes table, whose columns
+                define the columns of the Parquet files.
+            stats_schema_manager (PartitionStatsSchemaManager): Manager of the partition statistics table.
+            root (str): Root directory of the Parquet files. Defaults to PARQUET_ROOT from constants.
+            view (str): Name of the view reading the Parquet files, created in the votes schema.
+                Defaults to PARQUET_VOTES_VIEW from constants.
+        """
+        self.db_connection = db_connection
+        self.votes = votes_schema_manager
+        self.stats = stats_schema_manager
+        # The view keeps an absolute path so that it can be queried from any working directory
+        self.root = os.path.abspath(root)
+        self.view = view
+
+    def partition_dir(self, year, week):
+        """
+        Directory of a partition, following the naming DuckDB uses for Hive partitions.
+
+        Args:
+            year (int | None): Year partition key.
+            week (int | None): Week partition key.
+
+        Returns:
+            str: The path of the partition directory.
+        """
+        return os.path.join(self.root, f"year={'NULL' if year is None else year}",
+                            f"week={'NULL' if week is None else week}")
+
+    def data_files(self, partition_dir="year=*/week=*"):
+        """
+        List the Parquet files of the storage, or of one partition directory.
+
+        Returns:
+            list[str]: The data files.
+        """
+        return sorted(glob.glob(os.path.join(self.root, partition_dir, "*.parquet")))
+
+    def write_staged(self, staging_table):
+        """
+        Merge the staged records into the partitions they belong to.
+
+        Args:
+            staging_table (str): Name of the temporary table holding the deduplicated batch.
+        """
+        os.makedirs(self.root, exist_ok=True)
+
+        # Staged rows with their partition keys
+        self.db_connection.execute(Reader.format(
+            STAGE_PARTITION_ROWS_PATH, partition_rows=PARTITION_ROWS_TABLE, staging_table=staging_table))
+        # Their partitions, and the partitions of the versions they replace, found through the view
+        self.create_view()
+        self.db_connection.execute(Reader.format(
+            STAGE_TOUCHED_PARTITIONS_PATH, touched_partitions=TOUCHED_PARTITIONS_TABLE,
+            partition_rows=PARTITION_ROWS_TABLE, schema=self.votes.schema, view=self.view,
+            staging_table=staging_table))
+        partitions = self.db_connection.execute(Reader.format(
+            SELECT_PARTITION_KEYS_PATH, touched_partitions=TOUCHED_PARTITIONS_TABLE)).fetchall()
+        if not partitions:
+            # Nothing to write, e.g. a replay filtered out by the write strategy
+            self.drop_temp_tables()
+            return
+
+        # Only the files of the touched partitions are read back
+        existing_files = [path for year, week in partitions
+                          for path in self.data_files(self.partition_dir(year, week))]
+        if existing_files:
+            self.db_connection.execute(Reader.format(
+                MERGE_EXISTING_PARTITION_ROWS_PATH, partition_rows=PARTITION_ROWS_TABLE, staging_table=staging_table,
+                existing_files=sql_string_list(existing_files)))
+
+        # New partitions are written next to the storage, on the same file system, then swapped in
+        staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            self.db_connection.execute(Reader.format(
+                COPY_PARTITION_ROWS_PATH, partition_rows=PARTITION_ROWS_TABLE, target_dir=staging_dir.replace("'", "''")))
+            self.swap_partitions(staging_dir, partitions)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        self.db_connection.execute(Reader.format(
+            UPDATE_PARTITION_STATS_PATH, schema=self.stats.schema, table=self.stats.table,
+            partition_rows=PARTITION_ROWS_TABLE, touched_partitions=TOUCHED_PARTITIONS_TABLE))
+        self.drop_temp_tables()
+        self.create_view()
+
+        logging.info(f"Rewrote {len(partitions)} Parquet partition(s) under {self.root}")
+
+    def drop_temp_tables(self):
+        """
+        Drop the temporary tables of a batch.
+        """
+        for table in (PARTITION_ROWS_TABLE, TOUCHED_PARTITIONS_TABLE):
+            self.db_connection.execute(Reader.format(DROP_TABLE_PATH, schema=TEMP_SCHEMA, table=table))
+
+    def swap_partitions(self, staging_dir, partitions):
+        """
+        Replace the touched partition directories with the ones written in `staging_dir`; a
+        touched partition without a new directory no longer has any row and is removed.
+
+        Args:
+            staging_dir (str): Directory holding the newly written partitions.
+            partitions (list[tuple]): The (year, week) keys of the touched partitions.
+        """
+        trash_dir = os.path.join(staging_dir, ".replaced")
+        for year, week in partitions:
+            target = self.partition_dir(year, week)
+            source = os.path.join(staging_dir, os.path.relpath(target, self.root))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(target):
+                # Move the old partition away first, so that the swap itself is a single rename
+                replaced = os.path.join(trash_dir, os.path.relpath(target, self.root))
+                os.makedirs(os.path.dirname(replaced), exist_ok=True)
+                os.replace(target, replaced)
+            if os.path.exists(source):
+                os.replace(source, target)
+
+    def create_view(self):
+        """
+        Create or replace the view reading the Parquet files. Filters on the `year` and `week`
+        columns of the view only read the matching partitions.
+        """
+        if self.data_files():
+            create_view_query = Reader.format(
+                CREATE_PARQUET_VOTES_VIEW_PATH, schema=self.votes.schema, view=self.view,
+                files_glob=os.path.join(self.root, "year=*", "week=*", "*.parquet").replace("'", "''"))
+        else:
+            # The view cannot read an empty directory: expose the columns without rows until then
+            create_view_query = Reader.format(
+                CREATE_EMPTY_PARQUET_VOTES_VIEW_PATH, schema=self.votes.schema, view=self.view, table=self.votes.table)
+        self.db_connection.execute(create_view_query)
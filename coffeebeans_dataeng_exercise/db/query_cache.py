@@ -0,0 +1,258 @@
+import glob
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    ATTACH_READ_ONLY_PATH,  # Path to the SQL file attaching the warehouse read-only
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_CACHE_ENTRY_PATH,  # Path to the SQL file keeping the result of a query
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DB_FILE,  # Default path to the database file
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DETACH_DATABASE_PATH,  # Path to the SQL file detaching the warehouse
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DROP_TABLE_PATH,  # Path to the SQL file for dropping a table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    EXPORT_CACHE_ENTRY_PATH,  # Path to the SQL file writing a cached result as Parquet
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    LOAD_CACHE_ENTRY_PATH,  # Path to the SQL file loading a cached Parquet result
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    QUERY_CACHE_DATABASE,  # Name the warehouse is attached under
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    QUERY_CACHE_SIZE,  # Default bytes of query results kept by the cache
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_CACHE_ENTRY_SIZE_PATH,  # Path to the SQL file estimating the size of a cached result
+)
+from coffeebeans_dataeng_exercise.db.data_version import DataVersion
+from coffeebeans_dataeng_exercise.db.db import DatabaseConnection
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+# Statements whose result can be cached: queries, which cannot change the data
+CACHEABLE_PATTERN = re.compile(r"^\s*(?:SELECT|WITH|FROM|VALUES)\b", re.IGNORECASE)
+# String literals and quoted identifiers, whose content is kept as is
+QUOTED_PATTERN = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+# Runs of whitespace
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Schema of the tables of the in-memory catalog holding the cached results
+CACHE_SCHEMA = "memory.main"
+# Extension of the cached results written to disk
+CACHE_FILE_EXTENSION = ".parquet"
+
+
+def normalize_query(query):
+    """
+    Normalize the text of a query for the cache key: runs of whitespace outside of string
+    literals and quoted identifiers become one space, and trailing semicolons are removed. The
+    case is kept, as it names the columns of the result.
+
+    Args:
+        query (str): The SQL query.
+
+    Returns:
+        str: The normalized query.
+    """
+    # The quoted parts are at the odd positions of the split
+    parts = QUOTED_PATTERN.split(query)
+    normalized = "".join(part if index % 2 else WHITESPACE_PATTERN.sub(" ", part) for index, part in enumerate(parts))
+    return normalized.strip().rstrip(";").strip()
+
+
+class QueryCache:
+    """
+    Cache of query results keyed on the normalized query and on the data version of the
+    warehouse, which the jobs bump on every write: a result is served until the data it was
+    computed from changes.
+
+    Results are kept as tables of an in-memory DuckDB catalog, the least recently used ones being
+    evicted beyond `max_bytes`, and optionally as Parquet files in `cache_dir`, which other
+    processes reuse. The warehouse is only attached read-only, while a query runs, so that any
+    number of readers can share it.
+    """
+
+    def __init__(self, db_file=DB_FILE, max_bytes=QUERY_CACHE_SIZE, cache_dir=None, rewrite=None,
+                 coordinator=None):
+        """
+        Initialize the QueryCache with no cached result.
+
+        Args:
+            db_file (str): Path to the database file. Defaults to DB_FILE from constants.
+            max_bytes (int): Bytes of results kept in memory, and on disk. Defaults to QUERY_CACHE_SIZE.
+            cache_dir (str, optional): Directory the results are also written to as Parquet files.
+                Defaults to None, which only keeps them in memory.
+            rewrite (callable, optional): Function returning an equivalent, cheaper query to run
+                instead of a query, or None, e.g. `rewrite_query` to read the rollups. Called
+                with the connection and the query. Defaults to None.
+            coordinator (WarehouseCoordinator, optional): Coordinator choosing the file the queries
+                read, the snapshot published by the writer or the database itself when no writer
+                holds it. Defaults to None, which always reads `db_file`.
+        """
+        self.db_file = db_file
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.rewrite = rewrite
+        self.coordinator = coordinator
+        # In-memory catalog holding the cached results, with the warehouse attached on demand
+        self.db_connection = DatabaseConnection(db_file, con=duckdb.connect())
+        self.entries = OrderedDict()  # Size in bytes of the cached results, least recently used first
+        self.size = 0  # Bytes of the results kept in memory
+        self.hits = 0  # Queries answered from memory or from disk
+        self.misses = 0  # Queries run on the warehouse
+        self._lock = threading.Lock()  # The catalog is shared by the threads of a service
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def query(self, query):
+        """
+        Return the result of a query, from the cache when the data did not change since it was
+        computed, running it on the warehouse otherwise.
+
+        Args:
+            query (str): The query, which has to be a SELECT (or WITH, FROM, VALUES) statement.
+
+        Returns:
+            duckdb.DuckDBPyRelation: The result, read from the in-memory catalog. It is only valid
+            until the next query, which may evict it.
+
+        Raises:
+            ValueError: If the statement is not a query.
+        """
+        if not CACHEABLE_PATTERN.match(query):
+            raise ValueError("Only queries can be answered from the cache")
+        normalized = normalize_query(query)
+        with self._lock, self._read_lease() as read_file:
+            self.db_connection.execute(Reader.format(
+                ATTACH_READ_ONLY_PATH, db_file=read_file.replace("'", "''"), database=QUERY_CACHE_DATABASE))
+            try:
+                version = DataVersion(self.db_connection).current()
+                key = hashlib.sha256(f"{version}\n{normalized}".encode()).hexdigest()
+                table = f"result_{key[:32]}"
+                if table in self.entries:
+                    self.entries.move_to_end(table)
+                    self.hits += 1
+                    logging.info(f"Query answered from the memory cache (data version {version})")
+                elif self._load(table):
+                    self.hits += 1
+                    logging.info(f"Query answered from the disk cache (data version {version})")
+                else:
+                    self.misses += 1
+                    self._run(table, normalized)
+            finally:
+                self.db_connection.execute(Reader.format(DETACH_DATABASE_PATH, database=QUERY_CACHE_DATABASE))
+            self._evict()
+            return self.db_connection.con.table(f"{CACHE_SCHEMA}.{table}")
+
+    @contextmanager
+    def _read_lease(self):
+        """
+        The file a query reads, held by the coordinator while the query runs.
+        """
+        if self.coordinator is None:
+            yield self.db_file
+        else:
+            with self.coordinator.read_lease() as read_file:
+                yield read_file
+
+    def _run(self, table, query):
+        """
+        Run a query on the attached warehouse and keep its result.
+
+        Args:
+            table (str): Table of the result in the in-memory catalog.
+            query (str): The normalized query.
+        """
+        rewritten = self.rewrite(self.db_connection.con, query) if self.rewrite else None
+        self.db_connection.execute(Reader.format(CREATE_CACHE_ENTRY_PATH, table=table, query=rewritten or query))
+        self._keep(table)
+        if self.cache_dir:
+            # Written next to its final name and renamed, so that another process never reads it half written
+            file_path = self._file_path(table)
+            self.db_connection.execute(Reader.format(
+                EXPORT_CACHE_ENTRY_PATH, table=table, file_path=(file_path + ".tmp").replace("'", "''")))
+            os.replace(file_path + ".tmp", file_path)
+            self._evict_files()
+
+    def _load(self, table):
+        """
+        Load a result written to the cache directory by this or another process.
+
+        Args:
+            table (str): Table of the result in the in-memory catalog.
+
+        Returns:
+            bool: Whether the result was found on disk.
+        """
+        if not self.cache_dir or not os.path.exists(self._file_path(table)):
+            return False
+        file_path = self._file_path(table)
+        self.db_connection.execute(Reader.format(
+            LOAD_CACHE_ENTRY_PATH, table=table, file_path=file_path.replace("'", "''")))
+        # Mark the file as recently used for the eviction of the cache directory
+        os.utime(file_path)
+        self._keep(table)
+        return True
+
+    def _keep(self, table):
+        """
+        Account a new result in memory.
+
+        Args:
+            table (str): Table of the result in the in-memory catalog.
+        """
+        size = self.db_connection.execute(Reader.format(SELECT_CACHE_ENTRY_SIZE_PATH, table=table)).fetchone()[0]
+        self.entries[table] = size
+        self.size += size
+
+    def _evict(self):
+        """
+        Drop the least recently used results beyond `max_bytes`, always keeping the latest one.
+        """
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            table, size = self.entries.popitem(last=False)
+            self.size -= size
+            self.db_connection.execute(Reader.format(DROP_TABLE_PATH, schema=CACHE_SCHEMA, table=table))
+            logging.info(f"Evicted cached result {table} ({size} bytes)")
+
+    def _evict_files(self):
+        """
+        Delete the least recently used files of the cache directory beyond `max_bytes`, always
+        keeping the latest one.
+        """
+        files = sorted(glob.glob(os.path.join(self.cache_dir, "*" + CACHE_FILE_EXTENSION)), key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in files)
+        for path in files[:-1]:
+            if total <= self.max_bytes:
+                break
+            total -= os.path.getsize(path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already evicted by another process sharing the directory
+                pass
+
+    def _file_path(self, table):
+        """
+        Path of the Parquet file of a result in the cache directory.
+        """
+        return os.path.join(self.cache_dir, table + CACHE_FILE_EXTENSION)
+
+    def close(self):
+        """
+        Close the in-memory catalog, dropping the results kept in memory.
+        """
+        self.db_connection.close()
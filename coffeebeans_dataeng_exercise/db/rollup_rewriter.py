@@ -0,0 +1,296 @@
+import logging
+import re
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    ROLLUP_TABLE_PREFIX,  # Prefix of the rollup tables
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SCHEMA,  # Default schema name
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_TABLE_EXISTS_PATH,  # Path to the SQL file checking whether a table exists
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    VOTES_TABLE,  # Name of the votes table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    RollupGrain,  # Enumeration of the rollup periods
+)
+from coffeebeans_dataeng_exercise.db.rollups_schema_manager import ROLLUP_GRAINS
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+# Shape of the aggregations the rollups can answer: counts of the whole votes table, without
+# filter, grouped by the period of the votes and/or their type
+QUERY_PATTERN = re.compile(
+    r"^SELECT\s+(?P<select>.+?)\s+FROM\s+(?P<source>[\w.\"]+)"
+    r"(?:\s+GROUP\s+BY\s+(?P<group>.+?))?(?:\s+ORDER\s+BY\s+(?P<order>.+?))?(?:\s+LIMIT\s+(?P<limit>\d+))?$",
+    re.IGNORECASE | re.DOTALL)
+# A select item with its optional alias
+ALIAS_PATTERN = re.compile(r"^(?P<expression>.+?)(?:\s+AS\s+(?P<alias>\w+|\"[^\"]+\"))?$", re.IGNORECASE | re.DOTALL)
+# Direction of an ORDER BY item
+DIRECTION_PATTERN = re.compile(r"^(?P<expression>.+?)(?P<direction>(?:\s+(?:ASC|DESC))?(?:\s+NULLS\s+(?:FIRST|LAST))?)$",
+                               re.IGNORECASE | re.DOTALL)
+# Count of the votes: Id is the primary key of the votes, so it is never NULL
+COUNT_PATTERN = re.compile(r"^COUNT\(\s*(?:\*|1|\"?Id\"?)\s*\)$", re.IGNORECASE)
+# The vote type column
+VOTE_TYPE_PATTERN = re.compile(r"^\"?VoteTypeId\"?$", re.IGNORECASE)
+# Periods of the CreationDate, with the grain they truncate it to
+PERIOD_PATTERNS = [
+    re.compile(r"^date_trunc\(\s*'(?P<grain>day|week|month|quarter|year)'\s*,\s*\"?CreationDate\"?\s*\)$", re.IGNORECASE),
+    re.compile(r"^CAST\(\s*\"?CreationDate\"?\s+AS\s+DATE\s*\)$", re.IGNORECASE),
+    re.compile(r"^\"?CreationDate\"?\s*::\s*DATE$", re.IGNORECASE),
+]
+# Columns of the rollup tables, which an alias of the query must not shadow
+ROLLUP_COLUMNS = {"period", "votetypeid", "vote_count"}
+
+
+def split_top_level(text):
+    """
+    Split a list of SQL expressions on the commas that are not inside parentheses or quotes.
+
+    Args:
+        text (str): The expressions, e.g. "date_trunc('week', CreationDate), COUNT(*)".
+
+    Returns:
+        list[str]: The stripped expressions.
+    """
+    items, depth, quote, start = [], 0, None, 0
+    for index, character in enumerate(text):
+        if quote:
+            if character == quote:
+                quote = None
+        elif character in "'\"":
+            quote = character
+        elif character == "(":
+            depth += 1
+        elif character == ")":
+            depth -= 1
+        elif character == "," and depth == 0:
+            items.append(text[start:index].strip())
+            start = index + 1
+    items.append(text[start:].strip())
+    return items
+
+
+def classify(expression):
+    """
+    Tell which part of a rollup an expression of the query stands for.
+
+    Args:
+        expression (str): An expression of the query, without alias.
+
+    Returns:
+        tuple | None: ("count", None), ("type", None) or ("period", grain), where grain is a
+        date_trunc part; None if a rollup cannot answer the expression.
+    """
+    expression = " ".join(expression.split())
+    if COUNT_PATTERN.match(expression):
+        return "count", None
+    if VOTE_TYPE_PATTERN.match(expression):
+        return "type", None
+    for pattern in PERIOD_PATTERNS:
+        match = pattern.match(expression)
+        if match:
+            return "period", (match.groupdict().get("grain") or RollupGrain.DAY).lower()
+    return None
+
+
+def rollup_expression(kind, grain):
+    """
+    The expression of a rollup table computing the same values as an expression of the query.
+
+    Args:
+        kind (str): "count", "type" or "period", as returned by `classify`.
+        grain (str | None): The date_trunc part of a period.
+
+    Returns:
+        str: The expression over the rollup table.
+    """
+    if kind == "count":
+        # Sums of counts, typed as the counts of the original query
+        return "CAST(COALESCE(SUM(vote_count), 0) AS BIGINT)"
+    if kind == "type":
+        return "VoteTypeId"
+    if grain in ROLLUP_GRAINS:
+        return "period"
+    # Quarters and years are computed from the monthly rollup
+    return f"date_trunc('{grain}', period)"
+
+
+def resolve(item, select_items):
+    """
+    Find the select item a GROUP BY or ORDER BY item refers to: by ordinal, by alias or by
+    expression.
+
+    Args:
+        item (str): The GROUP BY or ORDER BY expression.
+        select_items (list[dict]): The parsed select items.
+
+    Returns:
+        dict | None: The select item, or None if the item refers to none of them.
+    """
+    if item.isdigit():
+        index = int(item) - 1
+        return select_items[index] if 0 <= index < len(select_items) else None
+    for select_item in select_items:
+        if select_item["alias"] and select_item["alias"].strip('"').lower() == item.strip('"').lower():
+            return select_item
+    kind = classify(item)
+    for select_item in select_items:
+        if kind is not None and (select_item["kind"], select_item["grain"]) == kind:
+            return select_item
+    return None
+
+
+def rollup_table(select_items):
+    """
+    Pick the rollup table answering the query: the one of its period, the monthly one for
+    quarters and years, and the smallest (monthly) one when the query does not group by period.
+
+    Args:
+        select_items (list[dict]): The parsed select items.
+
+    Returns:
+        str: The grain of the rollup table.
+    """
+    grains = {item["grain"] for item in select_items if item["kind"] == "period"}
+    if not grains:
+        return RollupGrain.MONTH
+    grain = grains.pop()
+    return grain if grain in ROLLUP_GRAINS else RollupGrain.MONTH
+
+
+def parse_select_items(select):
+    """
+    Parse the select items of a query, which must count the votes, optionally per period and/or
+    vote type.
+
+    Args:
+        select (str): The select list of the query.
+
+    Returns:
+        list[dict] | None: The kind, grain and alias of every select item, or None if a rollup
+        cannot answer them.
+    """
+    select_items = []
+    for item in split_top_level(select):
+        parts = ALIAS_PATTERN.match(item)
+        kind = classify(parts.group("expression"))
+        alias = parts.group("alias")
+        if kind is None or (alias and alias.strip('"').lower() in ROLLUP_COLUMNS):
+            return None
+        select_items.append({"kind": kind[0], "grain": kind[1], "alias": alias})
+    if not any(item["kind"] == "count" for item in select_items):
+        return None
+    if len({item["grain"] for item in select_items if item["kind"] == "period"}) > 1:
+        # Several periods cannot be computed from one rollup table
+        return None
+    return select_items
+
+
+def groups_by_keys(group, select_items, keys):
+    """
+    Check that the query groups by exactly its period and type columns.
+
+    Args:
+        group (str | None): The GROUP BY list of the query, None without GROUP BY.
+        select_items (list[dict]): The parsed select items.
+        keys (list[dict]): The period and type select items.
+
+    Returns:
+        bool: True if the GROUP BY clause matches the keys.
+    """
+    if group is None:
+        return not keys
+    if group.strip().upper() == "ALL":
+        return True
+    grouped = [resolve(item, select_items) for item in split_top_level(group)]
+    if any(item is None or item["kind"] == "count" for item in grouped):
+        return False
+    return {id(item) for item in grouped} == {id(item) for item in keys}
+
+
+def rewrite_order_by(order, select_items):
+    """
+    Rewrite the ORDER BY items of a query over the columns of the rollup table.
+
+    Args:
+        order (str | None): The ORDER BY list of the query, None without ORDER BY.
+        select_items (list[dict]): The parsed select items.
+
+    Returns:
+        list[str] | None: The rewritten ORDER BY items, or None if an item refers to none of the
+        select items.
+    """
+    order_items = []
+    for item in split_top_level(order) if order else []:
+        parts = DIRECTION_PATTERN.match(item)
+        expression = parts.group("expression").strip()
+        if expression.upper() == "ALL":
+            # Orders by the select items, which keep their position
+            order_items.append(item)
+            continue
+        if not expression.isdigit() and resolve(expression, select_items) is None:
+            return None
+        kind = classify(expression)
+        if kind is not None and not any(item["alias"] and item["alias"].strip('"').lower() == expression.lower()
+                                        for item in select_items):
+            expression = rollup_expression(*kind)
+        order_items.append(expression + parts.group("direction"))
+    return order_items
+
+
+def rewrite_query(con, query, schema=SCHEMA, votes_table=VOTES_TABLE, table_prefix=ROLLUP_TABLE_PREFIX):
+    """
+    Rewrite a query counting the votes per period and/or vote type to read the matching rollup
+    table instead of scanning the votes table. The rewritten query returns the same columns,
+    with the same names and types, as the original one.
+
+    Only unfiltered counts over the votes table are rewritten, grouped by date_trunc('day'|
+    'week'|'month'|'quarter'|'year', CreationDate), CAST(CreationDate AS DATE) and/or
+    VoteTypeId, with optional ORDER BY and LIMIT clauses. The rollups are kept up to date by
+    the ingestion; they do not follow changes made to the votes table by other means.
+
+    Args:
+        con (duckdb.DuckDBPyConnection): The connection to the warehouse.
+        query (str): The query to rewrite.
+        schema (str): Schema of the votes and rollup tables. Defaults to SCHEMA from constants.
+        votes_table (str): The votes table. Defaults to VOTES_TABLE from constants.
+        table_prefix (str): Prefix of the rollup tables. Defaults to ROLLUP_TABLE_PREFIX from constants.
+
+    Returns:
+        str | None: The rewritten query, or None if no rollup can answer the query.
+    """
+    match = QUERY_PATTERN.match(query.strip().rstrip(";").strip())
+    if not match or match.group("source").replace('"', "").lower() != f"{schema}.{votes_table}".lower():
+        return None
+
+    select_items = parse_select_items(match.group("select"))
+    if select_items is None:
+        return None
+    keys = [item for item in select_items if item["kind"] != "count"]
+    if not groups_by_keys(match.group("group"), select_items, keys):
+        return None
+    order_items = rewrite_order_by(match.group("order"), select_items)
+    if order_items is None:
+        return None
+
+    grain = rollup_table(select_items)
+    table = table_prefix + grain
+    select_table_exists_query = Reader.read(SELECT_TABLE_EXISTS_PATH)
+    if not con.execute(select_table_exists_query, [schema, table]).fetchone()[0]:
+        return None
+
+    # Keep the column names of the original query
+    names = ['"' + name.replace('"', '""') + '"' for name in con.sql(query).columns]
+    select = ", ".join(f"{rollup_expression(item['kind'], item['grain'])} AS {name}"
+                       for item, name in zip(select_items, names))
+    rewritten = f"SELECT {select} FROM {schema}.{table}"
+    if keys:
+        rewritten += " GROUP BY " + ", ".join(rollup_expression(item["kind"], item["grain"]) for item in keys)
+    if order_items:
+        rewritten += " ORDER BY " + ", ".join(order_items)
+    if match.group("limit"):
+        rewritten += f" LIMIT {match.group('limit')}"
+    logging.info(f"Query answered from the rollup {schema}.{table}")
+    return rewritten
@@ -0,0 +1,98 @@
+import logging
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_ROLLUP_TABLE_PATH,  # Path to the SQL file for creating a rollup table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_SCHEMA_PATH,  # Path to the SQL file for creating the schema
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    ROLLUP_TABLE_PREFIX,  # Prefix of the rollup tables
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SCHEMA,  # Default schema name
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_TABLE_EXISTS_PATH,  # Path to the SQL file checking whether a table exists
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    VOTES_TABLE,  # Name of the votes table the rollups are computed from
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    RollupGrain,  # Enumeration of the rollup periods
+)
+from coffeebeans_dataeng_exercise.db.schema_manager import SchemaManager
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+# Grains of the rollup tables, finest first: each one can be computed from the previous one
+ROLLUP_GRAINS = (RollupGrain.DAY, RollupGrain.WEEK, RollupGrain.MONTH)
+
+
+class RollupsSchemaManager(SchemaManager):
+    """
+    Manages the creation of the schema and of the rollup tables in the database: the number of
+    votes per VoteTypeId and per day, week and month, in one table per grain.
+    Inherits from SchemaManager and implements schema and table creation.
+    """
+
+    def __init__(self, db_connection, schema=SCHEMA, table_prefix=ROLLUP_TABLE_PREFIX, votes_table=VOTES_TABLE):
+        """
+        Initialize the RollupsSchemaManager with database connection, schema, and table prefix.
+
+        Args:
+            db_connection (DatabaseConnection): The connection to the database.
+            schema (str): The schema name, shared with the votes table. Defaults to SCHEMA from constants.
+            table_prefix (str): Prefix of the rollup tables, followed by their grain. Defaults to
+                ROLLUP_TABLE_PREFIX from constants.
+            votes_table (str): The votes table, whose VoteTypeId column type the rollups copy.
+                Defaults to VOTES_TABLE from constants.
+        """
+        super().__init__(db_connection, schema, table_prefix + RollupGrain.DAY)  # Initialize the parent SchemaManager
+        self.tables = {grain: table_prefix + grain for grain in ROLLUP_GRAINS}  # Rollup table of each grain
+        self.votes_table = votes_table
+        self.created = False  # Whether the tables were created by this manager and still have to be filled
+        # Log the creation of the SchemaManager for the specified schema and tables
+        logging.info(f"SchemaManager created for schema: {schema}.{table_prefix}*")
+
+    def create_schema_and_table(self):
+        """
+        Create the schema and the rollup tables in the database if they do not already exist.
+        The votes table has to exist already.
+        """
+        # Read the SQL query for creating the schema and format it with the schema name
+        create_schema_query = Reader.format(CREATE_SCHEMA_PATH, schema=self.schema)
+        # Execute the schema creation query on the database
+        self.db_connection.execute(create_schema_query)
+
+        # Newly created rollups are empty and have to be built from the votes table once
+        self.created = not self.tables_exist()
+        for table in self.tables.values():
+            # Read the SQL query for creating a rollup table and format it with schema and table names
+            create_rollup_table_query = Reader.format(
+                CREATE_ROLLUP_TABLE_PATH, schema=self.schema, table=table,
+                votes_schema=self.schema, votes_table=self.votes_table)
+            # Execute the table creation query on the database
+            self.db_connection.execute(create_rollup_table_query)
+
+        # Log the successful creation of the schema and tables
+        logging.info(f"Tables created if not existed: {', '.join(self.tables.values())}")
+
+    def catalog_tables(self):
+        """
+        Tables recorded in the catalog markers: the rollup tables of all the grains.
+
+        Returns:
+            list[str]: The table names.
+        """
+        return list(self.tables.values())
+
+    def tables_exist(self):
+        """
+        Check whether every rollup table exists in the database.
+
+        Returns:
+            bool: True if the rollup tables of all the grains exist.
+        """
+        select_table_exists_query = Reader.read(SELECT_TABLE_EXISTS_PATH)
+        return all(self.db_connection.execute(select_table_exists_query, [self.schema, table]).fetchone()[0]
+                   for table in self.tables.values())
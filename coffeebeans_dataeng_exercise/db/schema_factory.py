@@ -1,20 +1,37 @@
 from coffeebeans_dataeng_exercise.constants.constants import SchemaType
+from coffeebeans_dataeng_exercise.db.manifest_schema_manager import (
+    ManifestSchemaManager,
+)
 from coffeebeans_dataeng_exercise.db.outliers_schema_manager import (
     OutliersSchemaManager,
 )
+from coffeebeans_dataeng_exercise.db.partition_stats_schema_manager import (
+    PartitionStatsSchemaManager,
+)
+from coffeebeans_dataeng_exercise.db.rejects_schema_manager import (
+    RejectsSchemaManager,
+)
+from coffeebeans_dataeng_exercise.db.rollups_schema_manager import (
+    RollupsSchemaManager,
+)
 from coffeebeans_dataeng_exercise.db.votes_schema_manager import VotesSchemaManager
+from coffeebeans_dataeng_exercise.db.weekly_counts_schema_manager import (
+    WeeklyCountsSchemaManager,
+)
 
 
 # Factory Method Pattern: Factory class for creating different types of schema managers
 class SchemaFactory:
     @staticmethod
-    def schema(type, db_connection):
+    def schema(type, db_connection, **options):
         """
         Factory method to create and return an instance of a schema manager based on the type.
 
         Args:
-            type (SchemaType): The type of schema manager to create (VOTES or OUTLIER).
+            type (SchemaType): The type of schema manager to create (VOTES, OUTLIER, MANIFEST,
+                WEEKLY_COUNTS, PARTITIONS, REJECTS or ROLLUPS).
             db_connection (DatabaseConnection): The connection to the database.
+            **options: Schema specific options passed to the schema manager (e.g. typed=True).
 
         Returns:
             SchemaManager: An instance of the appropriate schema manager.
@@ -25,10 +42,25 @@ class SchemaFactory:
         # Check the type of schema and create the corresponding schema manager
         if type == SchemaType.VOTES:
             # Return a VotesSchemaManager for VOTES type
-            return VotesSchemaManager(db_connection)
+            return VotesSchemaManager(db_connection, **options)
         if type == SchemaType.OUTLIER:
             # Return an OutliersSchemaManager for OUTLIER type
             return OutliersSchemaManager(db_connection)
+        if type == SchemaType.MANIFEST:
+            # Return a ManifestSchemaManager for MANIFEST type
+            return ManifestSchemaManager(db_connection)
+        if type == SchemaType.WEEKLY_COUNTS:
+            # Return a WeeklyCountsSchemaManager for WEEKLY_COUNTS type
+            return WeeklyCountsSchemaManager(db_connection)
+        if type == SchemaType.PARTITIONS:
+            # Return a PartitionStatsSchemaManager for PARTITIONS type
+            return PartitionStatsSchemaManager(db_connection)
+        if type == SchemaType.REJECTS:
+            # Return a RejectsSchemaManager for REJECTS type
+            return RejectsSchemaManager(db_connection)
+        if type == SchemaType.ROLLUPS:
+            # Return a RollupsSchemaManager for ROLLUPS type
+            return RollupsSchemaManager(db_connection)
         else:
             # Raise an error if the provided schema type is unknown
             raise ValueError(f"Unknown schema type: {type}")
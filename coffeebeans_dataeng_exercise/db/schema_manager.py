@@ -1,5 +1,13 @@
 from abc import ABC, abstractmethod
 
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_COLUMN_TYPES_PATH,  # Path to the SQL file reading the columns of a table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_TABLE_EXISTS_PATH,  # Path to the SQL file checking whether a table exists
+)
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
 
 class SchemaManager(ABC):
     """
@@ -7,6 +15,12 @@ class SchemaManager(ABC):
     Inherits from ABC to define abstract methods that must be implemented by subclasses.
     """
 
+    # Version of the objects created by create_schema_and_table: bump it whenever the DDL changes,
+    # so that the warehouses created with the previous DDL run it again
+    CATALOG_VERSION = 1
+    # Whether create_schema_and_table creates the table, or only the schema
+    CREATES_TABLE = True
+
     def __init__(self, db_connection, schema, table):
         """
         Initialize the SchemaManager with database connection, schema, and table information.
@@ -27,3 +41,43 @@ class SchemaManager(ABC):
         and table should be created.
         """
         pass
+
+    def catalog_version(self):
+        """
+        Version recorded in the catalog markers for the objects of this manager.
+
+        Returns:
+            str: The version.
+        """
+        return str(self.CATALOG_VERSION)
+
+    def catalog_tables(self):
+        """
+        Tables recorded in the catalog markers for the objects of this manager: the objects are
+        created again as soon as one of them is missing.
+
+        Returns:
+            list[str]: The table names.
+        """
+        return [self.table]
+
+    def table_exists(self):
+        """
+        Check whether the managed table (or view) exists in the database.
+
+        Returns:
+            bool: True if the table exists.
+        """
+        select_table_exists_query = Reader.read(SELECT_TABLE_EXISTS_PATH)
+        return self.db_connection.execute(select_table_exists_query, [self.schema, self.table]).fetchone()[0]
+
+    def column_types(self):
+        """
+        Read the columns of the managed table with their data types, as defined in the catalog.
+
+        Returns:
+            list[tuple[str, str]]: (column name, data type) pairs in table order; empty if the
+            table does not exist.
+        """
+        select_column_types_query = Reader.read(SELECT_COLUMN_TYPES_PATH)
+        return self.db_connection.execute(select_column_types_query, [self.schema, self.table]).fetchall()
@@ -0,0 +1,40 @@
+-- Apply the daily changes of the staged batch to a rollup table: only the periods touched by the batch are rewritten
+
+-- Merge the changes, rolled up to the grain of the table, with the current counts of the touched periods
+CREATE OR REPLACE TEMP TABLE rollup_merged AS 
+SELECT 
+  d.period,  -- First day of the touched period
+  d.VoteTypeId,  -- Type of the votes
+  COALESCE(r.vote_count, 0) + d.delta AS vote_count  -- New vote count of the period and type
+FROM 
+  (
+    SELECT 
+      CAST(date_trunc('{grain}', period) AS DATE) AS period,  -- Period of the changed day
+      VoteTypeId,  -- Type of the votes
+      SUM(delta) AS delta  -- Net change of the vote count of the period and type
+    FROM 
+      {delta_table} 
+    GROUP BY 
+      1,  -- Group by period
+      2  -- Group by VoteTypeId
+  ) d 
+  LEFT JOIN {sink_schema}.{sink_table} r 
+  ON r.period IS NOT DISTINCT FROM d.period  -- NULL dates are counted in their own period
+  AND r.VoteTypeId IS NOT DISTINCT FROM d.VoteTypeId;
+
+-- Replace the touched periods, dropping the ones that no longer have any vote
+DELETE FROM {sink_schema}.{sink_table} r 
+USING rollup_merged m 
+WHERE 
+  r.period IS NOT DISTINCT FROM m.period 
+  AND r.VoteTypeId IS NOT DISTINCT FROM m.VoteTypeId;
+
+INSERT INTO {sink_schema}.{sink_table} 
+SELECT 
+  * 
+FROM 
+  rollup_merged 
+WHERE 
+  vote_count <> 0;
+
+DROP TABLE rollup_merged;
@@ -0,0 +1,56 @@
+-- Apply the changes of the staged batch to the weekly vote counts aggregate.
+-- Must run before the staged records are written, while the rows they replace are still in the votes table.
+
+-- Count +1 for every staged record and -1 for every existing record it replaces, per week
+CREATE OR REPLACE TEMP TABLE weekly_counts_delta AS 
+SELECT 
+  CAST(year_week // 100 AS BIGINT) AS year,  -- Year of the vote, from the integer week key
+  lpad(CAST(year_week % 100 AS VARCHAR), 2, '0') AS week_number,  -- Two digit week number, as strftime('%W')
+  SUM(delta) AS delta  -- Net change of the vote count of the week
+FROM 
+  (
+    SELECT 
+      {source_schema}.year_week(CreationDate) AS year_week,  -- Week key of the staged record
+      1 AS delta  -- Every staged record is counted in its week
+    FROM 
+      {staging_table} 
+    UNION ALL 
+    SELECT 
+      v.year_week,  -- Stored week key of the replaced record
+      -1 AS delta  -- A replaced record is removed from its previous week
+    FROM 
+      {source_schema}.{source_table} v 
+      SEMI JOIN {staging_table} s ON v.Id = s.Id  -- Only the existing records that are replaced
+  ) 
+GROUP BY 
+  year_week;  -- Group by the integer week key
+
+-- Merge the delta with the current counts of the affected weeks
+CREATE OR REPLACE TEMP TABLE weekly_counts_merged AS 
+SELECT 
+  d.year,  -- Year of the affected week
+  d.week_number,  -- Week number of the affected week
+  COALESCE(w.vote_count, 0) + d.delta AS vote_count  -- New vote count of the week
+FROM 
+  weekly_counts_delta d 
+  LEFT JOIN {sink_schema}.{sink_table} w 
+  ON w.year IS NOT DISTINCT FROM d.year  -- NULL dates are counted in their own week, as in the view
+  AND w.week_number IS NOT DISTINCT FROM d.week_number;
+
+-- Replace the affected weeks, dropping the weeks that no longer have any vote
+DELETE FROM {sink_schema}.{sink_table} w 
+USING weekly_counts_delta d 
+WHERE 
+  w.year IS NOT DISTINCT FROM d.year 
+  AND w.week_number IS NOT DISTINCT FROM d.week_number;
+
+INSERT INTO {sink_schema}.{sink_table} 
+SELECT 
+  * 
+FROM 
+  weekly_counts_merged 
+WHERE 
+  vote_count <> 0;
+
+DROP TABLE weekly_counts_delta;
+DROP TABLE weekly_counts_merged;
@@ -0,0 +1,3 @@
+-- Attach a database file read-only and make it the default catalog, so that the queries read its schemas
+ATTACH '{db_file}' AS {database} (READ_ONLY);
+USE {database};
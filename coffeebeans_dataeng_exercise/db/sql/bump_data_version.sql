@@ -0,0 +1,9 @@
+-- Increment the data version, starting from 1 on the first write
+INSERT INTO {schema}.{table} 
+VALUES 
+  (1, 1, current_timestamp)  -- id, version, updated_at
+ON CONFLICT (id) DO 
+  UPDATE 
+  SET 
+    version = version + 1,  -- One more commit changed the data
+    updated_at = EXCLUDED.updated_at;  -- Update the timestamp with the value from the excluded row
@@ -0,0 +1,2 @@
+-- Write the committed changes to the database file, so that the WAL replayed when the database is opened is empty
+CHECKPOINT;
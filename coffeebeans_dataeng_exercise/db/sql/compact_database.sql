@@ -0,0 +1,6 @@
+-- Copy every schema, table, view and macro of a database into a new file, which only holds the used blocks
+ATTACH '{db_file}' AS {source} (READ_ONLY);
+ATTACH '{compacted_file}' AS {compacted};
+COPY FROM DATABASE {source} TO {compacted};
+DETACH {source};
+DETACH {compacted};
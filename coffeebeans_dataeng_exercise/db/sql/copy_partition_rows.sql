@@ -0,0 +1,2 @@
+-- Write the rows of the touched partitions as Hive partitioned Parquet files (year=/week=)
+COPY {partition_rows} TO '{target_dir}' (FORMAT PARQUET, PARTITION_BY (year, week));
@@ -0,0 +1,16 @@
+-- Count the records of JSON files that cannot be written: no Id, or a CreationDate that is not a timestamp.
+-- The values are read as text, before the cast that would fail the whole load.
+SELECT 
+  COUNT(*) 
+FROM 
+  read_json(
+    ?,  -- Read data from the list of JSON files bound as the query parameter
+    columns = {{'Id': 'VARCHAR', 'CreationDate': 'VARCHAR'}},  -- The raw values of the checked columns
+    format = '{json_format}'  -- One record per line
+  ) 
+WHERE 
+  Id IS NULL 
+  OR (
+    CreationDate IS NOT NULL 
+    AND try_strptime(CreationDate, '{timestamp_format}') IS NULL
+  );
@@ -0,0 +1,2 @@
+-- Count the rows of a table
+SELECT count(*) FROM {schema}.{table};
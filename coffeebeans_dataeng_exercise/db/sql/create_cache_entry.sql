@@ -0,0 +1,3 @@
+-- Keep the result of a query in a table of the in-memory catalog
+CREATE OR REPLACE TABLE memory.main.{table} AS 
+{query};
@@ -0,0 +1,9 @@
+-- Create the table of the catalog version markers if it does not already exist in the specified schema
+CREATE TABLE IF NOT EXISTS {schema}.{table} (
+    schema_name VARCHAR NOT NULL,  -- Schema of the object managed by a schema manager
+    table_name VARCHAR NOT NULL,  -- Table managed by the schema manager
+    creates_table BOOLEAN NOT NULL,  -- Whether the manager creates the table, or only the schema
+    version VARCHAR NOT NULL,  -- Version of the DDL the objects were created with
+    applied_at TIMESTAMP NOT NULL,  -- Timestamp of the run that applied the DDL
+    PRIMARY KEY (schema_name, table_name)  -- One marker per managed object
+);
@@ -0,0 +1,6 @@
+-- Create the table of the data version if it does not already exist in the specified schema
+CREATE TABLE IF NOT EXISTS {schema}.{table} (
+    id INTEGER PRIMARY KEY,  -- Always 1: the table holds a single row
+    version BIGINT NOT NULL,  -- Number of commits that changed the data
+    updated_at TIMESTAMP NOT NULL  -- Timestamp of the last of these commits
+);
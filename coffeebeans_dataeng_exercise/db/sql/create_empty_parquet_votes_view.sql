@@ -0,0 +1,11 @@
+-- Create or replace the view of the Parquet votes storage while it does not hold any file yet
+CREATE OR REPLACE VIEW {schema}.{view} AS 
+SELECT 
+  * EXCLUDE (year_week),  -- Columns of the records
+  NULL :: BIGINT AS year,  -- Year partition key
+  NULL :: INTEGER AS week,  -- Week partition key
+  NULL :: INTEGER AS year_week  -- Integer week key
+FROM 
+  {schema}.{table} 
+WHERE 
+  false;  -- No rows until the first partition is written
@@ -0,0 +1,9 @@
+-- Create the ingestion manifest table if it does not already exist in the specified schema
+CREATE TABLE IF NOT EXISTS {schema}.{table} (
+    file_path VARCHAR PRIMARY KEY,  -- Absolute path of the ingested file, set as the primary key
+    file_size BIGINT NOT NULL,  -- Size of the file in bytes when it was last ingested
+    file_mtime DOUBLE NOT NULL,  -- Modification time of the file (seconds since epoch) when it was last ingested
+    content_hash VARCHAR NOT NULL,  -- SHA-256 of the file content up to the high-water mark
+    high_water_mark BIGINT NOT NULL,  -- Byte offset just after the last complete line that was ingested
+    ingested_at TIMESTAMP NOT NULL  -- Timestamp of the ingestion that last updated the entry
+);
@@ -0,0 +1,44 @@
+-- Write the weeks flagged by one outlier rule to its own table
+CREATE OR REPLACE TABLE {sink_schema}.{sink_table} AS 
+
+-- Define a CTE computing the baseline of every week over the window of the rule
+WITH baselines AS (
+  SELECT 
+    year,  -- Year of the week
+    week_number,  -- Week number of the week
+    dimension_value,  -- Value of the dimension of the slice, NULL for the weekly totals
+    vote_count,  -- Vote count of the week
+    {center}(vote_count) OVER baseline_window AS baseline,  -- Mean or median of the weeks of the baseline
+    {spread} OVER baseline_window AS spread  -- Dispersion of the weeks of the baseline
+  FROM 
+    {counts_schema}.{counts_table}  -- Weekly counts shared by every rule and slice
+  WHERE 
+    dimension IS NOT DISTINCT FROM {dimension}  -- Weekly totals, or counts per value of one dimension
+  WINDOW baseline_window AS ({baseline_window})
+), 
+
+-- Define a CTE scoring every week against its baseline
+scores AS (
+  SELECT 
+    *, 
+    {score} AS score  -- Deviation of the week from its baseline
+  FROM 
+    baselines
+) 
+
+-- Select the weeks whose score is above the threshold of the rule
+SELECT 
+  year,  -- Year of the outlier vote count
+  week_number,  -- Week number of the outlier vote count
+  dimension_value,  -- Value of the dimension of the slice, NULL for the weekly totals
+  vote_count,  -- Outlier vote count
+  baseline,  -- Baseline the vote count is compared with
+  score  -- Deviation of the vote count from the baseline
+FROM 
+  scores 
+WHERE 
+  score > {threshold}  -- Identify the outliers
+ORDER BY 
+  dimension_value,  -- Order by value of the dimension
+  year,  -- Order by year
+  week_number;  -- Order by week number
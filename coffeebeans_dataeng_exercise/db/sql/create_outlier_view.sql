@@ -4,14 +4,13 @@ CREATE OR REPLACE VIEW {sink_schema}.{sink_table} AS
 -- Define a common table expression (CTE) to calculate weekly vote counts
 WITH weekly_votes AS (
   SELECT 
-    EXTRACT(year FROM CreationDate) AS year,  -- Extract the year from the CreationDate
-    strftime('%W', CreationDate :: date) AS week_number,  -- Extract the week number from the CreationDate
+    CAST(year_week // 100 AS BIGINT) AS year,  -- Year of the week, from the integer week key
+    lpad(CAST(year_week % 100 AS VARCHAR), 2, '0') AS week_number,  -- Two digit week number, as strftime('%W')
     COUNT(*) AS vote_count  -- Count the number of votes for each week
   FROM 
     {source_schema}.{source_table}  -- Source table containing vote data
   GROUP BY 
-    1,  -- Group by year
-    2   -- Group by week_number
+    year_week  -- Group by the integer week key stored at load
 ), 
 
 -- Define a CTE to calculate the average vote count per year
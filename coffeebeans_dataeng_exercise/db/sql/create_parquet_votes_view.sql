@@ -0,0 +1,11 @@
+-- Create or replace the view reading the Parquet votes storage; filters on year and week prune partitions
+CREATE OR REPLACE VIEW {schema}.{view} AS 
+SELECT 
+  *, 
+  CAST(year * 100 + week AS INTEGER) AS year_week  -- Integer week key, from the partition keys of the file
+FROM 
+  read_parquet(
+    '{files_glob}',  -- Every data file of every partition
+    hive_partitioning = true, 
+    hive_types = {{'year': BIGINT, 'week': INTEGER}}
+  );
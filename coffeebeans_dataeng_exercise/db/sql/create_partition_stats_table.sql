@@ -0,0 +1,7 @@
+-- Create the partition statistics table of the Parquet votes storage if it does not already exist
+CREATE TABLE IF NOT EXISTS {schema}.{table} (
+    year BIGINT NULL,  -- Year partition key, NULL for votes without CreationDate
+    week INTEGER NULL,  -- Week partition key (strftime '%W'), NULL for votes without CreationDate
+    row_count BIGINT NOT NULL,  -- Number of votes stored in the partition
+    updated_at TIMESTAMP NOT NULL  -- Timestamp of the last rewrite of the partition
+);
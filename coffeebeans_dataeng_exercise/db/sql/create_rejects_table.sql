@@ -0,0 +1,8 @@
+-- Create the table of the malformed records set aside by the tolerant ingestion, if it does not already exist
+CREATE TABLE IF NOT EXISTS {schema}.{table} (
+    file_path VARCHAR NOT NULL,  -- Path of the file holding the record
+    line_number BIGINT NOT NULL,  -- Line of the record in the part of the file that was read (1 based)
+    reason VARCHAR NOT NULL,  -- Why the record was rejected
+    line VARCHAR,  -- Text of the line, cut to a maximum length
+    rejected_at TIMESTAMP NOT NULL  -- Timestamp of the ingestion that rejected the record
+);
@@ -0,0 +1,11 @@
+-- Create a rollup table of the vote counts per period and vote type if it does not already exist,
+-- with the VoteTypeId column typed as in the votes table
+CREATE TABLE IF NOT EXISTS {schema}.{table} AS 
+SELECT 
+  CAST(NULL AS DATE) AS period,  -- First day of the period (day, week or month) of the votes
+  VoteTypeId,  -- Identifier for the type of the votes
+  CAST(0 AS BIGINT) AS vote_count  -- Number of votes of the type cast during the period
+FROM 
+  {votes_schema}.{votes_table} 
+WHERE 
+  false;  -- Only the columns are copied
@@ -0,0 +1,9 @@
+-- Create (or empty) a temporary staging table with the same columns and types as the target table,
+-- except the week key, which is computed when the staged records are written
+CREATE OR REPLACE TEMP TABLE {staging_table} AS 
+SELECT 
+  * EXCLUDE (year_week) 
+FROM 
+  {schema}.{table}  -- Target table whose columns are copied, without its constraints
+LIMIT 
+  0;  -- Copy the structure only
@@ -0,0 +1,10 @@
+-- Create the typed votes table if it does not already exist in the specified schema
+CREATE TABLE IF NOT EXISTS {schema}.{table} (
+    Id BIGINT PRIMARY KEY,  -- Unique identifier for each record, set as the primary key
+    UserId BIGINT NULL,  -- Identifier for the user who cast the vote, can be NULL
+    PostId BIGINT NULL,  -- Identifier for the post that received the vote, can be NULL
+    VoteTypeId SMALLINT NULL,  -- Identifier for the type of vote (e.g., upvote, downvote), can be NULL
+    BountyAmount DECIMAL(18, 2) NULL,  -- Amount of bounty associated with the vote, can be NULL
+    CreationDate TIMESTAMP NULL,  -- Timestamp indicating when the vote was created, can be NULL
+    year_week INTEGER NULL  -- Year * 100 + week number (%W) of CreationDate, computed once at load
+);
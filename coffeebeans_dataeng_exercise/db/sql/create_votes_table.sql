@@ -5,5 +5,6 @@ CREATE TABLE IF NOT EXISTS {schema}.{table} (
     PostId STRING NULL,  -- Identifier for the post that received the vote, can be NULL
     VoteTypeId STRING NULL,  -- Identifier for the type of vote (e.g., upvote, downvote), can be NULL
     BountyAmount STRING NULL,  -- Amount of bounty associated with the vote, can be NULL
-    CreationDate TIMESTAMP NULL  -- Timestamp indicating when the vote was created, can be NULL
+    CreationDate TIMESTAMP NULL,  -- Timestamp indicating when the vote was created, can be NULL
+    year_week INTEGER NULL  -- Year * 100 + week number (%W) of CreationDate, computed once at load
 );
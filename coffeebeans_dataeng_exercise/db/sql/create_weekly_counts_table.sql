@@ -0,0 +1,6 @@
+-- Create the weekly vote counts aggregate table if it does not already exist in the specified schema
+CREATE TABLE IF NOT EXISTS {schema}.{table} (
+    year BIGINT NULL,  -- Year of the CreationDate of the votes
+    week_number VARCHAR NULL,  -- Week number (strftime '%W') of the CreationDate of the votes
+    vote_count BIGINT NOT NULL  -- Number of votes cast during the week
+);
@@ -0,0 +1,9 @@
+-- Create or replace the macro computing the integer week key of a timestamp: year * 100 + week
+-- number, the week number being the one of strftime('%W') (weeks start on Monday, the days before
+-- the first Monday of the year are in week 0), without formatting a string per row
+CREATE OR REPLACE MACRO {schema}.year_week(creation_date) AS 
+CAST(
+  year(CAST(creation_date AS DATE)) * 100 
+  + (dayofyear(CAST(creation_date AS DATE)) + 7 - isodow(CAST(creation_date AS DATE))) // 7 
+  AS INTEGER
+);
@@ -0,0 +1,29 @@
+-- Deduplicate the records of one shard and write them as a Parquet file
+COPY (
+  SELECT 
+    Id,  -- Unique identifier for the record
+    UserId,  -- Identifier for the user who cast the vote
+    PostId,  -- Identifier for the post that received the vote
+    VoteTypeId,  -- Identifier for the type of vote
+    BountyAmount,  -- Amount of bounty associated with the vote
+    CreationDate  -- Timestamp when the vote was created
+  FROM 
+    (
+      SELECT 
+        *, 
+        ROW_NUMBER() OVER (
+          PARTITION BY Id  -- Partition the data by Id to ensure uniqueness
+          ORDER BY 
+            CreationDate DESC  -- Keep the latest record of the shard
+        ) AS rn 
+      FROM 
+        read_json(
+          '{shard_path}',  -- JSON lines of the shard
+          columns = {columns},  -- Columns and types of the votes table
+          format = '{json_format}', 
+          timestampformat = '{timestamp_format}'
+        )
+    ) 
+  WHERE 
+    rn = 1
+) TO '{output_path}' (FORMAT PARQUET);
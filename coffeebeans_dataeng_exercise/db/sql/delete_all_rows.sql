@@ -0,0 +1,2 @@
+-- Delete every row of the specified table
+DELETE FROM {schema}.{table};
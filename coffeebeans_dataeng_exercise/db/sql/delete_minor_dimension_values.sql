@@ -0,0 +1,18 @@
+-- Keep only the values of a dimension that received the most votes, e.g. the top posts
+DELETE FROM {schema}.{counts_table} 
+WHERE 
+  dimension = ?  -- The dimension to trim
+  AND dimension_value NOT IN (
+    SELECT 
+      dimension_value 
+    FROM 
+      {schema}.{counts_table} 
+    WHERE 
+      dimension = ? 
+    GROUP BY 
+      dimension_value 
+    ORDER BY 
+      SUM(vote_count) DESC,  -- Values with the most votes first
+      dimension_value  -- Ties broken by value, so that the slices are stable
+    LIMIT ?  -- Number of values kept
+  );
@@ -0,0 +1,3 @@
+-- Go back to the in-memory catalog and detach the database file, releasing its lock
+USE memory;
+DETACH {database};
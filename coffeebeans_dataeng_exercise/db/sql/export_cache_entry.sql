@@ -0,0 +1,2 @@
+-- Write a cached query result as a Parquet file
+COPY memory.main.{table} TO '{file_path}' (FORMAT PARQUET);
@@ -0,0 +1,42 @@
+-- Generate synthetic votes as JSON lines, every value as a string as in the source data.
+-- Values are derived from hashes of the row number, so that a file is reproducible from its seed.
+COPY (
+  SELECT 
+    CAST(
+      CASE 
+        WHEN u_duplicate < {duplicate_rate} AND i > 0 
+        THEN CAST(floor(u_original * i) AS BIGINT)  -- New version of an earlier vote
+        ELSE i 
+      END AS VARCHAR
+    ) AS Id,  -- Unique identifier for the record
+    CAST(hash(i, {seed}, 3) % 1000000 AS VARCHAR) AS UserId,  -- Identifier for the user who cast the vote
+    CAST(hash(i, {seed}, 4) % 5000000 AS VARCHAR) AS PostId,  -- Identifier for the post that received the vote
+    CAST(
+      CASE 
+        WHEN u_type < 0.7 THEN 2  -- Most votes are up votes
+        WHEN u_type < 0.85 THEN 1 
+        ELSE 3 + hash(i, {seed}, 5) % 14 
+      END AS VARCHAR
+    ) AS VoteTypeId,  -- Identifier for the type of vote
+    CAST(
+      CASE WHEN u_type > 0.98 THEN 50 * (1 + hash(i, {seed}, 6) % 10) ELSE 0 END AS VARCHAR
+    ) AS BountyAmount,  -- Amount of bounty associated with the vote
+    strftime(
+      TIMESTAMP '{start_date}' + to_seconds(
+        -- A skew above 0 concentrates the votes towards the end of the period
+        CAST(floor(pow(u_date, 1.0 / (1.0 + {date_skew})) * {days} * 86400) AS BIGINT)
+      ), 
+      '%Y-%m-%dT%H:%M:%S.000'
+    ) AS CreationDate  -- Timestamp when the vote was created
+  FROM 
+    (
+      SELECT 
+        range AS i,  -- Row number
+        (hash(range, {seed}, 0) % 1000000) / 1000000.0 AS u_duplicate,  -- Uniform in [0, 1)
+        (hash(range, {seed}, 1) % 1000000) / 1000000.0 AS u_original, 
+        (hash(range, {seed}, 2) % 1000000) / 1000000.0 AS u_date, 
+        (hash(range, {seed}, 7) % 1000000) / 1000000.0 AS u_type 
+      FROM 
+        range({rows})
+    )
+) TO '{output_path}' (FORMAT JSON);
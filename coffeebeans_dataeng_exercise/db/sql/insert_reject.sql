@@ -0,0 +1,4 @@
+-- Insert a rejected record
+INSERT INTO {schema}.{table} (file_path, line_number, reason, line, rejected_at) 
+VALUES 
+  (?, ?, ?, ?, current_timestamp);
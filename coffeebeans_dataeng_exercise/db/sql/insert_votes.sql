@@ -0,0 +1,9 @@
+-- Append the staged records, all new, to the specified votes table
+INSERT INTO {schema}.{table} 
+SELECT 
+  *, 
+  {schema}.year_week(CreationDate) AS year_week  -- Integer week key, computed once per record
+FROM 
+  {staging_table}  -- Records of the current batch whose Id is not stored yet
+ORDER BY 
+  year_week;  -- Rows of the same week are appended together
@@ -0,0 +1,4 @@
+-- Insert the vote count of one week
+INSERT INTO {schema}.{table} (year, week_number, vote_count) 
+VALUES 
+  (?, ?, ?);
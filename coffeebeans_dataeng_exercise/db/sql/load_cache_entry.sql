@@ -0,0 +1,6 @@
+-- Load a query result cached as a Parquet file into a table of the in-memory catalog
+CREATE OR REPLACE TABLE memory.main.{table} AS 
+SELECT 
+  * 
+FROM 
+  read_parquet('{file_path}');
@@ -0,0 +1,19 @@
+-- Add the rows already stored in the touched partitions, except the ones replaced by the staged batch
+INSERT INTO {partition_rows} BY NAME 
+SELECT 
+  * 
+FROM 
+  read_parquet(
+    {existing_files},  -- Only the files of the touched partitions are read
+    hive_partitioning = true, 
+    hive_types = {{'year': BIGINT, 'week': INTEGER}}
+  ) e 
+WHERE 
+  NOT EXISTS (
+    SELECT 
+      1 
+    FROM 
+      {staging_table} s 
+    WHERE 
+      s.Id = e.Id  -- The staged record wins, in its own partition or in another week
+  );
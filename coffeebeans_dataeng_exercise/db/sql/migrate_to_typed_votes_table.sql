@@ -0,0 +1,19 @@
+-- Copy the records of a string typed votes table into the new typed table, parsing every column once
+INSERT INTO {schema}.{typed_table} 
+SELECT 
+  CAST(Id AS BIGINT) AS Id,  -- Unique identifier for the record
+  CAST(UserId AS BIGINT) AS UserId,  -- Identifier for the user who cast the vote
+  CAST(PostId AS BIGINT) AS PostId,  -- Identifier for the post that received the vote
+  CAST(VoteTypeId AS SMALLINT) AS VoteTypeId,  -- Identifier for the type of vote
+  CAST(BountyAmount AS DECIMAL(18, 2)) AS BountyAmount,  -- Amount of bounty associated with the vote
+  CreationDate,  -- Timestamp when the vote was created, already typed
+  {schema}.year_week(CreationDate) AS year_week  -- Integer week key, also set on tables created before it
+FROM 
+  {schema}.{table} 
+ORDER BY 
+  year_week;  -- Rows of the same week are stored together
+
+-- Replace the string typed table with the typed one
+DROP TABLE {schema}.{table};
+
+ALTER TABLE {schema}.{typed_table} RENAME TO {table};
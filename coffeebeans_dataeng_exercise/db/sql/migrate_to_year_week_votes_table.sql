@@ -0,0 +1,15 @@
+-- Copy the records of a votes table created before the week key into the new table, computing
+-- the key once and storing the rows ordered by it
+INSERT INTO {schema}.{new_table} 
+SELECT 
+  *, 
+  {schema}.year_week(CreationDate) AS year_week  -- Integer week key of the record
+FROM 
+  {schema}.{table} 
+ORDER BY 
+  year_week;  -- Rows of the same week are stored together, so that the zone maps prune by week
+
+-- Replace the previous table with the new one
+DROP TABLE {schema}.{table};
+
+ALTER TABLE {schema}.{new_table} RENAME TO {table};
@@ -0,0 +1,7 @@
+-- Drop the staged records that are older than the stored record with the same Id,
+-- so that the order in which the chunks of a file are loaded does not matter
+DELETE FROM {staging_table} s 
+USING {schema}.{table} v  -- Records already stored
+WHERE 
+  v.Id = s.Id 
+  AND v.CreationDate > s.CreationDate;  -- Keep the latest record, as the in-batch deduplication does
@@ -0,0 +1,4 @@
+-- Copy every schema, table, view and macro of the database into a new snapshot file
+ATTACH '{snapshot_file}' AS {snapshot};
+COPY FROM DATABASE {database} TO {snapshot};
+DETACH {snapshot};
@@ -1,29 +1,72 @@
 import logging
+from functools import lru_cache
+from importlib import resources
+from pathlib import PurePosixPath
+
+# Package holding the SQL templates, whose paths in the constants are relative to the project root
+PACKAGE = "coffeebeans_dataeng_exercise"
+# Maximum number of formatted statements kept in memory
+FORMATTED_CACHE_SIZE = 512
 
 
 class Reader:
     """
-    A class to handle reading SQL queries from a file.
+    A class to handle reading SQL queries from the template files shipped with the package.
+    Templates are read once and formatted statements are cached.
     """
 
+    # Text of the templates already read, keyed by path
+    templates: dict[str, str] = {}
+
     @staticmethod
     def read(sql_path):
         """
-        Reads an SQL query from a file and logs the content.
+        Reads an SQL query from a template file, from the package resources so that it does not
+        depend on the current working directory, and keeps it for the next calls.
 
         Args:
-            sql_path (str): The path to the file containing the SQL query.
+            sql_path (str): The path to the file containing the SQL query, relative to the project
+                root (e.g. "coffeebeans_dataeng_exercise/db/sql/create_schema.sql").
 
         Returns:
             str: The SQL query read from the file.
         """
-        # Open the file in read mode
-        with open(sql_path, 'r') as file:
-            # Read the entire content of the file into a string
-            create_schema_query = file.read()
+        query = Reader.templates.get(sql_path)
+        if query is None:
+            parts = PurePosixPath(sql_path).parts
+            if parts and parts[0] == PACKAGE:
+                # Resolve the template inside the installed package
+                resource = resources.files(PACKAGE)
+                for part in parts[1:]:
+                    resource = resource / part
+                query = resource.read_text()
+            else:
+                # Any other template is read from the file system
+                with open(sql_path, 'r') as file:
+                    query = file.read()
+            Reader.templates[sql_path] = query
+            logging.debug(f"Read query template: {sql_path}")
+        return query
+
+    @staticmethod
+    def format(sql_path, **kwargs):
+        """
+        Reads an SQL query template and formats it with the given names (schema, table, ...).
+        Formatted statements are cached, so that a statement run in a loop is only built once.
+
+        Args:
+            sql_path (str): The path to the file containing the SQL query.
+            **kwargs: The values of the placeholders of the template.
 
-        # Log the SQL query read from the file
-        logging.info(f"Read query : \n {create_schema_query} \n From file: {sql_path}")
+        Returns:
+            str: The formatted SQL query.
+        """
+        return Reader._format(sql_path, tuple(sorted(kwargs.items())))
 
-        # Return the SQL query
-        return create_schema_query
+    @staticmethod
+    @lru_cache(maxsize=FORMATTED_CACHE_SIZE)
+    def _format(sql_path, items):
+        """
+        Cached implementation of `format`, keyed by the template and its placeholder values.
+        """
+        return Reader.read(sql_path).format(**dict(items))
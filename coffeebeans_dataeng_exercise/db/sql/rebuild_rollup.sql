@@ -0,0 +1,13 @@
+-- Recompute a rollup table from the votes table, or from the counts of a finer rollup
+DELETE FROM {sink_schema}.{sink_table};
+
+INSERT INTO {sink_schema}.{sink_table} 
+SELECT 
+  CAST(date_trunc('{grain}', {date_column}) AS DATE) AS period,  -- First day of the period of the votes
+  VoteTypeId,  -- Type of the votes
+  {count_expression} AS vote_count  -- Number of votes of the type cast during the period
+FROM 
+  {source_schema}.{source_table}  -- The votes, or a rollup at a finer grain
+GROUP BY 
+  1,  -- Group by period
+  2;  -- Group by VoteTypeId
@@ -0,0 +1,12 @@
+-- Recompute the weekly vote counts aggregate from the whole votes table
+DELETE FROM {sink_schema}.{sink_table};
+
+INSERT INTO {sink_schema}.{sink_table} 
+SELECT 
+  CAST(year_week // 100 AS BIGINT) AS year,  -- Year of the week, from the integer week key
+  lpad(CAST(year_week % 100 AS VARCHAR), 2, '0') AS week_number,  -- Two digit week number, as strftime('%W')
+  COUNT(*) AS vote_count  -- Count the number of votes for each week
+FROM 
+  {source_schema}.{source_table}  -- Source table containing vote data
+GROUP BY 
+  year_week;  -- Group by the integer week key stored at load
@@ -0,0 +1,5 @@
+-- Drop the staged records whose Id is already stored (hash anti-join), so that only new votes are written
+DELETE FROM {staging_table} s 
+USING {schema}.{table} v  -- Records already stored
+WHERE 
+  v.Id = s.Id;
@@ -0,0 +1,8 @@
+-- Drop the staged records identical to the stored record with the same Id, compared by a hash of
+-- their columns, so that only new and changed votes are written
+DELETE FROM {staging_table} s 
+USING {schema}.{table} v  -- Records already stored
+WHERE 
+  v.Id = s.Id 
+  AND hash(v.UserId, v.PostId, v.VoteTypeId, v.BountyAmount, v.CreationDate) 
+    = hash(s.UserId, s.PostId, s.VoteTypeId, s.BountyAmount, s.CreationDate);
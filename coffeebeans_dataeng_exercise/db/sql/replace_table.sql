@@ -0,0 +1,3 @@
+-- Replace a table with a new table written next to it
+DROP TABLE IF EXISTS {schema}.{table};
+ALTER TABLE {schema}.{new_table} RENAME TO {table};
@@ -0,0 +1,15 @@
+-- Copy the votes into the new table ordered by CreationDate, so that every row group holds a
+-- narrow range of dates and the zone maps of CreationDate (and year_week) prune range queries
+INSERT INTO {schema}.{new_table} 
+SELECT 
+  * 
+FROM 
+  {schema}.{table} 
+ORDER BY 
+  CreationDate,  -- Rows of the same dates are stored together
+  Id;  -- Stable order between the votes of the same timestamp
+
+-- Replace the fragmented table with the sorted one
+DROP TABLE {schema}.{table};
+
+ALTER TABLE {schema}.{new_table} RENAME TO {table};
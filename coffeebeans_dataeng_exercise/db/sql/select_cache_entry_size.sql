@@ -0,0 +1,5 @@
+-- Estimate the size in bytes of a cached query result from the length of its rows rendered as text
+SELECT 
+  COALESCE(SUM(strlen(CAST(entry AS VARCHAR))), 0) AS size  -- Every row is read as one struct
+FROM 
+  memory.main.{table} entry;
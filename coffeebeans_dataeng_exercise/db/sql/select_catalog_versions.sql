@@ -0,0 +1,22 @@
+-- Read the catalog version markers whose objects still exist
+SELECT 
+  schema_name,  -- Schema of the managed object
+  table_name,  -- Table of the managed object
+  version  -- Version of the DDL the objects were created with
+FROM 
+  {schema}.{table} AS marker 
+WHERE 
+  -- A marker only counts while its schema exists...
+  EXISTS (
+    SELECT 1 FROM duckdb_schemas() AS s 
+    WHERE s.database_name = current_database() AND s.schema_name = marker.schema_name
+  ) 
+  -- ...and its table, for the managers creating one, so that a dropped table is created again
+  AND (
+    NOT marker.creates_table 
+    OR EXISTS (
+      SELECT 1 FROM duckdb_tables() AS t 
+      WHERE t.database_name = current_database() AND t.schema_name = marker.schema_name 
+        AND t.table_name = marker.table_name
+    )
+  );
@@ -0,0 +1,11 @@
+-- Select the columns of a table with their data types, in table order
+SELECT 
+  column_name,  -- Name of the column
+  data_type  -- Data type of the column
+FROM 
+  information_schema.columns 
+WHERE 
+  table_schema = ?  -- Schema of the table
+  AND table_name = ?  -- Name of the table
+ORDER BY 
+  ordinal_position;
@@ -0,0 +1,2 @@
+-- Name of the database file of the connection, as referenced by COPY FROM DATABASE
+SELECT current_database();
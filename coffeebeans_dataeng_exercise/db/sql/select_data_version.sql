@@ -0,0 +1,7 @@
+-- Read the data version
+SELECT 
+  version  -- Number of commits that changed the data
+FROM 
+  {schema}.{table} 
+WHERE 
+  id = 1;
@@ -0,0 +1,11 @@
+-- Select the manifest entries of the files bound as a list parameter
+SELECT 
+  file_path,  -- Absolute path of the ingested file
+  file_size,  -- Size of the file when it was last ingested
+  file_mtime,  -- Modification time of the file when it was last ingested
+  content_hash,  -- Hash of the content up to the high-water mark
+  high_water_mark  -- Byte offset of the end of the last ingested line
+FROM 
+  {schema}.{table} 
+WHERE 
+  list_contains(?, file_path);  -- Only the files of the current batch
@@ -0,0 +1,8 @@
+-- Select the content hashes of the manifest that match the hashes bound as a list parameter
+SELECT 
+  content_hash,  -- Hash of the content up to the high-water mark
+  high_water_mark  -- Number of bytes covered by the hash
+FROM 
+  {schema}.{table} 
+WHERE 
+  list_contains(?, content_hash);  -- Only the hashes of the new files of the current batch
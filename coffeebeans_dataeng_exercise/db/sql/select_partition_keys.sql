@@ -0,0 +1,6 @@
+-- Select the partition keys of the partitions being rewritten
+SELECT 
+  year,  -- Year partition key
+  week  -- Week partition key
+FROM 
+  {touched_partitions};
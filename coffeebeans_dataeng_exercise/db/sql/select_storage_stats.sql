@@ -0,0 +1,15 @@
+-- Count the row groups of a table and the blocks of the database file, used and free
+SELECT 
+  (
+    SELECT 
+      COUNT(DISTINCT row_group_id) 
+    FROM 
+      pragma_storage_info('{schema}.{table}')
+  ) AS row_groups,  -- Row groups of the table, each with its own zone maps
+  used_blocks,  -- Blocks holding data
+  free_blocks,  -- Blocks left free by dropped or rewritten data, reused by the next writes
+  block_size  -- Bytes of a block
+FROM 
+  pragma_database_size() 
+WHERE 
+  database_name = current_database();
@@ -0,0 +1,8 @@
+-- Check whether a table or view exists in the specified schema
+SELECT 
+  COUNT(*) > 0 AS table_exists 
+FROM 
+  information_schema.tables 
+WHERE 
+  table_schema = ?  -- Schema of the table
+  AND table_name = ?;  -- Name of the table
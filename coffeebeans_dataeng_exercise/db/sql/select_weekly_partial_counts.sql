@@ -0,0 +1,18 @@
+-- Count the votes of each week of one Parquet storage file by integer week key, read from the
+-- year=/week= partition keys of its path; the counts of all shards add up to the weekly counts
+SELECT 
+  CAST(year_week // 100 AS BIGINT) AS year,  -- Year of the week, from the integer week key
+  lpad(CAST(year_week % 100 AS VARCHAR), 2, '0') AS week_number,  -- Two digit week number, as strftime('%W')
+  COUNT(*) AS vote_count  -- Count the number of votes of the week in the shard
+FROM (
+  SELECT 
+    CAST(year * 100 + week AS INTEGER) AS year_week  -- Integer week key, from the partition keys of the file
+  FROM 
+    read_parquet(
+      '{shard_path}',  -- Parquet file of the shard
+      hive_partitioning = true, 
+      hive_types = {{'year': BIGINT, 'week': INTEGER}}
+    )
+) 
+GROUP BY 
+  year_week;  -- Group by the integer week key
@@ -0,0 +1,14 @@
+-- Count the votes of each week of one Parquet file without partition keys, computing the integer
+-- week key of every vote with the year_week macro; the counts of all shards add up to the weekly counts
+SELECT 
+  CAST(year_week // 100 AS BIGINT) AS year,  -- Year of the week, from the integer week key
+  lpad(CAST(year_week % 100 AS VARCHAR), 2, '0') AS week_number,  -- Two digit week number, as strftime('%W')
+  COUNT(*) AS vote_count  -- Count the number of votes of the week in the shard
+FROM (
+  SELECT 
+    {schema}.year_week(CreationDate) AS year_week  -- Integer week key of the vote
+  FROM 
+    read_parquet('{shard_path}')  -- Parquet file of the shard
+) 
+GROUP BY 
+  year_week;  -- Group by the integer week key
@@ -0,0 +1,12 @@
+-- Count the votes of every week, in total and per value of every dimension, in a single scan of the votes
+CREATE OR REPLACE TABLE {schema}.{counts_table} AS 
+SELECT 
+  CAST(year_week // 100 AS BIGINT) AS year,  -- Year of the week, from the integer week key
+  lpad(CAST(year_week % 100 AS VARCHAR), 2, '0') AS week_number,  -- Two digit week number, as strftime('%W')
+  {dimension_name} AS dimension,  -- Dimension the row is sliced by, NULL in the weekly totals
+  {dimension_value} AS dimension_value,  -- Value of the dimension, NULL in the weekly totals
+  COUNT(*) AS vote_count  -- Count the number of votes
+FROM 
+  {source_schema}.{source_table}  -- Source table containing vote data; only the week key and the dimensions are read
+GROUP BY 
+  GROUPING SETS ({grouping_sets});  -- The weekly totals, then one grouping set per dimension
@@ -0,0 +1,10 @@
+-- Read the weekly totals of the outlier rules from the weekly counts aggregate, without scanning the votes
+CREATE OR REPLACE TABLE {schema}.{counts_table} AS 
+SELECT 
+  year,  -- Year of the week
+  week_number,  -- Week number of the week
+  CAST(NULL AS VARCHAR) AS dimension,  -- The aggregate only holds weekly totals
+  CAST(NULL AS VARCHAR) AS dimension_value,  -- The aggregate only holds weekly totals
+  vote_count  -- Number of votes of the week
+FROM 
+  {weekly_schema}.{weekly_table};  -- Aggregate table kept up to date by the ingestion
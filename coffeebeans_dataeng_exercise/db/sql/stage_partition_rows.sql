@@ -0,0 +1,8 @@
+-- Collect the rows of the partitions touched by the staged batch, with their partition keys
+CREATE OR REPLACE TEMP TABLE {partition_rows} AS 
+SELECT 
+  *,  -- Columns of the staged record
+  EXTRACT(year FROM CreationDate) AS year,  -- Year partition key
+  CAST(strftime('%W', CreationDate :: date) AS INTEGER) AS week  -- Week partition key
+FROM 
+  {staging_table};
@@ -0,0 +1,26 @@
+-- Stage the deduplicated records of an in-memory relation in the staging table
+INSERT INTO {staging_table} (
+  SELECT 
+    {column_names}  -- Columns of the votes table
+  FROM 
+    (
+      -- Assign a row number to each record, partitioned by Id and ordered by CreationDate descending
+      SELECT 
+        *, 
+        ROW_NUMBER() OVER (
+          PARTITION BY Id  -- Partition the data by Id to ensure uniqueness
+          ORDER BY 
+            CreationDate DESC  -- Order by CreationDate in descending order to get the latest record
+        ) as rn  -- Assign a row number to each record within the partition
+      FROM 
+        (
+          -- Read the records, cast to the types of the votes table
+          SELECT 
+            {cast_columns} 
+          FROM 
+            {source}
+        )
+    ) 
+  WHERE 
+    rn = 1  -- Filter to keep only the latest record (rn = 1)
+);
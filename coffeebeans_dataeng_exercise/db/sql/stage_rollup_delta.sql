@@ -0,0 +1,29 @@
+-- Count the changes of the staged batch to the vote counts, per day and vote type.
+-- Must run before the staged records are written, while the rows they replace are still in the votes table.
+CREATE OR REPLACE TEMP TABLE {delta_table} AS 
+SELECT 
+  period,  -- Day of the votes
+  VoteTypeId,  -- Type of the votes
+  SUM(delta) AS delta  -- Net change of the vote count of the day and type
+FROM 
+  (
+    SELECT 
+      CAST(CreationDate AS DATE) AS period,  -- Day of the staged record
+      VoteTypeId,  -- Type of the staged record
+      1 AS delta  -- Every staged record is counted in its day
+    FROM 
+      {staging_table} 
+    UNION ALL 
+    SELECT 
+      CAST(v.CreationDate AS DATE) AS period,  -- Day of the replaced record
+      v.VoteTypeId,  -- Type of the replaced record
+      -1 AS delta  -- A replaced record is removed from its previous day and type
+    FROM 
+      {source_schema}.{source_table} v 
+      SEMI JOIN {staging_table} s ON v.Id = s.Id  -- Only the existing records that are replaced
+  ) 
+GROUP BY 
+  1,  -- Group by period
+  2  -- Group by VoteTypeId
+HAVING 
+  SUM(delta) <> 0;  -- A record replaced within its day and type changes nothing
@@ -0,0 +1,24 @@
+-- Stage the records of the deduplicated shards, keeping the latest record of every Id across shards
+INSERT INTO {staging_table} (
+  SELECT 
+    Id,  -- Unique identifier for the record
+    UserId,  -- Identifier for the user who cast the vote
+    PostId,  -- Identifier for the post that received the vote
+    VoteTypeId,  -- Identifier for the type of vote
+    BountyAmount,  -- Amount of bounty associated with the vote
+    CreationDate  -- Timestamp when the vote was created
+  FROM 
+    (
+      SELECT 
+        *, 
+        ROW_NUMBER() OVER (
+          PARTITION BY Id  -- An Id only appears once per shard, but may appear in several shards
+          ORDER BY 
+            CreationDate DESC  -- Keep the latest record, as the single process ingestion does
+        ) AS rn 
+      FROM 
+        read_parquet({shard_files})  -- Parquet files written by the workers, all with the votes table types
+    ) 
+  WHERE 
+    rn = 1
+);
@@ -0,0 +1,15 @@
+-- Collect the keys of the partitions rewritten by the staged batch: the partitions of the staged rows,
+-- and the partitions holding the stored versions of the staged Ids, which may be in another week
+CREATE OR REPLACE TEMP TABLE {touched_partitions} AS 
+SELECT 
+  year,  -- Year partition key
+  week  -- Week partition key
+FROM 
+  {partition_rows} 
+UNION 
+SELECT 
+  v.year,  -- Year partition key of the stored version
+  v.week  -- Week partition key of the stored version
+FROM 
+  {schema}.{view} v 
+  SEMI JOIN {staging_table} s ON v.Id = s.Id;  -- Only the votes replaced by the staged batch
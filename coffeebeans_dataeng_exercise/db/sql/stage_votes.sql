@@ -1,5 +1,5 @@
--- Insert data into the specified votes table from a JSON file with deduplication and upsert logic
-INSERT INTO {schema}.{table} (
+-- Stage the deduplicated records of one or more JSON files in the staging table
+INSERT INTO {staging_table} (
   -- Select the columns to insert into the table
   SELECT 
     Id,  -- Unique identifier for the record
@@ -25,7 +25,7 @@ INSERT INTO {schema}.{table} (
         ) as rn  -- Assign a row number to each record within the partition
       FROM 
         (
-          -- Read data from a JSON file and select the required columns
+          -- Read data from the JSON files and select the required columns
           SELECT 
             Id,  -- Unique identifier for the record
             UserId,  -- Identifier for the user who cast the vote
@@ -34,17 +34,14 @@ INSERT INTO {schema}.{table} (
             BountyAmount,  -- Amount of bounty associated with the vote
             CreationDate  -- Timestamp when the vote was created
           FROM 
-            read_json('{file_path}')  -- Read data from the specified JSON file
+            read_json(
+              ?,  -- Read data from the list of JSON files bound as the query parameter
+              columns = {columns},  -- Columns and types of the votes table: no sampling, no implicit casts
+              format = '{json_format}',  -- One record per line
+              timestampformat = '{timestamp_format}'  -- Format of the timestamps in the files
+            )
         )
     ) 
   WHERE 
     rn = 1  -- Filter to keep only the latest record (rn = 1)
-) 
-ON CONFLICT (Id) DO 
-  UPDATE 
-  SET 
-    UserId = EXCLUDED.UserId,  -- Update the UserId with the value from the excluded (new) row
-    PostId = EXCLUDED.PostId,  -- Update the PostId with the value from the excluded row
-    VoteTypeId = EXCLUDED.VoteTypeId,  -- Update the VoteTypeId with the value from the excluded row
-    BountyAmount = EXCLUDED.BountyAmount,  -- Update the BountyAmount with the value from the excluded row
-    CreationDate = EXCLUDED.CreationDate;  -- Update the CreationDate with the value from the excluded row
+);
@@ -0,0 +1,18 @@
+-- Replace the statistics of the rewritten partitions, dropping the ones left without rows
+DELETE FROM {schema}.{table} s 
+USING {touched_partitions} p 
+WHERE 
+  s.year IS NOT DISTINCT FROM p.year 
+  AND s.week IS NOT DISTINCT FROM p.week;
+
+INSERT INTO {schema}.{table} 
+SELECT 
+  year,  -- Year partition key
+  week,  -- Week partition key
+  COUNT(*) AS row_count,  -- Number of votes stored in the partition
+  current_timestamp AS updated_at  -- Time of the rewrite
+FROM 
+  {partition_rows} 
+GROUP BY 
+  year, 
+  week;
@@ -0,0 +1,10 @@
+-- Insert the catalog version marker of an object, or update it if the object was already marked
+INSERT INTO {schema}.{table} 
+VALUES 
+  (?, ?, ?, ?, current_timestamp)  -- schema_name, table_name, creates_table, version, applied_at
+ON CONFLICT (schema_name, table_name) DO 
+  UPDATE 
+  SET 
+    creates_table = EXCLUDED.creates_table,  -- Update the kind of object with the value from the excluded row
+    version = EXCLUDED.version,  -- Update the version with the value from the excluded (new) row
+    applied_at = EXCLUDED.applied_at;  -- Update the timestamp with the value from the excluded row
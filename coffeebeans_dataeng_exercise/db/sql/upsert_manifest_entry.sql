@@ -0,0 +1,12 @@
+-- Insert the manifest entry of a file, or update it if the file was already ingested
+INSERT INTO {schema}.{table} 
+VALUES 
+  (?, ?, ?, ?, ?, current_timestamp)  -- file_path, file_size, file_mtime, content_hash, high_water_mark, ingested_at
+ON CONFLICT (file_path) DO 
+  UPDATE 
+  SET 
+    file_size = EXCLUDED.file_size,  -- Update the size with the value from the excluded (new) row
+    file_mtime = EXCLUDED.file_mtime,  -- Update the modification time with the value from the excluded row
+    content_hash = EXCLUDED.content_hash,  -- Update the content hash with the value from the excluded row
+    high_water_mark = EXCLUDED.high_water_mark,  -- Update the high-water mark with the value from the excluded row
+    ingested_at = EXCLUDED.ingested_at;  -- Update the ingestion timestamp with the value from the excluded row
@@ -0,0 +1,18 @@
+-- Upsert the staged records into the specified votes table
+INSERT INTO {schema}.{table} 
+SELECT 
+  *, 
+  {schema}.year_week(CreationDate) AS year_week  -- Integer week key, computed once per record
+FROM 
+  {staging_table}  -- Deduplicated records of the current batch
+ORDER BY 
+  year_week  -- New rows of the same week are appended together
+ON CONFLICT (Id) DO 
+  UPDATE 
+  SET 
+    UserId = EXCLUDED.UserId,  -- Update the UserId with the value from the excluded (new) row
+    PostId = EXCLUDED.PostId,  -- Update the PostId with the value from the excluded row
+    VoteTypeId = EXCLUDED.VoteTypeId,  -- Update the VoteTypeId with the value from the excluded row
+    BountyAmount = EXCLUDED.BountyAmount,  -- Update the BountyAmount with the value from the excluded row
+    CreationDate = EXCLUDED.CreationDate,  -- Update the CreationDate with the value from the excluded row
+    year_week = EXCLUDED.year_week;  -- Update the week key of the new CreationDate
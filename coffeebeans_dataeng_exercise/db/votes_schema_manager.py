@@ -3,15 +3,30 @@ import logging
 from coffeebeans_dataeng_exercise.constants.constants import (
     CREATE_SCHEMA_PATH,  # Path to the SQL file for creating the schema
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_TYPED_VOTES_TABLE_PATH,  # Path to the SQL file for creating the typed votes table
+)
 from coffeebeans_dataeng_exercise.constants.constants import (
     CREATE_VOTES_TABLE_PATH,  # Path to the SQL file for creating the votes table
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_YEAR_WEEK_MACRO_PATH,  # Path to the SQL file for creating the week key macro
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    MIGRATE_TO_TYPED_VOTES_TABLE_PATH,  # Path to the SQL file for migrating to the typed votes table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    MIGRATE_TO_YEAR_WEEK_VOTES_TABLE_PATH,  # Path to the SQL file for adding the week key column
+)
 from coffeebeans_dataeng_exercise.constants.constants import (
     SCHEMA,  # Default schema name
 )
 from coffeebeans_dataeng_exercise.constants.constants import (
     VOTES_TABLE,  # Default table name for votes
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    YEAR_WEEK_COLUMN,  # Column holding the integer week key computed at load
+)
 from coffeebeans_dataeng_exercise.db.schema_manager import SchemaManager
 from coffeebeans_dataeng_exercise.db.sql.reader import Reader
 
@@ -22,7 +37,10 @@ class VotesSchemaManager(SchemaManager):
     Inherits from SchemaManager and implements schema and table creation.
     """
 
-    def __init__(self, db_connection, schema=SCHEMA, table=VOTES_TABLE):
+    # 2: the year_week column, computed at load by the year_week macro of the schema
+    CATALOG_VERSION = 2
+
+    def __init__(self, db_connection, schema=SCHEMA, table=VOTES_TABLE, typed=False):
         """
         Initialize the VotesSchemaManager with database connection, schema, and table.
 
@@ -30,8 +48,11 @@ class VotesSchemaManager(SchemaManager):
             db_connection (DatabaseConnection): The connection to the database.
             schema (str): The schema name. Defaults to SCHEMA from constants.
             table (str): The table name for votes. Defaults to VOTES_TABLE from constants.
+            typed (bool): Use the typed layout (BIGINT ids, SMALLINT vote type, DECIMAL bounty)
+                instead of strings, migrating an existing string table. Defaults to False.
         """
         super().__init__(db_connection, schema, table)  # Initialize the parent SchemaManager
+        self.typed = typed
         # Log the creation of the SchemaManager for the specified schema and table
         logging.info(f"SchemaManager created for schema: {schema}.{table}")
 
@@ -40,15 +61,114 @@ class VotesSchemaManager(SchemaManager):
         Create the schema and the votes table in the database if they do not already exist.
         """
         # Read the SQL query for creating the schema and format it with the schema name
-        create_schema_query = Reader.read(CREATE_SCHEMA_PATH).format(schema=self.schema)
+        create_schema_query = Reader.format(CREATE_SCHEMA_PATH, schema=self.schema)
         # Execute the schema creation query on the database
         self.db_connection.execute(create_schema_query)
+        # The week key macro is used by the migrations and by every write
+        self.db_connection.execute(Reader.format(CREATE_YEAR_WEEK_MACRO_PATH, schema=self.schema))
+
+        if self.typed and self.is_string_typed():
+            # An existing table in the string layout is converted once
+            self.migrate_to_typed()
+        elif self.table_exists() and YEAR_WEEK_COLUMN not in dict(super().column_types()):
+            # An existing table created before the week key gets it, with its rows ordered by it
+            self.migrate_to_year_week()
 
         # Read the SQL query for creating the votes table and format it with schema and table names
-        create_votes_table_query = Reader.read(CREATE_VOTES_TABLE_PATH).format(
+        create_votes_table_query = Reader.format(
+            CREATE_TYPED_VOTES_TABLE_PATH if self.typed else CREATE_VOTES_TABLE_PATH,
             schema=self.schema, table=self.table)
         # Execute the table creation query on the database
         self.db_connection.execute(create_votes_table_query)
 
         # Log the successful creation of the schema and table
         logging.info(f"Table created if not existed: {self.schema}.{self.table}")
+
+    def catalog_version(self):
+        """
+        Version recorded in the catalog markers: switching to the typed layout runs the DDL,
+        and the migration, again.
+
+        Returns:
+            str: The version.
+        """
+        return f"{self.CATALOG_VERSION}-typed" if self.typed else str(self.CATALOG_VERSION)
+
+    def column_types(self):
+        """
+        The columns of the records with their data types, as read from the input files: the
+        week key, derived from CreationDate when the records are written, is left out.
+
+        Returns:
+            list[tuple[str, str]]: (column name, data type) pairs in table order; empty if the
+            table does not exist.
+        """
+        return [(name, data_type) for name, data_type in super().column_types() if name != YEAR_WEEK_COLUMN]
+
+    def read_json_columns(self):
+        """
+        The columns of the votes table with their types, as the `columns` argument of `read_json`,
+        so that the input files are parsed straight into the types of the table.
+
+        Returns:
+            str: A struct literal such as {'Id': 'VARCHAR', ...}.
+        """
+        return "{" + ", ".join(f"'{name}': '{data_type}'" for name, data_type in self.column_types()) + "}"
+
+    def is_string_typed(self):
+        """
+        Check whether the votes table exists with the original string typed Id.
+
+        Returns:
+            bool: True if the table exists and its Id is a VARCHAR.
+        """
+        return dict(self.column_types()).get("Id") == "VARCHAR"
+
+    def migrate_to_typed(self):
+        """
+        Migrate the string typed votes table to the typed layout: the records are parsed once
+        into a new typed table that then replaces the original one, in a single transaction.
+        Views exposing the retyped columns have to be recreated afterwards.
+        """
+        typed_table = f"{self.table}__typed"  # Name of the new table until it replaces the old one
+        create_typed_table_query = Reader.format(
+            CREATE_TYPED_VOTES_TABLE_PATH, schema=self.schema, table=typed_table)
+        migrate_query = Reader.format(
+            MIGRATE_TO_TYPED_VOTES_TABLE_PATH, schema=self.schema, table=self.table, typed_table=typed_table)
+
+        with self.db_connection.transaction():
+            self.db_connection.execute(create_typed_table_query)
+            self.db_connection.execute(migrate_query)
+
+        logging.info(f"Migrated table to the typed layout: {self.schema}.{self.table}")
+
+    def create_table_like_query(self, table):
+        """
+        Build the query creating an empty table with the layout of the existing votes table,
+        typed or not, to rewrite the votes into.
+
+        Args:
+            table (str): Name of the new table, in the schema of the votes table.
+
+        Returns:
+            str: The SQL query creating the table.
+        """
+        return Reader.format(CREATE_VOTES_TABLE_PATH if self.is_string_typed() else CREATE_TYPED_VOTES_TABLE_PATH,
+                             schema=self.schema, table=table)
+
+    def migrate_to_year_week(self):
+        """
+        Add the week key to a votes table created before it: the records are copied once into
+        a new table of the same layout, ordered by the key, that then replaces the original one,
+        in a single transaction.
+        """
+        new_table = f"{self.table}__year_week"  # Name of the new table until it replaces the old one
+        create_table_query = self.create_table_like_query(new_table)
+        migrate_query = Reader.format(
+            MIGRATE_TO_YEAR_WEEK_VOTES_TABLE_PATH, schema=self.schema, table=self.table, new_table=new_table)
+
+        with self.db_connection.transaction():
+            self.db_connection.execute(create_table_query)
+            self.db_connection.execute(migrate_query)
+
+        logging.info(f"Added the week key column to the table: {self.schema}.{self.table}")
@@ -0,0 +1,221 @@
+import fcntl
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DB_FILE,  # Default path to the database file
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    PUBLISH_SNAPSHOT_PATH,  # Path to the SQL file copying the database into a snapshot file
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_CURRENT_DATABASE_PATH,  # Path to the SQL file reading the name of the database
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SNAPSHOT_DATABASE,  # Name the snapshot being published is attached under
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SNAPSHOT_SUFFIX,  # Suffix of the snapshot file of the database
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    WRITER_LEASE_TIMEOUT,  # Default seconds a writer waits for the lease
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    WRITER_LOCK_SUFFIX,  # Suffix of the lock file of the writer lease
+)
+from coffeebeans_dataeng_exercise.db.db import DatabaseConnection
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+# Seconds between two attempts to take a lease held by another process
+LEASE_RETRY_INTERVAL = 0.05
+
+
+class WarehouseCoordinator:
+    """
+    Single writer, many readers access to a database file, which DuckDB only lets one process
+    open read-write.
+
+    - The writer lease is an exclusive `flock` on a lock file next to the database. A job holding
+      it is the only process opening the database read-write; another job waits for it instead of
+      failing on the lock of DuckDB.
+    - The writer publishes a snapshot, a copy of the database made with COPY FROM DATABASE and
+      renamed over the previous one, after its commits. The readers open the snapshot read-only,
+      any number of them at once, without ever touching the database of the writer. A reader
+      keeps the snapshot it opened until it closes it, even if a newer one is published.
+    - When no writer holds the lease and the snapshot is missing or older than the database, a
+      reader opens the database itself read-only, under a shared lease that a writer waits for.
+    """
+
+    def __init__(self, db_file=DB_FILE, snapshot_file=None, timeout=WRITER_LEASE_TIMEOUT):
+        """
+        Initialize the WarehouseCoordinator of a database file.
+
+        Args:
+            db_file (str): Path to the database file. Defaults to DB_FILE from constants.
+            snapshot_file (str, optional): Path of the snapshot published for the readers. Defaults
+                to None, the database file followed by SNAPSHOT_SUFFIX.
+            timeout (float, optional): Seconds a writer waits for the lease held by another process,
+                None to wait as long as needed. Defaults to WRITER_LEASE_TIMEOUT.
+        """
+        self.db_file = db_file
+        self.snapshot_file = snapshot_file or db_file + SNAPSHOT_SUFFIX
+        self.lock_file = db_file + WRITER_LOCK_SUFFIX
+        self.timeout = timeout
+        self._writer_fd = None  # Lock file descriptor while this coordinator holds the writer lease
+
+    @property
+    def is_writer(self):
+        """
+        Whether this coordinator holds the writer lease.
+        """
+        return self._writer_fd is not None
+
+    def acquire_writer(self, timeout=None):
+        """
+        Take the writer lease, waiting for the process holding it, or for the readers of the
+        database file, to release it.
+
+        Args:
+            timeout (float, optional): Seconds to wait, overriding the timeout of the coordinator.
+                Defaults to None.
+
+        Raises:
+            TimeoutError: If the lease is still held by another process after the timeout.
+        """
+        if self.is_writer:
+            return
+        timeout = self.timeout if timeout is None else timeout
+        fd = self._lock(fcntl.LOCK_EX, timeout)
+        if fd is None:
+            raise TimeoutError(f"The database {self.db_file} is owned by another writer "
+                               f"(pid {self._holder() or 'unknown'}) or being read")
+        # Recorded for the error message of the next writers
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._writer_fd = fd
+        logging.info(f"Writer lease of {self.db_file} acquired")
+
+    def release_writer(self):
+        """
+        Release the writer lease, once the database is closed.
+        """
+        if not self.is_writer:
+            return
+        fcntl.flock(self._writer_fd, fcntl.LOCK_UN)
+        os.close(self._writer_fd)
+        self._writer_fd = None
+        logging.info(f"Writer lease of {self.db_file} released")
+
+    def publish_snapshot(self, db_connection):
+        """
+        Copy the database into a new snapshot and rename it over the previous one, so that a reader
+        opens either the previous or the new snapshot, never a partial one.
+
+        Args:
+            db_connection (DatabaseConnection): Connection to the database, outside of a transaction.
+        """
+        database = db_connection.execute(Reader.format(SELECT_CURRENT_DATABASE_PATH)).fetchone()[0]
+        tmp_file = self.snapshot_file + ".tmp"
+        self._remove(tmp_file)
+        db_connection.execute(Reader.format(PUBLISH_SNAPSHOT_PATH, snapshot_file=tmp_file.replace("'", "''"),
+                                            snapshot=SNAPSHOT_DATABASE, database=database))
+        os.replace(tmp_file, self.snapshot_file)
+        logging.info(f"Published the snapshot {self.snapshot_file}")
+
+    @contextmanager
+    def read_lease(self):
+        """
+        Choose the file a reader opens and hold what it needs while it is open.
+
+        Yields:
+            str: The snapshot file, or the database file under a shared lease when no writer
+            holds the lease and the snapshot is missing or older than the database.
+
+        Raises:
+            FileNotFoundError: If a writer holds the lease and has not published a snapshot yet.
+        """
+        fd = None if self._snapshot_current() else self._lock(fcntl.LOCK_SH, 0)
+        try:
+            if fd is not None:
+                # No writer: the database itself is current
+                yield self.db_file
+            elif os.path.exists(self.snapshot_file):
+                yield self.snapshot_file
+            else:
+                raise FileNotFoundError(f"The database {self.db_file} is being written and no snapshot "
+                                        f"{self.snapshot_file} was published yet")
+        finally:
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    @contextmanager
+    def reader(self):
+        """
+        Open a read-only connection for a reader, on the snapshot or on the database (see `read_lease`).
+
+        Yields:
+            DatabaseConnection: The read-only connection, closed when the block exits.
+        """
+        with self.read_lease() as read_file:
+            db_connection = DatabaseConnection(read_file, con=duckdb.connect(read_file, read_only=True))
+            try:
+                yield db_connection
+            finally:
+                db_connection.close()
+
+    def _snapshot_current(self):
+        """
+        Whether the snapshot exists and is at least as recent as the database and its WAL.
+        """
+        if not os.path.exists(self.snapshot_file):
+            return False
+        snapshot_mtime = os.path.getmtime(self.snapshot_file)
+        return all(not os.path.exists(path) or os.path.getmtime(path) <= snapshot_mtime
+                   for path in (self.db_file, self.db_file + ".wal"))
+
+    def _lock(self, operation, timeout):
+        """
+        Lock the lock file, retrying until the timeout.
+
+        Args:
+            operation (int): fcntl.LOCK_EX for the writer, fcntl.LOCK_SH for a reader.
+            timeout (float | None): Seconds to wait; 0 tries once, None waits as long as needed.
+
+        Returns:
+            int | None: The locked file descriptor, or None if the lock is held after the timeout.
+        """
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(fd)
+                    return None
+                time.sleep(LEASE_RETRY_INTERVAL)
+
+    def _holder(self):
+        """
+        The pid recorded by the last writer, if any.
+        """
+        try:
+            with open(self.lock_file) as lock:
+                return lock.read().strip()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _remove(file_path):
+        """
+        Remove a leftover snapshot being published, and its WAL, by an interrupted writer.
+        """
+        for path in (file_path, file_path + ".wal"):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,57 @@
+import logging
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_SCHEMA_PATH,  # Path to the SQL file for creating the schema
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_WEEKLY_COUNTS_TABLE_PATH,  # Path to the SQL file for creating the weekly counts table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SCHEMA,  # Default schema name
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    WEEKLY_COUNTS_TABLE,  # Default table name for the weekly vote counts
+)
+from coffeebeans_dataeng_exercise.db.schema_manager import SchemaManager
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+
+class WeeklyCountsSchemaManager(SchemaManager):
+    """
+    Manages the creation of the schema and the weekly vote counts table in the database.
+    Inherits from SchemaManager and implements schema and table creation.
+    """
+
+    def __init__(self, db_connection, schema=SCHEMA, table=WEEKLY_COUNTS_TABLE):
+        """
+        Initialize the WeeklyCountsSchemaManager with database connection, schema, and table.
+
+        Args:
+            db_connection (DatabaseConnection): The connection to the database.
+            schema (str): The schema name. Defaults to SCHEMA from constants.
+            table (str): The table name for the weekly counts. Defaults to WEEKLY_COUNTS_TABLE from constants.
+        """
+        super().__init__(db_connection, schema, table)  # Initialize the parent SchemaManager
+        self.created = False  # Whether the table was created by this manager and still has to be filled
+        # Log the creation of the SchemaManager for the specified schema and table
+        logging.info(f"SchemaManager created for schema: {schema}.{table}")
+
+    def create_schema_and_table(self):
+        """
+        Create the schema and the weekly counts table in the database if they do not already exist.
+        """
+        # Read the SQL query for creating the schema and format it with the schema name
+        create_schema_query = Reader.format(CREATE_SCHEMA_PATH, schema=self.schema)
+        # Execute the schema creation query on the database
+        self.db_connection.execute(create_schema_query)
+
+        # A newly created aggregate is empty and has to be built from the votes table once
+        self.created = not self.table_exists()
+        # Read the SQL query for creating the weekly counts table and format it with schema and table names
+        create_weekly_counts_table_query = Reader.format(
+            CREATE_WEEKLY_COUNTS_TABLE_PATH, schema=self.schema, table=self.table)
+        # Execute the table creation query on the database
+        self.db_connection.execute(create_weekly_counts_table_query)
+
+        # Log the successful creation of the schema and table
+        logging.info(f"Table created if not existed: {self.schema}.{self.table}")
@@ -1,32 +1,134 @@
+import argparse
 import logging
-import os
 
 from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DB_FILE,  # Default path to the database file
+)
 from coffeebeans_dataeng_exercise.constants.constants import (
     FILE_PATH,  # Path to the data file to be processed
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    BackendType,  # Enumeration of execution backends (e.g., DASK)
+)
 from coffeebeans_dataeng_exercise.constants.constants import (
     OperationType,  # Enumeration of operation types (e.g., INGEST)
 )
 from coffeebeans_dataeng_exercise.constants.constants import (
     SchemaType,  # Enumeration of schema types (e.g., VOTES)
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    StorageType,  # Enumeration of storage backends (e.g., PARQUET)
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    WriteStrategy,  # Enumeration of write strategies (e.g., INSERT_NEW_ONLY)
+)
 
 # Configure logging to display INFO level messages and above, with a specific format
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+
+def parse_args():
+    """
+    Parses the command-line arguments of the ingestion script.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Ingest vote files into the warehouse.")
+    # Files, directories or glob patterns to ingest; defaults to the bundled data file
+    parser.add_argument("paths", nargs="*", default=[FILE_PATH],
+                        help="Files, directories or glob patterns containing vote data.")
+    # Skip the files already recorded in the ingestion manifest
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only ingest new files and the new tails of growing files.")
+    # Store ids, vote types and bounties as numbers instead of strings
+    parser.add_argument("--typed", action="store_true",
+                        help="Use (or migrate to) the typed votes table layout.")
+    # Write the votes to the DuckDB table or to Hive partitioned Parquet files
+    parser.add_argument("--storage", choices=[StorageType.DUCKDB, StorageType.PARQUET],
+                        default=StorageType.DUCKDB, help="Storage backend of the votes.")
+    # How the records are written over the stored votes
+    parser.add_argument("--write-strategy", default=WriteStrategy.UPSERT,
+                        choices=[WriteStrategy.UPSERT, WriteStrategy.INSERT_NEW_ONLY,
+                                 WriteStrategy.MERGE_CHANGED_ONLY],
+                        help="Upsert every record, only insert new Ids, or only write new and changed records.")
+    # Set malformed records aside instead of failing the batch
+    parser.add_argument("--tolerant", action="store_true",
+                        help="Write malformed records to blog_analysis.votes_rejects and load the others.")
+    # Bounded memory ingestion of files larger than the memory of the machine
+    parser.add_argument("--chunk-size", type=int, default=None, metavar="MB",
+                        help="Stream the files in chunks of this many megabytes, one transaction per chunk.")
+    parser.add_argument("--memory-limit", default=None,
+                        help="DuckDB memory ceiling of the ingestion, e.g. 1GB.")
+    parser.add_argument("--temp-directory", default=None,
+                        help="Directory DuckDB spills to when the memory ceiling is reached.")
+    # Pre-aggregated vote counts for the BI queries of run-query
+    parser.add_argument("--rollups", action="store_true",
+                        help="Create and maintain the vote counts per day, week and month and per VoteTypeId.")
+    # Short WAL replay when the database is next opened
+    parser.add_argument("--checkpoint-rows", type=int, default=None, metavar="ROWS",
+                        help="Checkpoint the database after every commit that brings the rows written to this many more.")
+    # Own the database through the writer lease and publish a snapshot for the concurrent readers
+    parser.add_argument("--publish-snapshot", action="store_true",
+                        help="Wait for the other writers and publish a read-only snapshot for run-query after the run.")
+    # Stage timings, row counts and bytes read of the run, for monitoring
+    parser.add_argument("--metrics-file", default=None,
+                        help="Write the metrics of the run to this file: a Prometheus textfile for *.prom, JSON otherwise.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Add the DuckDB profile of every query to the metrics.")
+    # Run the job in this process or on the workers of a Dask cluster
+    parser.add_argument("--backend", choices=[BackendType.DUCKDB, BackendType.DASK],
+                        default=BackendType.DUCKDB, help="Execution backend of the job.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of Dask worker processes (defaults to one per core).")
+    parser.add_argument("--scheduler", default=None,
+                        help="Address of an existing Dask scheduler instead of a local cluster.")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
     """
     Main entry point of the script. Creates and runs a batch job based on the operation type.
     """
+    args = parse_args()
+
     # Create an instance of the batch job based on the operation type (INGEST) and schema type (VOTES)
-    data_ingestion = BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES])
+    # The Dask jobs also take the cluster to run on
+    backend_options = {}
+    if args.backend == BackendType.DASK:
+        backend_options = {"n_workers": args.workers, "scheduler_address": args.scheduler}
+    # The modules below are imported on demand, so that the start-up of the script only loads what the run uses
+    coordinator = None
+    if args.publish_snapshot:
+        from coffeebeans_dataeng_exercise.db.warehouse_coordinator import WarehouseCoordinator
+        coordinator = WarehouseCoordinator(DB_FILE)
+
+    data_ingestion = BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], backend=args.backend,
+                                            incremental=args.incremental, typed=args.typed,
+                                            storage=args.storage,
+                                            chunk_size=args.chunk_size and args.chunk_size * 1024 * 1024,
+                                            memory_limit=args.memory_limit,
+                                            temp_directory=args.temp_directory,
+                                            write_strategy=args.write_strategy, tolerant=args.tolerant,
+                                            metrics_file=args.metrics_file, profile=args.profile,
+                                            rollups=args.rollups, checkpoint_rows=args.checkpoint_rows,
+                                            coordinator=coordinator,
+                                            **backend_options)
+
+    from coffeebeans_dataeng_exercise.ingest_jobs.input_files import resolve_input_files
+    try:
+        # Expand the arguments into the list of data files of this batch
+        file_paths = resolve_input_files(args.paths)
+    except FileNotFoundError as error:
+        logging.error(str(error))
+        file_paths = []
 
-    # Check if the data file exists at the specified path
-    if os.path.exists(FILE_PATH):
-        # Run the batch job with the data file path
-        data_ingestion.run(FILE_PATH)
+    # Check if there is at least one data file to ingest
+    if file_paths:
+        # Run the batch job with all the data files at once
+        data_ingestion.run(file_paths)
     else:
-        # Log an error if the data file is not found
-        logging.error(f"Data file {FILE_PATH} not found.")
+        # Log an error if no data file is found
+        logging.error(f"Data file(s) {' '.join(args.paths)} not found.")
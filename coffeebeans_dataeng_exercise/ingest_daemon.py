@@ -0,0 +1,81 @@
+import argparse
+import logging
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DAEMON_BATCH_BYTES,  # Default bytes of landed files that trigger a micro-batch
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DAEMON_MAX_LATENCY,  # Default seconds a landed file waits at most before being committed
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DAEMON_POLL_INTERVAL,  # Default seconds between two scans of the landing directory
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DAEMON_PUBLISH_INTERVAL,  # Default seconds at least between two published snapshots
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DB_FILE,  # Default path to the database file
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    WriteStrategy,  # Enumeration of write strategies (e.g., INSERT_NEW_ONLY)
+)
+from coffeebeans_dataeng_exercise.db.warehouse_coordinator import WarehouseCoordinator
+from coffeebeans_dataeng_exercise.ingest_jobs.ingest_daemon import IngestDaemon
+
+# Configure logging to display INFO level messages and above, with a specific format
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def parse_args():
+    """
+    Parses the command-line arguments of the ingestion daemon.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Continuously ingest the vote files landing in a directory.")
+    parser.add_argument("landing_dir", help="Directory the vote files land in.")
+    # Micro-batch thresholds: whichever is reached first commits the ready files
+    parser.add_argument("--batch-size", type=int, default=DAEMON_BATCH_BYTES // (1024 * 1024), metavar="MB",
+                        help="Commit the ready files once they add up to this many megabytes.")
+    parser.add_argument("--max-latency", type=float, default=DAEMON_MAX_LATENCY, metavar="SECONDS",
+                        help="Commit the ready files once the oldest landed this many seconds ago.")
+    parser.add_argument("--poll-interval", type=float, default=DAEMON_POLL_INTERVAL, metavar="SECONDS",
+                        help="Seconds between two scans of the landing directory.")
+    # Options of the ingestion job
+    parser.add_argument("--typed", action="store_true",
+                        help="Use (or migrate to) the typed votes table layout.")
+    parser.add_argument("--write-strategy", default=WriteStrategy.UPSERT,
+                        choices=[WriteStrategy.UPSERT, WriteStrategy.INSERT_NEW_ONLY,
+                                 WriteStrategy.MERGE_CHANGED_ONLY],
+                        help="Upsert every record, only insert new Ids, or only write new and changed records.")
+    parser.add_argument("--rollups", action="store_true",
+                        help="Create and maintain the vote counts per day, week and month and per VoteTypeId.")
+    # Short WAL replay when the daemon is restarted
+    parser.add_argument("--checkpoint-rows", type=int, default=None, metavar="ROWS",
+                        help="Checkpoint the database after every micro-batch that brings the rows written to this many more.")
+    # Own the database through the writer lease and publish a snapshot for the concurrent readers
+    parser.add_argument("--publish-snapshot", action="store_true",
+                        help="Hold the writer lease and publish a read-only snapshot for run-query of the committed micro-batches.")
+    parser.add_argument("--publish-interval", type=float, default=DAEMON_PUBLISH_INTERVAL, metavar="SECONDS",
+                        help="Publish a snapshot at most once every this many seconds, and when the daemon stops.")
+    # Freshness, batch and stage metrics, rewritten after every micro-batch
+    parser.add_argument("--metrics-file", default=None,
+                        help="Write the metrics after every micro-batch: a Prometheus textfile for *.prom, JSON otherwise.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    """
+    Main entry point of the daemon. Runs until SIGTERM or SIGINT, then commits the ready files.
+    """
+    args = parse_args()
+
+    daemon = IngestDaemon(args.landing_dir, max_batch_bytes=args.batch_size * 1024 * 1024,
+                          max_latency=args.max_latency, poll_interval=args.poll_interval,
+                          metrics_file=args.metrics_file, typed=args.typed,
+                          write_strategy=args.write_strategy, rollups=args.rollups,
+                          checkpoint_rows=args.checkpoint_rows, publish_interval=args.publish_interval,
+                          coordinator=WarehouseCoordinator(DB_FILE) if args.publish_snapshot else None)
+    daemon.run_forever()
@@ -0,0 +1,138 @@
+import gzip
+import logging
+import os
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CompressionType,  # Compression of the input files
+)
+
+# Leading bytes of the compressed formats, checked before the extension
+MAGIC_BYTES = {
+    CompressionType.GZIP: b"\x1f\x8b",
+    CompressionType.ZSTD: b"\x28\xb5\x2f\xfd",
+}
+# Extension read_json relies on to detect each compression
+EXTENSIONS = {
+    CompressionType.NONE: "",
+    CompressionType.GZIP: ".gz",
+    CompressionType.ZSTD: ".zst",
+}
+
+
+def detect_compression(file_path):
+    """
+    Detect the compression of a file from its first bytes, or from its extension when the
+    file is too short to tell.
+
+    Args:
+        file_path (str): The file to inspect.
+
+    Returns:
+        str: A CompressionType.
+    """
+    with open(file_path, "rb") as data:
+        head = data.read(max(len(magic) for magic in MAGIC_BYTES.values()))
+    for compression, magic in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    if len(head) < len(MAGIC_BYTES[CompressionType.ZSTD]):
+        return extension_compression(file_path)
+    return CompressionType.NONE
+
+
+def extension_compression(file_path):
+    """
+    Compression announced by the extension of a file, as read_json detects it.
+
+    Args:
+        file_path (str): The file name.
+
+    Returns:
+        str: A CompressionType.
+    """
+    for compression, extension in EXTENSIONS.items():
+        if extension and file_path.endswith(extension):
+            return compression
+    return CompressionType.NONE
+
+
+def readable_path(file_path, link_path):
+    """
+    Path under which read_json detects the compression of a file. A file whose extension does
+    not match its content is linked as `link_path` with the right extension, so that it can
+    still be decompressed on the fly by the same scan as the other files of the batch.
+
+    Args:
+        file_path (str): The file to read.
+        link_path (str): Path of the link, without extension, used if one is needed.
+
+    Returns:
+        str: `file_path`, or the path of the link.
+    """
+    compression = detect_compression(file_path)
+    if extension_compression(file_path) == compression:
+        return file_path
+    link = link_path + ".jsonl" + EXTENSIONS[compression]
+    os.symlink(os.path.abspath(file_path), link)
+    logging.info(f"Reading {file_path} as {compression} data")
+    return link
+
+
+def open_input(file_path):
+    """
+    Open a file for reading its decompressed content. Concatenated gzip members and zstd
+    frames are read one after the other.
+
+    Args:
+        file_path (str): The file to read.
+
+    Returns:
+        BinaryIO: The decompressed content.
+
+    Raises:
+        ImportError: If the file is zstd compressed and no zstd decompressor is installed.
+    """
+    compression = detect_compression(file_path)
+    if compression == CompressionType.GZIP:
+        return gzip.open(file_path, "rb")
+    if compression == CompressionType.ZSTD:
+        return _open_zstd(file_path)
+    return open(file_path, "rb")
+
+
+def _open_zstd(file_path):
+    """
+    Open a zstd file with the decompressor of the standard library (Python 3.14+), or of the
+    `zstandard` package.
+    """
+    try:
+        from compression import zstd
+        return zstd.open(file_path, "rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(f"Streaming {file_path} needs the zstandard package (pip install zstandard); "
+                          "it can be ingested without --chunk-size instead.")
+    return zstandard.ZstdDecompressor().stream_reader(open(file_path, "rb"), read_across_frames=True)
+
+
+def log_throughput(file_path, compression, disk_bytes, data_bytes, elapsed):
+    """
+    Log the read throughput of one input file, on disk and after decompression.
+
+    Args:
+        file_path (str): The file read.
+        compression (str): Its CompressionType.
+        disk_bytes (int): Bytes read from disk.
+        data_bytes (int | None): Bytes of JSON lines once decompressed, if known.
+        elapsed (float): Seconds spent reading the file.
+    """
+    elapsed = max(elapsed, 1e-9)
+    disk_mb = disk_bytes / 1024 / 1024
+    message = f"Read {file_path} ({compression}): {disk_mb:.1f} MB on disk at {disk_mb / elapsed:.1f} MB/s"
+    if data_bytes is not None and compression != CompressionType.NONE:
+        data_mb = data_bytes / 1024 / 1024
+        message += f", {data_mb:.1f} MB decompressed at {data_mb / elapsed:.1f} MB/s"
+    logging.info(message + f" in {elapsed:.2f} seconds")
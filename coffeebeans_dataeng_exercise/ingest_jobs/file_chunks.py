@@ -0,0 +1,62 @@
+import logging
+
+from coffeebeans_dataeng_exercise.ingest_jobs.compression import open_input
+
+# Size of the chunks read by the streaming ingestion when no size is given
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def iter_line_chunks(file_path, chunk_size, chunk_path):
+    """
+    Split a JSON lines file into chunks of about `chunk_size` bytes, cut on line boundaries.
+    Compressed files are decompressed on the fly: chunks hold the decompressed lines.
+
+    Each chunk is written to `chunk_path`, overwriting the previous one, and the path is yielded
+    once the chunk is complete: the caller must be done with a chunk before asking for the next.
+    At most one chunk, plus the longest line of the file, is held in memory at any time.
+
+    Args:
+        file_path (str): The JSON lines file to split.
+        chunk_size (int): Target size of a chunk in bytes.
+        chunk_path (str): Path of the file receiving the current chunk.
+
+    Yields:
+        tuple[str, int]: `chunk_path`, holding the lines of the next chunk, and the number of the
+        first line of the chunk in the file (1 based).
+    """
+    pending = b""  # Bytes after the last newline seen so far
+    first_line = 1  # Number of the first line of the next chunk
+    with open_input(file_path) as data:
+        while True:
+            block = data.read(chunk_size)
+            if not block:
+                break
+            last_newline = block.rfind(b"\n")
+            if last_newline < 0:
+                # A line longer than the chunk size: keep reading until it ends
+                pending += block
+                continue
+            chunk = pending + block[:last_newline + 1]
+            pending = block[last_newline + 1:]
+            if _write_chunk(chunk, chunk_path):
+                yield chunk_path, first_line
+            first_line += chunk.count(b"\n")
+
+    # The last line of the file may not end with a newline
+    if _write_chunk(pending, chunk_path):
+        yield chunk_path, first_line
+
+
+def _write_chunk(chunk, chunk_path):
+    """
+    Write a chunk to its file, unless it only holds blank lines.
+
+    Returns:
+        bool: Whether the chunk was written.
+    """
+    if not chunk.strip():
+        return False
+    with open(chunk_path, "wb") as chunk_file:
+        chunk_file.write(chunk)
+    logging.info(f"Prepared a chunk of {len(chunk)} bytes")
+    return True
@@ -0,0 +1,270 @@
+import fnmatch
+import logging
+import os
+import signal
+import threading
+import time
+
+from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DAEMON_BATCH_BYTES,  # Default bytes of landed files that trigger a micro-batch
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DAEMON_MAX_LATENCY,  # Default seconds a landed file waits at most before being committed
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DAEMON_POLL_INTERVAL,  # Default seconds between two scans of the landing directory
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DAEMON_PUBLISH_INTERVAL,  # Default seconds at least between two published snapshots
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DB_FILE,  # Default path to the database file
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    INPUT_FILE_PATTERNS,  # Glob patterns used to pick up data files inside a directory
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    OperationType,  # Enumeration of operation types (e.g., INGEST)
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SchemaType,  # Enumeration of schema types (e.g., VOTES)
+)
+
+
+class IngestDaemon:
+    """
+    Long-running ingestion of the files landing in a directory. One IngestVotes job, whose
+    connection and schemas are set up once, stays warm for the life of the daemon.
+
+    The landing directory is scanned every `poll_interval` seconds. A file is ready once its size
+    and modification time did not change between two scans, so that a file still being written is
+    not read half way. Ready files are grouped into a micro-batch, committed once they add up to
+    `max_batch_bytes` or once the oldest of them landed `max_latency` seconds ago. Every micro-batch
+    goes through `IngestVotes.transform` in incremental mode: its votes and its manifest entries
+    are committed in one transaction, and a file that grows again only has its new tail ingested.
+
+    The freshness of a micro-batch, the seconds between the landing of its oldest file and its
+    commit, is exported with the metrics of the job after every commit.
+
+    With a coordinator, the committed micro-batches are published to the readers as a snapshot,
+    a copy of the whole database, at most every `publish_interval` seconds and when the daemon
+    stops, so that the copies do not slow down the ingestion of small and frequent batches.
+    """
+
+    def __init__(self, landing_dir, db_file=DB_FILE, max_batch_bytes=DAEMON_BATCH_BYTES,
+                 max_latency=DAEMON_MAX_LATENCY, poll_interval=DAEMON_POLL_INTERVAL,
+                 patterns=INPUT_FILE_PATTERNS, metrics_file=None, publish_interval=DAEMON_PUBLISH_INTERVAL,
+                 **options):
+        """
+        Initialize the IngestDaemon and its ingestion job.
+
+        Args:
+            landing_dir (str): Directory the vote files land in.
+            db_file (str): Path to the database file. Defaults to DB_FILE from constants.
+            max_batch_bytes (int): Bytes of ready files that trigger a micro-batch. Defaults to DAEMON_BATCH_BYTES.
+            max_latency (float): Seconds the oldest ready file waits at most before its micro-batch
+                is committed. Defaults to DAEMON_MAX_LATENCY.
+            poll_interval (float): Seconds between two scans of the landing directory. Defaults to DAEMON_POLL_INTERVAL.
+            patterns (tuple[str]): Glob patterns of the files picked up. Defaults to INPUT_FILE_PATTERNS.
+            metrics_file (str, optional): File the metrics are written to after every micro-batch: a
+                Prometheus textfile if it ends with ".prom", JSON otherwise. Defaults to None.
+            publish_interval (float): Seconds at least between two snapshots published with a
+                `coordinator`; 0 publishes after every micro-batch. Defaults to DAEMON_PUBLISH_INTERVAL.
+            **options: Options of the IngestVotes job (e.g. typed=True or rollups=True); the job
+                always runs in incremental mode. With a `coordinator`, the daemon owns the writer
+                lease for its whole life and publishes snapshots of the committed micro-batches.
+        """
+        self.landing_dir = landing_dir
+        self.max_batch_bytes = max_batch_bytes
+        self.max_latency = max_latency
+        self.poll_interval = poll_interval
+        self.patterns = patterns
+        self.metrics_file = metrics_file
+        self.publish_interval = publish_interval
+        # The manifest makes restarts resume where the previous daemon stopped
+        options["incremental"] = True
+        self.job = BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], db_file, **options)
+        self.metrics = self.job.metrics
+        self.observed = {}  # Size and modification time of every file at the last scan, keyed by path
+        self.committed = {}  # Size and modification time of every file when it was last committed
+        self.pending = {}  # Size and modification time of the ready files of the next micro-batch
+        self.batches = 0  # Micro-batches committed since the start
+        self.unpublished = 0  # Micro-batches committed since the last published snapshot
+        self.published_at = None  # Time of the last published snapshot
+        self._stopped = threading.Event()
+        self._started = False
+
+    def start(self):
+        """
+        Set up the schemas and tables of the job, once for the life of the daemon.
+        """
+        if not self._started:
+            self.job.setup()
+            self._started = True
+            logging.info(f"Ingestion daemon watching {self.landing_dir}")
+
+    def scan(self):
+        """
+        List the data files of the landing directory.
+
+        Returns:
+            dict: Size and modification time of every file, keyed by path.
+        """
+        files = {}
+        try:
+            entries = list(os.scandir(self.landing_dir))
+        except FileNotFoundError:
+            # The landing directory may be created after the daemon
+            return files
+        for entry in entries:
+            if not any(fnmatch.fnmatch(entry.name, pattern) for pattern in self.patterns):
+                continue
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files[os.path.normpath(entry.path)] = (stat.st_size, stat.st_mtime)
+            except FileNotFoundError:
+                # Removed between the listing and the stat
+                continue
+        return files
+
+    def poll_once(self, now=None):
+        """
+        Scan the landing directory once, queue the files that became ready and commit the
+        micro-batch if it reached its size or latency threshold.
+
+        Args:
+            now (float, optional): Current time, as returned by time.time(). Defaults to None,
+                which reads the clock.
+
+        Returns:
+            list[str]: The files committed by this poll, empty if no micro-batch was due.
+        """
+        self.start()
+        files = self.scan()
+        for file_path, state in files.items():
+            # Unchanged since the previous scan and not committed in this state yet
+            if self.observed.get(file_path) == state and self.committed.get(file_path) != state:
+                self.pending[file_path] = state
+        self.observed = files
+        now = time.time() if now is None else now
+        if self.pending and self.due(now):
+            return self.flush()
+        try:
+            # The last micro-batches once the publish interval elapsed, even if no file lands
+            self.publish(now)
+        except Exception:
+            logging.exception("Snapshot publication failed, retrying at the next poll")
+        return []
+
+    def due(self, now):
+        """
+        Whether the pending files reached the size or the latency threshold of a micro-batch.
+
+        Args:
+            now (float): Current time, as returned by time.time().
+
+        Returns:
+            bool: True if the micro-batch has to be committed.
+        """
+        pending_bytes = sum(size for size, _ in self.pending.values())
+        oldest = min(mtime for _, mtime in self.pending.values())
+        return pending_bytes >= self.max_batch_bytes or now - oldest >= self.max_latency
+
+    def flush(self):
+        """
+        Commit the pending files as one micro-batch, publish a snapshot if one is due and export
+        the metrics. A batch that fails is rolled back and retried at the next poll.
+
+        Returns:
+            list[str]: The committed files, empty if the batch failed.
+        """
+        batch = dict(self.pending)
+        self.pending.clear()
+        file_paths = sorted(batch)
+        try:
+            with self.metrics.stage("transform"):
+                self.job.transform(file_paths)
+            self.unpublished += 1
+            committed_at = time.time()
+            self.publish(committed_at)
+        except Exception:
+            logging.exception(f"Micro-batch of {len(file_paths)} file(s) failed, retrying at the next poll")
+            return []
+        self.committed.update(batch)
+        self.batches += 1
+        # End-to-end latency: from the landing of the oldest file of the batch to its commit
+        freshness = committed_at - min(mtime for _, mtime in batch.values())
+        self.metrics.count("batches", 1)
+        self.metrics.count("files_ingested", len(file_paths))
+        self.metrics.set("freshness_seconds", round(freshness, 6))
+        self.metrics.set("last_commit_timestamp_seconds", round(committed_at, 6))
+        logging.info(f"Committed micro-batch {self.batches} of {len(file_paths)} file(s), "
+                     f"freshness {freshness:.2f} seconds")
+        if self.metrics_file:
+            self.metrics.write(self.metrics_file)
+        return file_paths
+
+    def publish(self, now=None, force=False):
+        """
+        Publish a snapshot of the committed micro-batches for the readers of the coordinator, if
+        any was committed since the last one and the last one is `publish_interval` seconds old.
+
+        Args:
+            now (float, optional): Current time, as returned by time.time(). Defaults to None,
+                which reads the clock.
+            force (bool): Publish regardless of the interval. Defaults to False.
+        """
+        if self.job.coordinator is None or not self.unpublished:
+            return
+        now = time.time() if now is None else now
+        if not force and self.published_at is not None and now - self.published_at < self.publish_interval:
+            return
+        self.job.publish_snapshot()
+        self.published_at = now
+        self.unpublished = 0
+
+    def run_forever(self, max_batches=None):
+        """
+        Poll the landing directory until `stop` is called, or SIGTERM or SIGINT is received when
+        running in the main thread, then commit the ready files and close the connection.
+
+        Args:
+            max_batches (int, optional): Stop after this many micro-batches. Defaults to None.
+        """
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *_: self.stop())
+        try:
+            self.start()
+            while not self._stopped.is_set():
+                self.poll_once()
+                if max_batches is not None and self.batches >= max_batches:
+                    break
+                self._stopped.wait(self.poll_interval)
+            if self.pending:
+                # The ready files are not left for the next daemon
+                self.flush()
+        finally:
+            self.close()
+
+    def stop(self):
+        """
+        Ask `run_forever` to return after the current poll.
+        """
+        self._stopped.set()
+
+    def close(self):
+        """
+        Publish the micro-batches committed since the last snapshot, close the connection of the
+        job and export the metrics of the life of the daemon.
+        """
+        try:
+            self.publish(force=True)
+        finally:
+            self.job.close_connection()
+        self.metrics.log_summary()
+        if self.metrics_file:
+            self.metrics.write(self.metrics_file)
+        logging.info("Ingestion daemon stopped")
@@ -1,17 +1,117 @@
 import logging
+import os
+import tempfile
+import time
 from datetime import datetime
 
+import duckdb
+
 from coffeebeans_dataeng_exercise.batch.batch_job import BatchJob
 from coffeebeans_dataeng_exercise.constants.constants import (
     DB_FILE,  # Default path to the database file
 )
 from coffeebeans_dataeng_exercise.constants.constants import (
-    INSERT_INTO_VOTES_TABLE_PATH,  # Path to the SQL file for inserting data into the votes table
+    APPLY_ROLLUP_DELTA_PATH,  # Path to the SQL file for updating a rollup table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    APPLY_WEEKLY_COUNTS_DELTA_PATH,  # Path to the SQL file for updating the weekly vote counts
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CHECKPOINT_PATH,  # Path to the SQL file checkpointing the database
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    COUNT_INVALID_VOTES_PATH,  # Path to the SQL file counting the records of files that cannot be written
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    COUNT_ROWS_PATH,  # Path to the SQL file counting the rows of a table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_STAGING_TABLE_PATH,  # Path to the SQL file for creating the staging table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DROP_TABLE_PATH,  # Path to the SQL file for dropping a table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    INSERT_REJECT_PATH,  # Path to the SQL file for inserting a rejected record
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    INSERT_VOTES_PATH,  # Path to the SQL file for appending the staged records
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    JSON_FORMAT,  # Layout of the input files
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    JSON_TIMESTAMP_FORMAT,  # Format of the timestamps of the input files
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    PARQUET_ROOT,  # Default root directory of the Parquet votes storage
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    PRUNE_OLDER_STAGED_VOTES_PATH,  # Path to the SQL file dropping the staged records older than the stored ones
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    RECORD_BATCH_SIZE,  # Default records of an iterable of dicts staged together
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    RECORDS_VIEW,  # Name of the view exposing the in-memory records
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    REBUILD_ROLLUP_PATH,  # Path to the SQL file for recomputing a rollup table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    REMOVE_EXISTING_STAGED_VOTES_PATH,  # Path to the SQL file dropping the staged records already stored
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    REMOVE_UNCHANGED_STAGED_VOTES_PATH,  # Path to the SQL file dropping the staged records that did not change
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    ROLLUP_DELTA_TABLE,  # Name of the temporary table holding the daily changes to the rollups
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    STAGE_RECORDS_PATH,  # Path to the SQL file for staging the records of an in-memory relation
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    STAGE_ROLLUP_DELTA_PATH,  # Path to the SQL file counting the daily changes of the batch
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    STAGE_VOTES_PATH,  # Path to the SQL file for staging the records of JSON files
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    STAGING_TABLE,  # Name of the temporary staging table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    TEMP_SCHEMA,  # Catalog of the temporary tables
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    UPSERT_VOTES_PATH,  # Path to the SQL file for upserting the staged records
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    RollupGrain,  # Enumeration of the rollup periods
 )
 from coffeebeans_dataeng_exercise.constants.constants import (
     SchemaType,  # Enumeration of schema types
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    StorageType,  # Enumeration of storage backends
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    WriteStrategy,  # Enumeration of the ways staged records are written
+)
+from coffeebeans_dataeng_exercise.db.data_version import DataVersion
+from coffeebeans_dataeng_exercise.db.parquet_storage import ParquetVotesStorage
+from coffeebeans_dataeng_exercise.db.rollups_schema_manager import ROLLUP_GRAINS
+from coffeebeans_dataeng_exercise.db.schema_factory import SchemaFactory
 from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+from coffeebeans_dataeng_exercise.ingest_jobs.compression import (
+    detect_compression,
+    log_throughput,
+    readable_path,
+)
+from coffeebeans_dataeng_exercise.ingest_jobs.file_chunks import DEFAULT_CHUNK_SIZE, iter_line_chunks
+from coffeebeans_dataeng_exercise.ingest_jobs.ingest_manifest import IngestManifest
+from coffeebeans_dataeng_exercise.ingest_jobs.input_files import resolve_input_files
+from coffeebeans_dataeng_exercise.ingest_jobs.record_source import RecordSource
+from coffeebeans_dataeng_exercise.ingest_jobs.record_validation import split_valid_lines
 
 
 # Factory Method Pattern: Concrete implementation of the ingestion process
@@ -21,40 +121,556 @@ class IngestVotes(BatchJob):
     Inherits from BatchJob and implements the transformation process.
     """
 
-    def __init__(self, db_file=DB_FILE, schemas=[SchemaType.VOTES]):
+    def __init__(self, db_file=DB_FILE, schemas=[SchemaType.VOTES], incremental=False, typed=False,
+                 storage=StorageType.DUCKDB, parquet_root=PARQUET_ROOT, chunk_size=None,
+                 memory_limit=None, temp_directory=None, pool=None, write_strategy=WriteStrategy.UPSERT,
+                 tolerant=False, metrics_file=None, profile=False, rollups=False, coordinator=None,
+                 checkpoint_rows=None):
         """
         Initialize the IngestVotes job with database file and schema type.
 
         Args:
             db_file (str): Path to the database file. Defaults to DB_FILE from constants.
             schemas (list): List of schema types. Defaults to [SchemaType.VOTES].
+            incremental (bool): Only ingest the files, or the tails of growing files, that are not
+                recorded in the ingestion manifest yet. Defaults to False.
+            typed (bool): Store the votes with integer, decimal and timestamp columns, migrating an
+                existing string typed table. Defaults to False.
+            storage (StorageType): Where the votes are written: the DuckDB votes table, or Hive
+                partitioned Parquet files by year and week. Defaults to StorageType.DUCKDB.
+            parquet_root (str): Root directory of the Parquet storage. Defaults to PARQUET_ROOT.
+            chunk_size (int, optional): Stream the files in chunks of about this many bytes, cut on
+                line boundaries, each chunk being deduplicated and upserted in its own transaction.
+                Defaults to None, which loads the whole batch at once.
+            memory_limit (str, optional): DuckDB memory ceiling of the job (e.g. "1GB"); operators
+                spill to disk beyond it. Defaults to None, which keeps the DuckDB default.
+            temp_directory (str, optional): Directory DuckDB spills to. Defaults to None, which keeps
+                the DuckDB default.
+            pool (ConnectionPool, optional): Pool to borrow the connection from. Defaults to None,
+                which opens a connection for the job.
+            write_strategy (WriteStrategy): How the staged records are written: upsert every record,
+                only insert the records whose Id is new (replays cost a scan), or only write the new
+                and changed records. Defaults to WriteStrategy.UPSERT.
+            tolerant (bool): Set malformed records aside in the rejects table instead of failing
+                the batch. The files are then streamed in chunks (of DEFAULT_CHUNK_SIZE bytes unless
+                `chunk_size` is given), each committed on its own. Defaults to False.
+            metrics_file (str, optional): File the metrics of the run are written to (JSON, or a
+                Prometheus textfile for a ".prom" file). Defaults to None.
+            profile (bool): Record the DuckDB profile of every query in the metrics. Defaults to False.
+            rollups (bool): Create the rollup tables, the vote counts per day, week and month and
+                per VoteTypeId, built from the votes table on the first run. Once they exist, every
+                ingestion keeps them up to date. Only available with the DuckDB storage. Defaults to False.
+            coordinator (WarehouseCoordinator, optional): Take the writer lease of the database and
+                publish a snapshot for the readers after the run. Defaults to None.
+            checkpoint_rows (int, optional): Checkpoint the database once this many rows were written
+                since the last checkpoint, after the transaction that reached them commits, so that
+                the WAL replayed by the next open stays short. Defaults to None, which leaves the
+                checkpoints to DuckDB (when the WAL reaches its checkpoint_threshold).
+
+        Raises:
+            ValueError: If the rollups are requested with the Parquet storage.
         """
-        super().__init__(db_file, schemas)  # Initialize the parent BatchJob with the database file and schemas
+        if rollups and storage != StorageType.DUCKDB:
+            raise ValueError("The rollups are only maintained with the DuckDB storage")
+        if incremental and SchemaType.MANIFEST not in schemas:
+            # The manifest table is needed to know what was already ingested
+            schemas = schemas + [SchemaType.MANIFEST]
+        if storage == StorageType.PARQUET and SchemaType.PARTITIONS not in schemas:
+            # The Parquet storage keeps the row count of each partition
+            schemas = schemas + [SchemaType.PARTITIONS]
+        if tolerant and SchemaType.REJECTS not in schemas:
+            # The rejected records are kept with their file and line
+            schemas = schemas + [SchemaType.REJECTS]
+        if rollups and SchemaType.ROLLUPS not in schemas:
+            # The rollup tables are created after the votes table, whose columns they copy
+            schemas = schemas + [SchemaType.ROLLUPS]
+        super().__init__(db_file, schemas, pool, metrics_file, profile, coordinator)  # Initialize the parent BatchJob with the database file and schemas
+        self.incremental = incremental
+        self.storage = storage
+        self.parquet_root = parquet_root
+        # A corrupt record only costs the chunk it is in to be checked line by line
+        self.chunk_size = chunk_size or (DEFAULT_CHUNK_SIZE if tolerant else None)
+        self.tolerant = tolerant
+        self.write_strategy = write_strategy
+        self.checkpoint_rows = checkpoint_rows
+        self.checkpointed_rows = 0  # Rows written by the job up to its last checkpoint
+        self.db_connection.configure(memory_limit=memory_limit, temp_directory=temp_directory)
+        if typed:
+            self.schema_options[SchemaType.VOTES] = {"typed": True}
 
     def transform(self, file_path):
         """
         Transform the data by inserting it into the votes table.
 
+        All files of the batch are scanned in parallel by a single `read_json` call, deduplicated
+        once across the whole batch and committed with one upsert. Gzip and zstd files, detected
+        from their extension or their first bytes, are decompressed on the fly by the scan.
+
         Args:
-            file_path (str): Path to the file containing the data to be ingested.
+            file_path (str | list | RecordSource): File, directory, glob pattern or list of those to
+                be ingested, or votes held in memory (see `run_records`).
         """
         start_time = datetime.now()  # Record the start time of the data ingestion process
-        logging.info(f"Started data ingestion for file: {file_path}")
+        rollups = self.schema_managers.get(SchemaType.ROLLUPS)
+        if rollups is not None and rollups.created:
+            # One full scan of the votes; the batches maintain the rollups incrementally afterwards
+            self.rebuild_rollups(rollups)
+        if isinstance(file_path, RecordSource):
+            self.insert_records(file_path)
+            logging.info(f"Completed in-memory ingestion in {(datetime.now() - start_time).total_seconds():.2f} seconds")
+            return
+        # Expand directories and glob patterns into the list of files of this batch
+        file_paths = resolve_input_files(file_path)
+        if not file_paths:
+            logging.warning(f"No data files to ingest for: {file_path}")
+            return
+        logging.info(f"Started data ingestion for {len(file_paths)} file(s): {file_path}")
+
+        # Working directory for the tails of growing files, removed once the batch is committed
+        with tempfile.TemporaryDirectory() as work_dir:
+            manifest_entries = []
+            read_paths = file_paths
+            if self.incremental:
+                # Only keep the files, or parts of files, that were not ingested yet
+                manifest = IngestManifest(self.db_connection,
+                                          self.schema_managers[SchemaType.MANIFEST].schema,
+                                          self.schema_managers[SchemaType.MANIFEST].table)
+                manifest_entries = manifest.plan(file_paths, work_dir)
+                read_paths = [entry.read_path for entry in manifest_entries if entry.read_path]
+
+            if self.chunk_size:
+                # Every chunk is committed on its own; the manifest is only recorded once all the
+                # chunks are loaded, so an interrupted load is retried in full (upserts are idempotent)
+                # Rejected records are reported under the name of the file, not of its copied tail
+                source_names = {entry.read_path: entry.file_path for entry in manifest_entries}
+                self.stream_files(read_paths, work_dir, source_names)
+                if manifest_entries:
+                    with self.db_connection.transaction():
+                        manifest.record(manifest_entries)
+                    self.checkpoint_if_due()
+            else:
+                # The votes and the manifest are committed together, so a failed load is retried in full
+                with self.db_connection.transaction():
+                    if read_paths:
+                        self.insert_files(read_paths, work_dir)
+                    if manifest_entries:
+                        manifest.record(manifest_entries)
+                self.checkpoint_if_due()
+
+        end_time = datetime.now()  # Record the end time of the data ingestion process
+        # Calculate the total time taken
+        total_time = (end_time - start_time).total_seconds()
+        logging.info(
+            f"Completed data ingestion for {len(file_paths)} file(s): {file_path} in {total_time:.2f} seconds")  # Log the completion time
+
+    def run_records(self, records, batch_size=RECORD_BATCH_SIZE):
+        """
+        Runs the job on votes a producer already holds in memory, instead of files: they go
+        through the same deduplication, write strategy and upsert as the records of files,
+        without being encoded to JSON and written to disk first.
+
+        - A PyArrow table, record batch or record batch reader, or a pandas or polars DataFrame,
+          is registered with DuckDB, which scans it in place, and committed in one transaction.
+        - An iterable of dicts keyed by column name, e.g. a generator reading a stream, is
+          staged `batch_size` records at a time, each batch bound as one list of values per
+          column and committed on its own; a record only replaces a stored record with the
+          same Id if it is not older, as when files are streamed in chunks.
+
+        The values are cast to the types of the votes table, e.g. ISO 8601 strings to timestamps.
+
+        Args:
+            records (object): The votes.
+            batch_size (int): Records of an iterable of dicts per batch. Defaults to RECORD_BATCH_SIZE.
+        """
+        self.run(RecordSource(records, batch_size))
+
+    def insert_records(self, source):
+        """
+        Deduplicate the votes of an in-memory source and upsert them into the votes table.
+
+        Args:
+            source (RecordSource): The votes.
+        """
+        if source.is_relation():
+            self.db_connection.register(RECORDS_VIEW, source.relation())
+            try:
+                with self.db_connection.transaction():
+                    self.metrics.count("rows_staged", self.stage_records(RECORDS_VIEW))
+                    self.upsert_staged()
+            finally:
+                self.db_connection.unregister(RECORDS_VIEW)
+            self.checkpoint_if_due()
+            return
+
+        columns = [name for name, _ in self.schema_managers[SchemaType.VOTES].column_types()]
+        # One list per column, unnested side by side into the rows of the batch
+        unnest_source = "(SELECT " + ", ".join(f'UNNEST(?) AS "{name}"' for name in columns) + ")"
+        batch_count = 0
+        for values in source.column_batches(columns):
+            with self.db_connection.transaction():
+                self.metrics.count("rows_staged", self.stage_records(unnest_source, values))
+                self.prune_staged()
+                self.upsert_staged()
+            self.checkpoint_if_due()
+            batch_count += 1
+        logging.info(f"Ingested {batch_count} batch(es) of in-memory records")
+
+    def stage_records(self, source, params=None):
+        """
+        Load the deduplicated records of an in-memory relation into the temporary staging table.
+
+        Args:
+            source (str): The relation: a registered view, or a subquery.
+            params (list, optional): Parameters of the subquery. Defaults to None.
+
+        Returns:
+            int: The number of records staged.
+        """
+        self.create_staging_table()
+        column_types = self.schema_managers[SchemaType.VOTES].column_types()
+        stage_records_query = Reader.format(
+            STAGE_RECORDS_PATH, staging_table=STAGING_TABLE, source=source,
+            column_names=", ".join(f'"{name}"' for name, _ in column_types),
+            cast_columns=", ".join(f'CAST("{name}" AS {data_type}) AS "{name}"' for name, data_type in column_types))
+        with self.db_connection.stage("read"):
+            return self.db_connection.execute(stage_records_query, params).fetchone()[0]
+
+    def insert_files(self, file_paths, work_dir):
+        """
+        Deduplicate the records of the given files and upsert them into the votes table.
+
+        Args:
+            file_paths (list[str]): The files to read.
+            work_dir (str): Directory where compressed files without a matching extension are linked.
+        """
+        read_paths = [readable_path(path, os.path.join(work_dir, f"input_{index}"))
+                      for index, path in enumerate(file_paths)]
+        scan_start = time.perf_counter()
+        self.metrics.count("rows_staged", self.stage_files(read_paths))
+        elapsed = time.perf_counter() - scan_start
+        self.metrics.count("bytes_read", sum(os.path.getsize(path) for path in file_paths))
+        # The files are scanned together: each one is reported with the throughput of the scan
+        for file_path in file_paths:
+            log_throughput(file_path, detect_compression(file_path), os.path.getsize(file_path), None, elapsed)
+        self.upsert_staged()
+
+    def stream_files(self, file_paths, work_dir, source_names=None):
+        """
+        Ingest the given files chunk by chunk, so that the memory used does not depend on the
+        size of the files. Records are deduplicated within a chunk, and a staged record only
+        replaces a stored record with the same Id if it is not older, so that the latest record
+        wins across chunks as it does within a batch.
+
+        In tolerant mode, a chunk that cannot be loaded is checked line by line: its malformed
+        records are written to the rejects table and its valid records are still ingested.
+
+        Args:
+            file_paths (list[str]): The files to read.
+            work_dir (str): Directory where the current chunk is written.
+            source_names (dict[str, str], optional): Name under which the rejects of a file are
+                recorded, keyed by the path read. Defaults to None, the path read.
+        """
+        chunk_path = os.path.join(work_dir, "chunk.jsonl")
+        for file_path in file_paths:
+            chunk_count = 0
+            data_bytes = 0
+            read_time = 0.0
+            read_start = time.perf_counter()
+            for chunk, first_line in iter_line_chunks(file_path, self.chunk_size, chunk_path):
+                # Only the time spent reading and decompressing counts towards the read throughput
+                read_time += time.perf_counter() - read_start
+                data_bytes += os.path.getsize(chunk)
+                if self.tolerant:
+                    # A failed load aborts the current transaction: the chunk is staged before it
+                    rejects = self.stage_chunk_tolerant(chunk, first_line)
+                with self.db_connection.transaction():
+                    if self.tolerant:
+                        self.record_rejects((source_names or {}).get(file_path, file_path), rejects)
+                    else:
+                        self.metrics.count("rows_staged", self.stage_files([chunk]))
+                    self.prune_staged()
+                    self.upsert_staged()
+                self.checkpoint_if_due()
+                chunk_count += 1
+                read_start = time.perf_counter()
+            read_time += time.perf_counter() - read_start
+            logging.info(f"Streamed {chunk_count} chunk(s) of {file_path}")
+            self.metrics.count("bytes_read", os.path.getsize(file_path))
+            log_throughput(file_path, detect_compression(file_path), os.path.getsize(file_path), data_bytes, read_time)
+
+    def checkpoint_if_due(self):
+        """
+        Checkpoint the database if `checkpoint_rows` rows were written since the last checkpoint:
+        the committed changes are moved from the WAL into the database file. Called between
+        transactions; while other connections of a pool have a write transaction open, DuckDB
+        refuses the checkpoint, which is retried after the next commit.
+
+        Returns:
+            bool: True if the database was checkpointed.
+        """
+        rows_written = self.metrics.counters.get("rows_written", 0)
+        if not self.checkpoint_rows or rows_written - self.checkpointed_rows < self.checkpoint_rows:
+            return False
+        try:
+            with self.db_connection.stage("checkpoint"):
+                self.db_connection.execute(Reader.read(CHECKPOINT_PATH))
+        except duckdb.TransactionException as e:
+            logging.warning(f"Checkpoint deferred: {e}")
+            return False
+        self.checkpointed_rows = rows_written
+        self.metrics.count("checkpoints", 1)
+        return True
+
+    def stage_files(self, file_paths):
+        """
+        Load the deduplicated records of the given files into the temporary staging table.
+
+        Args:
+            file_paths (list[str]): The files to read.
+
+        Returns:
+            int: The number of records staged.
+        """
+        self.create_staging_table()
+
+        # Read the SQL query for staging the records and format it with the staging table and the
+        # explicit JSON schema, so that the files are parsed in one typed pass without sampling
+        stage_votes_query = Reader.format(
+            STAGE_VOTES_PATH, staging_table=STAGING_TABLE,
+            columns=self.schema_managers[SchemaType.VOTES].read_json_columns(),
+            json_format=JSON_FORMAT, timestamp_format=JSON_TIMESTAMP_FORMAT)
+        # Execute the SQL query with the list of files bound as parameter, so the paths never need quoting
+        with self.db_connection.stage("read"):
+            return self.db_connection.execute(stage_votes_query, [file_paths]).fetchone()[0]
+
+    def count_invalid_votes(self, file_paths):
+        """
+        Count the records of the given files that cannot be written to the votes table: without
+        an Id, or with a CreationDate that is not a timestamp. The values are checked as read,
+        before they are cast to the types of the staging table.
+
+        Args:
+            file_paths (list[str]): The files to check.
 
-        # Read the SQL query for inserting data into the votes table and format it with schema, table, and file path
-        insert_into_votes_table_query = Reader.read(INSERT_INTO_VOTES_TABLE_PATH).format(
+        Returns:
+            int: The number of invalid records.
+        """
+        count_invalid_query = Reader.format(
+            COUNT_INVALID_VOTES_PATH, json_format=JSON_FORMAT, timestamp_format=JSON_TIMESTAMP_FORMAT)
+        with self.db_connection.stage("read"):
+            return self.db_connection.execute(count_invalid_query, [file_paths]).fetchone()[0]
+
+    def stage_chunk_tolerant(self, chunk_path, first_line):
+        """
+        Stage the records of a chunk, setting its malformed lines aside if it cannot be loaded
+        as a whole.
+
+        Args:
+            chunk_path (str): The chunk to read.
+            first_line (int): Number of the first line of the chunk in its file.
+
+        Returns:
+            list[tuple[int, str, str]]: The (line number, reason, line) of every rejected line.
+        """
+        try:
+            if self.count_invalid_votes([chunk_path]) == 0:
+                self.metrics.count("rows_staged", self.stage_files([chunk_path]))
+                return []
+            logging.warning(f"Chunk starting at line {first_line} has invalid records: checking its lines")
+        except duckdb.Error as error:
+            logging.warning(f"Chunk starting at line {first_line} could not be loaded ({error}): checking its lines")
+
+        valid_path = chunk_path + ".valid"
+        rejects = split_valid_lines(chunk_path, valid_path, first_line,
+                                    self.schema_managers[SchemaType.VOTES].column_types())
+        # The remaining lines are expected to load: any other error still fails the batch
+        self.metrics.count("rows_staged", self.stage_files([valid_path]))
+        logging.warning(f"Rejected {len(rejects)} line(s) of the chunk starting at line {first_line}")
+        return rejects
+
+    def record_rejects(self, file_path, rejects):
+        """
+        Write the rejected lines of a file to the rejects table.
+
+        Args:
+            file_path (str): The file holding the lines.
+            rejects (list[tuple[int, str, str]]): The (line number, reason, line) of every rejected line.
+        """
+        if not rejects:
+            return
+        self.metrics.count("rows_rejected", len(rejects))
+        rejects_table = self.schema_managers[SchemaType.REJECTS]
+        insert_reject_query = Reader.format(INSERT_REJECT_PATH, schema=rejects_table.schema, table=rejects_table.table)
+        self.db_connection.executemany(insert_reject_query, [
+            [file_path, line_number, reason, line] for line_number, reason, line in rejects])
+
+    def create_staging_table(self):
+        """
+        Create the empty temporary staging table, with the columns and types of the votes table.
+        """
+        create_staging_table_query = Reader.format(
+            CREATE_STAGING_TABLE_PATH,
             # Schema name for the votes table
             schema=self.schema_managers[SchemaType.VOTES].schema,
             # Table name for votes
             table=self.schema_managers[SchemaType.VOTES].table,
-            file_path=file_path  # Path to the data file
+            staging_table=STAGING_TABLE  # Name of the temporary staging table
         )
+        self.db_connection.execute(create_staging_table_query)
 
-        # Execute the SQL query to insert data into the votes table
-        self.db_connection.execute(insert_into_votes_table_query)
+    def prune_staged(self):
+        """
+        Drop the staged records that are older than the stored record with the same Id.
+        """
+        schema, table = self.stored_votes()
+        prune_older_staged_votes_query = Reader.format(
+            PRUNE_OLDER_STAGED_VOTES_PATH, schema=schema, table=table, staging_table=STAGING_TABLE)
+        with self.db_connection.stage("dedup"):
+            self.db_connection.execute(prune_older_staged_votes_query)
 
-        end_time = datetime.now()  # Record the end time of the data ingestion process
-        # Calculate the total time taken
-        total_time = (end_time - start_time).total_seconds()
-        logging.info(
-            f"Completed data ingestion for file: {file_path} in {total_time:.2f} seconds")  # Log the completion time
+    def filter_staged(self):
+        """
+        Drop the staged records that the write strategy does not write: the records whose Id is
+        already stored (insert-new-only), or the records identical to the stored ones
+        (merge-changed-only). The upsert strategy keeps every record.
+        """
+        filter_paths = {WriteStrategy.INSERT_NEW_ONLY: REMOVE_EXISTING_STAGED_VOTES_PATH,
+                        WriteStrategy.MERGE_CHANGED_ONLY: REMOVE_UNCHANGED_STAGED_VOTES_PATH}
+        if self.write_strategy == WriteStrategy.UPSERT:
+            return
+        if self.write_strategy not in filter_paths:
+            raise ValueError(f"Unknown write strategy: {self.write_strategy}")
+        schema, table = self.stored_votes()
+        filter_staged_votes_query = Reader.format(
+            filter_paths[self.write_strategy], schema=schema, table=table, staging_table=STAGING_TABLE)
+        with self.db_connection.stage("dedup"):
+            self.db_connection.execute(filter_staged_votes_query)
+
+    def stored_votes(self):
+        """
+        The relation holding the stored votes, which the staged records are compared with: the
+        votes table, or the view over the Parquet storage.
+
+        Returns:
+            tuple[str, str]: The schema and name of the relation.
+        """
+        votes = self.schema_managers[SchemaType.VOTES]
+        if self.storage == StorageType.PARQUET:
+            storage = self.parquet_storage()
+            storage.create_view()
+            return votes.schema, storage.view
+        return votes.schema, votes.table
+
+    def upsert_staged(self):
+        """
+        Upsert the staged records into the votes table, keeping the weekly vote counts
+        aggregate and the rollups up to date when they exist, and drop the staging table.
+        With the Parquet storage, the staged records are merged into their Parquet partitions
+        instead. Only the records kept by the write strategy are written, and the data version
+        is bumped.
+        """
+        votes = self.schema_managers[SchemaType.VOTES]
+        self.filter_staged()
+        with self.db_connection.stage("upsert"):
+            self.write_staged(votes)
+            # Committed with the records, so that the cached query results computed before are dropped
+            DataVersion(self.db_connection).bump()
+        self.drop_staging_table()
+
+    def write_staged(self, votes):
+        """
+        Write the staged records to the storage of the votes.
+
+        Args:
+            votes (SchemaManager): Manager of the votes table.
+        """
+        # The aggregate only exists once outliers were calculated in materialized mode
+        weekly_counts = SchemaFactory.schema(SchemaType.WEEKLY_COUNTS, self.db_connection)
+        if weekly_counts.table_exists():
+            # Only the weeks touched by the batch are updated, before the replaced rows are
+            # overwritten; with the Parquet storage, they are read from the view over the files
+            source_schema, source_table = self.stored_votes()
+            apply_weekly_counts_delta_query = Reader.format(
+                APPLY_WEEKLY_COUNTS_DELTA_PATH, source_schema=source_schema, source_table=source_table,
+                sink_schema=weekly_counts.schema, sink_table=weekly_counts.table,
+                staging_table=STAGING_TABLE)
+            self.db_connection.execute(apply_weekly_counts_delta_query)
+
+        if self.storage == StorageType.PARQUET:
+            count_staged_query = Reader.format(COUNT_ROWS_PATH, schema=TEMP_SCHEMA, table=STAGING_TABLE)
+            self.metrics.count("rows_written", self.db_connection.execute(count_staged_query).fetchone()[0])
+            self.parquet_storage().write_staged(STAGING_TABLE)
+            return
+
+        # The rollups only exist once an ingestion created them
+        rollups = SchemaFactory.schema(SchemaType.ROLLUPS, self.db_connection)
+        if rollups.tables_exist():
+            self.apply_rollup_deltas(votes, rollups)
+
+        # Read the SQL query for writing the staged records and format it with schema and table;
+        # with insert-new-only, every staged record is new and is appended without conflict handling
+        upsert_votes_query = Reader.format(
+            INSERT_VOTES_PATH if self.write_strategy == WriteStrategy.INSERT_NEW_ONLY else UPSERT_VOTES_PATH,
+            schema=votes.schema, table=votes.table, staging_table=STAGING_TABLE)
+        self.metrics.count("rows_written", self.db_connection.execute(upsert_votes_query).fetchone()[0])
+
+    def apply_rollup_deltas(self, votes, rollups):
+        """
+        Update the rollup tables with the staged records, before the records they replace are
+        overwritten. The changes are counted once per day and vote type, then rolled up to the
+        grain of each table, so that only the periods touched by the batch are rewritten.
+
+        Args:
+            votes (SchemaManager): Manager of the votes table.
+            rollups (RollupsSchemaManager): Manager of the rollup tables.
+        """
+        stage_rollup_delta_query = Reader.format(
+            STAGE_ROLLUP_DELTA_PATH, delta_table=ROLLUP_DELTA_TABLE, staging_table=STAGING_TABLE,
+            source_schema=votes.schema, source_table=votes.table)
+        self.db_connection.execute(stage_rollup_delta_query)
+        for grain in ROLLUP_GRAINS:
+            apply_rollup_delta_query = Reader.format(
+                APPLY_ROLLUP_DELTA_PATH, grain=grain, delta_table=ROLLUP_DELTA_TABLE,
+                sink_schema=rollups.schema, sink_table=rollups.tables[grain])
+            self.db_connection.execute(apply_rollup_delta_query)
+        self.db_connection.execute(Reader.format(DROP_TABLE_PATH, schema=TEMP_SCHEMA, table=ROLLUP_DELTA_TABLE))
+
+    def rebuild_rollups(self, rollups):
+        """
+        Recompute the rollup tables: the daily rollup from the votes table, and every coarser
+        rollup from the daily one.
+
+        Args:
+            rollups (RollupsSchemaManager): Manager of the rollup tables.
+        """
+        votes = self.schema_managers[SchemaType.VOTES]
+        source_schema, source_table = votes.schema, votes.table
+        date_column, count_expression = "CreationDate", "COUNT(*)"
+        with self.db_connection.stage("rollup_refresh"), self.db_connection.transaction():
+            for grain in ROLLUP_GRAINS:
+                rebuild_rollup_query = Reader.format(
+                    REBUILD_ROLLUP_PATH, grain=grain, date_column=date_column, count_expression=count_expression,
+                    source_schema=source_schema, source_table=source_table,
+                    sink_schema=rollups.schema, sink_table=rollups.tables[grain])
+                self.db_connection.execute(rebuild_rollup_query)
+                # Weeks straddle months: the coarser grains all sum the counts of the daily rollup
+                source_schema, source_table = rollups.schema, rollups.tables[RollupGrain.DAY]
+                date_column, count_expression = "period", "SUM(vote_count)"
+        logging.info(f"Rebuilt the rollups: {', '.join(rollups.tables.values())}")
+
+    def parquet_storage(self):
+        """
+        Build the Parquet storage of the votes.
+
+        Returns:
+            ParquetVotesStorage: The storage under `parquet_root`.
+        """
+        return ParquetVotesStorage(self.db_connection, self.schema_managers[SchemaType.VOTES],
+                                   self.schema_managers[SchemaType.PARTITIONS], self.parquet_root)
+
+    def drop_staging_table(self):
+        """
+        Drop the staging table to free the memory held by the staged batch.
+        """
+        drop_staging_table_query = Reader.format(DROP_TABLE_PATH, schema=TEMP_SCHEMA, table=STAGING_TABLE)
+        self.db_connection.execute(drop_staging_table_query)
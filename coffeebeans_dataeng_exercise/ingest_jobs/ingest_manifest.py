@@ -0,0 +1,272 @@
+import hashlib
+import json
+import logging
+import os
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CompressionType,  # Compression of the input files
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_MANIFEST_ENTRIES_PATH,  # Path to the SQL file for reading manifest entries
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_MANIFEST_HASHES_PATH,  # Path to the SQL file for reading known content hashes
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    UPSERT_MANIFEST_ENTRY_PATH,  # Path to the SQL file for writing a manifest entry
+)
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+from coffeebeans_dataeng_exercise.ingest_jobs.compression import EXTENSIONS, detect_compression
+
+# Size of the blocks read while hashing files
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+class ManifestEntry:
+    """
+    State of one input file: what the manifest will record for it and what has to be read.
+    """
+
+    def __init__(self, file_path, file_size, file_mtime, content_hash, high_water_mark,
+                 read_offset=None):
+        """
+        Initialize the ManifestEntry.
+
+        Args:
+            file_path (str): Absolute path of the file.
+            file_size (int): Size of the file in bytes.
+            file_mtime (float): Modification time of the file.
+            content_hash (str): SHA-256 of the content up to the high-water mark.
+            high_water_mark (int): Byte offset just after the last complete line of the file, or the
+                size of a compressed file. The bytes after it are left for the next run.
+            read_offset (int, optional): Byte offset from which the file has to be ingested,
+                or None if nothing has to be read. Defaults to None.
+        """
+        self.file_path = file_path
+        self.file_size = file_size
+        self.file_mtime = file_mtime
+        self.content_hash = content_hash
+        self.high_water_mark = high_water_mark
+        self.read_offset = read_offset
+        self.compression = CompressionType.NONE  # Compression of the file, set once it is scanned
+        self.read_path = None  # Path handed to read_json, set once the entry is prepared
+
+
+class IngestManifest:
+    """
+    Decides which input files, or which tail of a growing file, still have to be ingested,
+    using the manifest table that records the state of every file already loaded.
+    """
+
+    def __init__(self, db_connection, schema, table):
+        """
+        Initialize the IngestManifest with database connection, schema, and table.
+
+        Args:
+            db_connection (DatabaseConnection): The connection to the database.
+            schema (str): The schema of the manifest table.
+            table (str): The name of the manifest table.
+        """
+        self.db_connection = db_connection
+        self.schema = schema
+        self.table = table
+
+    def plan(self, file_paths, work_dir):
+        """
+        Compare the files of a batch with the manifest and prepare what has to be read.
+
+        - A file whose size and modification time did not change is skipped without reading it.
+        - A file that only grew since it was ingested (the hash of the already ingested prefix
+          still matches) is read from its high-water mark: the new tail is copied to `work_dir`.
+          A compressed file grows by whole gzip members or zstd frames, so its tail is a valid
+          compressed file on its own.
+        - Only the complete lines, up to the high-water mark, are read: the last line of a file
+          still being written is left for the next run, instead of failing the batch.
+        - A new file with the same content as a file already ingested is skipped.
+        - Any other file is read completely.
+
+        Args:
+            file_paths (list[str]): The files of the batch.
+            work_dir (str): Directory where the tails of growing files are written.
+
+        Returns:
+            list[ManifestEntry]: One entry per file that changed; `read_path` is set for the
+            entries that have to be ingested.
+        """
+        file_paths = [os.path.abspath(path) for path in file_paths]
+        known = self._known_entries(file_paths)
+
+        entries = []
+        for file_path in file_paths:
+            entry = self._scan(file_path, known.get(file_path))
+            if entry is not None:
+                entries.append(entry)
+
+        # Files read from the start whose whole content was already ingested under another name
+        new_files = [entry for entry in entries
+                     if entry.read_offset == 0 and entry.high_water_mark == entry.file_size]
+        known_hashes = self._known_hashes([entry.content_hash for entry in new_files])
+        for entry in new_files:
+            if known_hashes.get(entry.content_hash) == entry.high_water_mark:
+                logging.info(f"Skipping already ingested content: {entry.file_path}")
+                entry.read_offset = None
+
+        for index, entry in enumerate(entries):
+            if entry.read_offset == 0 and entry.high_water_mark == entry.file_size:
+                entry.read_path = entry.file_path
+            elif entry.read_offset is not None:
+                entry.read_path = self._copy_tail(
+                    entry, os.path.join(work_dir, f"tail_{index}.jsonl{EXTENSIONS[entry.compression]}"))
+
+        logging.info(f"Manifest: {len(file_paths)} file(s) in batch, "
+                     f"{sum(entry.read_path is not None for entry in entries)} to read")
+        return entries
+
+    def record(self, entries):
+        """
+        Write the new state of the given files to the manifest.
+
+        Args:
+            entries (list[ManifestEntry]): The entries returned by `plan`.
+        """
+        upsert_manifest_entry_query = Reader.format(
+            UPSERT_MANIFEST_ENTRY_PATH, schema=self.schema, table=self.table)
+        if not entries:
+            return
+        # One prepared statement, bound once per entry
+        self.db_connection.executemany(upsert_manifest_entry_query, [
+            [entry.file_path, entry.file_size, entry.file_mtime, entry.content_hash, entry.high_water_mark]
+            for entry in entries])
+
+    def _known_entries(self, file_paths):
+        """
+        Read the manifest entries of the given files.
+
+        Returns:
+            dict[str, tuple]: (size, mtime, hash, high-water mark) keyed by file path.
+        """
+        select_manifest_entries_query = Reader.format(
+            SELECT_MANIFEST_ENTRIES_PATH, schema=self.schema, table=self.table)
+        rows = self.db_connection.execute(select_manifest_entries_query, [file_paths]).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def _known_hashes(self, content_hashes):
+        """
+        Read the manifest entries matching the given content hashes.
+
+        Returns:
+            dict[str, int]: High-water mark keyed by content hash.
+        """
+        if not content_hashes:
+            return {}
+        select_manifest_hashes_query = Reader.format(
+            SELECT_MANIFEST_HASHES_PATH, schema=self.schema, table=self.table)
+        rows = self.db_connection.execute(select_manifest_hashes_query, [content_hashes]).fetchall()
+        return dict(rows)
+
+    @staticmethod
+    def _scan(file_path, known):
+        """
+        Hash a file and work out from where it has to be read.
+
+        Args:
+            file_path (str): Absolute path of the file.
+            known (tuple | None): The manifest state of the file, if it was ingested before.
+
+        Returns:
+            ManifestEntry | None: The new state of the file, or None if it did not change.
+        """
+        stat = os.stat(file_path)
+        if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime:
+            # Same size and modification time: the file was not touched since it was ingested
+            return None
+
+        # Resume from the previous high-water mark when the file may only have been appended to
+        read_offset = known[3] if known is not None and known[3] <= stat.st_size else 0
+        # Lines cannot be found in compressed bytes: a compressed file is complete up to its end
+        compression = detect_compression(file_path)
+        compressed = compression != CompressionType.NONE
+
+        digest = hashlib.sha256()
+        high_water_mark = 0
+        position = 0
+        pending = b""  # Bytes after the last newline seen so far
+        with open(file_path, "rb") as data:
+            if read_offset:
+                remaining = read_offset
+                while remaining:
+                    block = data.read(min(HASH_BLOCK_SIZE, remaining))
+                    if not block:
+                        break
+                    digest.update(block)
+                    remaining -= len(block)
+                if digest.hexdigest() != known[2]:
+                    # The ingested prefix changed: the file was rewritten and is read again
+                    read_offset = 0
+                    data.seek(0)
+                    digest = hashlib.sha256()
+                high_water_mark = position = read_offset
+
+            while True:
+                block = data.read(HASH_BLOCK_SIZE)
+                if not block:
+                    break
+                last_newline = len(block) - 1 if compressed else block.rfind(b"\n")
+                if last_newline >= 0:
+                    digest.update(pending)
+                    digest.update(block[:last_newline + 1])
+                    pending = block[last_newline + 1:]
+                    high_water_mark = position + last_newline + 1
+                else:
+                    pending += block
+                position += len(block)
+
+        if not compressed and pending.strip() and IngestManifest._complete_line(pending):
+            # The last line is not followed by a newline but is a whole record: the file is complete
+            digest.update(pending)
+            high_water_mark = position
+
+        if read_offset == high_water_mark:
+            # No complete line was appended, only the metadata of the file changed
+            read_offset = None
+        entry = ManifestEntry(file_path, stat.st_size, stat.st_mtime, digest.hexdigest(),
+                              high_water_mark, read_offset)
+        entry.compression = compression
+        return entry
+
+    @staticmethod
+    def _complete_line(line):
+        """
+        Whether the bytes after the last newline of a file are a whole JSON record, rather than
+        a line still being written.
+        """
+        try:
+            json.loads(line)
+        except ValueError:
+            return False
+        return True
+
+    @staticmethod
+    def _copy_tail(entry, tail_path):
+        """
+        Copy the complete lines of a file that were not ingested yet, from its read offset up to
+        its high-water mark, into their own file.
+
+        Args:
+            entry (ManifestEntry): The entry of the growing file.
+            tail_path (str): Path of the file receiving the tail.
+
+        Returns:
+            str: The path of the tail file.
+        """
+        with open(entry.file_path, "rb") as source, open(tail_path, "wb") as tail:
+            source.seek(entry.read_offset)
+            remaining = entry.high_water_mark - entry.read_offset
+            while remaining:
+                block = source.read(min(HASH_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                tail.write(block)
+                remaining -= len(block)
+        logging.info(f"Reading {entry.high_water_mark - entry.read_offset} new bytes of {entry.file_path}")
+        return tail_path
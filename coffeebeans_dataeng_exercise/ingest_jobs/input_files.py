@@ -0,0 +1,56 @@
+import glob
+import logging
+import os
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    INPUT_FILE_PATTERNS,  # Glob patterns used to pick up data files inside a directory
+)
+
+# Characters that turn a path into a glob pattern
+GLOB_CHARACTERS = ("*", "?", "[")
+
+
+def resolve_input_files(source, patterns=INPUT_FILE_PATTERNS):
+    """
+    Expand an ingestion source into the ordered list of data files it refers to.
+
+    A source can be a single file, a directory (every file matching one of `patterns` inside it),
+    a glob pattern, or a list/tuple mixing any of those. Files referenced more than once
+    are only returned once, in the order they were first seen.
+
+    Args:
+        source (str | os.PathLike | list): The file(s), directory(ies) or glob(s) to ingest.
+        patterns (tuple[str]): Glob patterns applied to directories. Defaults to INPUT_FILE_PATTERNS.
+
+    Returns:
+        list[str]: The resolved file paths.
+
+    Raises:
+        FileNotFoundError: If a plain file path does not exist.
+    """
+    sources = source if isinstance(source, (list, tuple)) else [source]
+
+    resolved = []
+    seen = set()
+    for entry in sources:
+        entry = os.fspath(entry)
+        if os.path.isdir(entry):
+            # Every matching file in the directory, in a stable order
+            matches = sorted(match for pattern in patterns for match in glob.glob(os.path.join(entry, pattern)))
+        elif any(char in entry for char in GLOB_CHARACTERS):
+            # Glob patterns may legitimately match nothing (e.g. no drop yet today)
+            matches = sorted(glob.glob(entry, recursive=True))
+            if not matches:
+                logging.warning(f"No files matched pattern: {entry}")
+        elif os.path.isfile(entry):
+            matches = [entry]
+        else:
+            raise FileNotFoundError(f"Data file {entry} not found.")
+
+        for match in map(os.path.normpath, matches):
+            # Only keep regular files and skip files already scheduled
+            if os.path.isfile(match) and match not in seen:
+                seen.add(match)
+                resolved.append(match)
+
+    return resolved
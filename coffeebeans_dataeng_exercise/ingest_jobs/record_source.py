@@ -0,0 +1,68 @@
+from itertools import islice
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    RECORD_BATCH_SIZE,  # Default records of an iterable of dicts staged together
+)
+
+# Libraries whose tables DuckDB scans in place once registered
+RELATION_MODULES = ("pyarrow", "pandas", "polars")
+
+
+class RecordSource:
+    """
+    Votes held in memory by a producer, handed to the ingestion instead of a file path: a
+    PyArrow table, record batch or record batch reader, a pandas or polars DataFrame, or an
+    iterable of dicts keyed by column name.
+    """
+
+    def __init__(self, records, batch_size=RECORD_BATCH_SIZE):
+        """
+        Initialize the RecordSource.
+
+        Args:
+            records (object): The votes.
+            batch_size (int): Number of dicts staged and committed together when `records` is an
+                iterable of dicts. Defaults to RECORD_BATCH_SIZE from constants.
+        """
+        self.records = records
+        self.batch_size = batch_size
+
+    def is_relation(self):
+        """
+        Check whether the records are a table DuckDB can scan in place.
+
+        Returns:
+            bool: True for the objects of PyArrow, pandas and polars.
+        """
+        return type(self.records).__module__.split(".")[0] in RELATION_MODULES
+
+    def relation(self):
+        """
+        The object to register with DuckDB. A single PyArrow record batch is wrapped in a table,
+        which shares its buffers.
+
+        Returns:
+            object: The table, reader or DataFrame.
+        """
+        if type(self.records).__name__ == "RecordBatch":
+            import pyarrow
+            return pyarrow.Table.from_batches([self.records])
+        return self.records
+
+    def column_batches(self, columns):
+        """
+        Group the dicts in batches of `batch_size` records, each one as a list of values per
+        column, ready to be bound as query parameters. A missing key is a NULL value.
+
+        Args:
+            columns (list[str]): The columns to read from the dicts.
+
+        Yields:
+            list[list]: The values of every column, in the order of `columns`.
+        """
+        records = iter(self.records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return
+            yield [[record.get(column) for record in batch] for column in columns]
@@ -0,0 +1,81 @@
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    JSON_TIMESTAMP_FORMAT,  # Format of the timestamps of the input files
+)
+
+# Maximum number of characters of a rejected line kept in the rejects table
+REJECT_LINE_LIMIT = 4096
+# Integer types of the votes table columns
+INTEGER_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT")
+
+
+def validate_line(line, column_types):
+    """
+    Check that a line of an input file holds a vote that can be written to the votes table.
+
+    Args:
+        line (str): The line, without its newline.
+        column_types (list[tuple[str, str]]): The columns of the votes table with their types.
+
+    Returns:
+        str | None: Why the line is rejected, or None if it is valid.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError as error:
+        return f"invalid JSON: {error}"
+    if not isinstance(record, dict):
+        return "not a JSON object"
+    if record.get("Id") is None:
+        return "missing Id"
+
+    for name, data_type in column_types:
+        value = record.get(name)
+        if value is None:
+            continue
+        if isinstance(value, (dict, list)) and data_type != "VARCHAR":
+            return f"invalid {name}: nested value"
+        text = str(value)
+        try:
+            if data_type in INTEGER_TYPES:
+                int(text)
+            elif data_type.startswith("DECIMAL") and not Decimal(text).is_finite():
+                raise InvalidOperation(text)
+            elif data_type.startswith("TIMESTAMP") or name == "CreationDate":
+                # A CreationDate kept as text must still be a timestamp
+                datetime.strptime(text, JSON_TIMESTAMP_FORMAT)
+        except (ValueError, InvalidOperation):
+            return f"invalid {name}: {text[:100]!r}"
+    return None
+
+
+def split_valid_lines(chunk_path, valid_path, first_line, column_types):
+    """
+    Copy the valid lines of a chunk to another file and list the rejected ones.
+
+    Args:
+        chunk_path (str): The chunk to check.
+        valid_path (str): Path of the file receiving the valid lines.
+        first_line (int): Number of the first line of the chunk in its file.
+        column_types (list[tuple[str, str]]): The columns of the votes table with their types.
+
+    Returns:
+        list[tuple[int, str, str]]: The (line number, reason, line) of every rejected line.
+    """
+    rejects = []
+    with open(chunk_path, "rb") as chunk, open(valid_path, "wb") as valid:
+        for line_number, raw_line in enumerate(chunk, first_line):
+            try:
+                line = raw_line.decode("utf-8").rstrip("\r\n")
+                reason = validate_line(line, column_types) if line.strip() else None
+            except UnicodeDecodeError:
+                line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+                reason = "invalid UTF-8"
+            if reason is None:
+                valid.write(raw_line)
+            else:
+                rejects.append((line_number, reason, line[:REJECT_LINE_LIMIT]))
+    return rejects
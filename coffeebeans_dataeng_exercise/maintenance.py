@@ -0,0 +1,54 @@
+import argparse
+import logging
+
+from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DB_FILE,  # Default path to the database file
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    OperationType,  # Enumeration of operation types (e.g., MAINTENANCE)
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SchemaType,  # Enumeration of schema types (e.g., VOTES)
+)
+from coffeebeans_dataeng_exercise.db.warehouse_coordinator import WarehouseCoordinator
+
+# Configure logging to display INFO level messages and above, with a specific format
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def parse_args():
+    """
+    Parses the command-line arguments of the maintenance script.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Rewrite the votes ordered by CreationDate and compact the database.")
+    # The blocks freed by the rewrite are otherwise reused by the next writes
+    parser.add_argument("--no-compact-file", action="store_false", dest="compact_file",
+                        help="Keep the database file instead of copying it into a file without the free blocks.")
+    # Own the database through the writer lease and publish a snapshot for the concurrent readers
+    parser.add_argument("--publish-snapshot", action="store_true",
+                        help="Wait for the other writers and publish a read-only snapshot for run-query after the run.")
+    # Size and row groups before and after, for monitoring
+    parser.add_argument("--metrics-file", default=None,
+                        help="Write the metrics of the run to this file: a Prometheus textfile for *.prom, JSON otherwise.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    """
+    Main entry point of the script. Creates and runs the maintenance batch job.
+    """
+    args = parse_args()
+
+    # Create an instance of the batch job based on the operation type (MAINTENANCE) and schema type (VOTES)
+    maintenance = BatchFactory.operation(
+        OperationType.MAINTENANCE, [SchemaType.VOTES], compact_file=args.compact_file,
+        metrics_file=args.metrics_file,
+        coordinator=WarehouseCoordinator(DB_FILE) if args.publish_snapshot else None)
+
+    # The job works on the stored votes: no data file
+    maintenance.run(None)
@@ -0,0 +1,166 @@
+import logging
+import os
+from datetime import datetime
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.batch.batch_job import BatchJob
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CHECKPOINT_PATH,  # Path to the SQL file checkpointing the database
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    COMPACT_DATABASE_PATH,  # Path to the SQL file copying the database into a new file
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    COMPACTED_SUFFIX,  # Suffix of the compacted copy of the database
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    COMPACTION_SOURCE_DATABASE,  # Name the database being compacted is attached under
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    COMPACTION_TARGET_DATABASE,  # Name the compacted copy is attached under
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DB_FILE,  # Default path to the database file
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    REWRITE_VOTES_SORTED_PATH,  # Path to the SQL file rewriting the votes ordered by CreationDate
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SELECT_STORAGE_STATS_PATH,  # Path to the SQL file reading the row groups and blocks
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    SchemaType,  # Enumeration of schema types
+)
+from coffeebeans_dataeng_exercise.db.db import DatabaseConnection
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+
+class CompactVotes(BatchJob):
+    """
+    Maintenance job restoring the layout of the votes table after many upserts, which update
+    rows in place and append the new ones in arrival order: the row groups end up covering
+    overlapping ranges of CreationDate, so that their zone maps no longer prune range queries.
+
+    The votes are rewritten into a new table ordered by CreationDate, the database is
+    checkpointed, so that the WAL is empty, and, unless disabled, copied into a new file without
+    the blocks freed by the rewrite. The size and row group count of the votes before and after
+    are logged, exported as metrics and kept in `report`.
+    """
+
+    def __init__(self, db_file=DB_FILE, schemas=[SchemaType.VOTES], pool=None, metrics_file=None,
+                 profile=False, coordinator=None, compact_file=True):
+        """
+        Initialize the CompactVotes job with database file and schema type.
+
+        Args:
+            db_file (str): Path to the database file. Defaults to DB_FILE from constants.
+            schemas (list): List of schema types. Defaults to [SchemaType.VOTES].
+            pool (ConnectionPool, optional): Pool to borrow the connection from, which requires
+                `compact_file` to be False. Defaults to None, which opens a connection for the job.
+            metrics_file (str, optional): File the metrics of the run are written to (JSON, or a
+                Prometheus textfile for a ".prom" file). Defaults to None.
+            profile (bool): Record the DuckDB profile of every query in the metrics. Defaults to False.
+            coordinator (WarehouseCoordinator, optional): Take the writer lease of the database and
+                publish a snapshot for the readers after the run. Defaults to None.
+            compact_file (bool): Copy the database into a new file replacing it, so that the file
+                shrinks to the blocks in use; the blocks freed by the rewrite are otherwise only
+                reused by the next writes. Defaults to True.
+
+        Raises:
+            ValueError: If the file is to be compacted while the connection is borrowed from a pool.
+        """
+        if compact_file and pool is not None:
+            raise ValueError("The database file cannot be replaced while a pool keeps it open")
+        super().__init__(db_file, schemas, pool, metrics_file, profile, coordinator)  # Initialize the parent BatchJob with the database file and schemas
+        self.db_file = db_file
+        self.compact_file = compact_file
+        self.report = {}  # Storage statistics of the votes, before and after the maintenance
+
+    def transform(self, file_path):
+        """
+        Rewrite the votes table ordered by CreationDate, checkpoint the database and compact its file.
+
+        Args:
+            file_path (str): Not used: the job works on the stored votes.
+        """
+        start_time = datetime.now()  # Record the start time of the maintenance
+        self.report["before"] = self.storage_stats()
+
+        with self.db_connection.stage("rewrite"):
+            self.rewrite_sorted()
+        with self.db_connection.stage("checkpoint"):
+            self.db_connection.execute(Reader.read(CHECKPOINT_PATH))
+        if self.compact_file:
+            with self.db_connection.stage("compaction"):
+                self.compact()
+
+        self.report["after"] = self.storage_stats()
+        for moment, stats in self.report.items():
+            for name, value in stats.items():
+                self.metrics.set(f"{name}_{moment}", value)
+
+        total_time = (datetime.now() - start_time).total_seconds()
+        before, after = self.report["before"], self.report["after"]
+        logging.info(f"Compacted the votes in {total_time:.2f} seconds: {before['row_groups']} -> "
+                     f"{after['row_groups']} row groups, {before['size_bytes']} -> {after['size_bytes']} bytes")
+
+    def rewrite_sorted(self):
+        """
+        Rewrite the votes into a new table of the same layout, ordered by CreationDate, that
+        replaces the original one in a single transaction.
+        """
+        votes = self.schema_managers[SchemaType.VOTES]
+        new_table = f"{votes.table}__sorted"  # Name of the new table until it replaces the old one
+        rewrite_query = Reader.format(
+            REWRITE_VOTES_SORTED_PATH, schema=votes.schema, table=votes.table, new_table=new_table)
+        with self.db_connection.transaction():
+            self.db_connection.execute(votes.create_table_like_query(new_table))
+            self.db_connection.execute(rewrite_query)
+
+    def compact(self):
+        """
+        Copy the checkpointed database into a new file, which only holds the blocks in use, and
+        replace the database file with it. The connection of the job is closed during the copy
+        and opened again on the new file.
+        """
+        self.db_connection.close()
+        compacted_file = self.db_file + COMPACTED_SUFFIX
+        for path in (compacted_file, compacted_file + ".wal"):
+            # Left over by an interrupted compaction
+            if os.path.exists(path):
+                os.remove(path)
+        con = duckdb.connect()
+        try:
+            con.execute(Reader.format(
+                COMPACT_DATABASE_PATH, db_file=self.db_file.replace("'", "''"),
+                compacted_file=compacted_file.replace("'", "''"),
+                source=COMPACTION_SOURCE_DATABASE, compacted=COMPACTION_TARGET_DATABASE))
+        finally:
+            con.close()
+        os.replace(compacted_file, self.db_file)
+
+        self.db_connection = DatabaseConnection(self.db_file)
+        self.db_connection.metrics = self.metrics
+        if self.profile_path is not None:
+            self.db_connection.enable_profiling(self.profile_path)
+
+    def storage_stats(self):
+        """
+        Read the size of the database and the row groups of the votes table.
+
+        Returns:
+            dict: size_bytes and wal_bytes of the files, row_groups of the votes table, and the
+            used_blocks and free_blocks of the database.
+        """
+        votes = self.schema_managers[SchemaType.VOTES]
+        row_groups, used_blocks, free_blocks, _ = self.db_connection.execute(Reader.format(
+            SELECT_STORAGE_STATS_PATH, schema=votes.schema, table=votes.table)).fetchone()
+        wal_file = self.db_file + ".wal"
+        return {
+            "size_bytes": os.path.getsize(self.db_file),
+            "wal_bytes": os.path.getsize(wal_file) if os.path.exists(wal_file) else 0,
+            "row_groups": row_groups,
+            "used_blocks": used_blocks,
+            "free_blocks": free_blocks,
+        }
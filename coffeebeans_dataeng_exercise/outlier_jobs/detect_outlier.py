@@ -1,17 +1,63 @@
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from coffeebeans_dataeng_exercise.batch.batch_job import BatchJob
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_MATERIALIZED_OUTLIER_VIEW_PATH,  # Path to the SQL file for the outlier view over the weekly counts
+)
 from coffeebeans_dataeng_exercise.constants.constants import (
     CREATE_OUTLIER_VIEW_PATH,  # Path to the SQL file for creating the outlier view
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    CREATE_OUTLIER_RULE_TABLE_PATH,  # Path to the SQL file writing the outliers of a rule
+)
 from coffeebeans_dataeng_exercise.constants.constants import (
     DB_FILE,  # Default path to the database file
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DELETE_MINOR_DIMENSION_VALUES_PATH,  # Path to the SQL file keeping the values of a dimension with the most votes
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DROP_TABLE_PATH,  # Path to the SQL file for dropping a table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    OUTLIER_RULE_STAGED_SUFFIX,  # Suffix of the table a rule is written to before it replaces its table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    OUTLIER_SLICE_COUNTS_TABLE,  # Table holding the weekly counts the rules read during a run
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    PARQUET_ROOT,  # Default root directory of the Parquet votes storage
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    REBUILD_WEEKLY_COUNTS_PATH,  # Path to the SQL file for recomputing the weekly vote counts
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    REPLACE_TABLE_PATH,  # Path to the SQL file replacing a table with a new table
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    STAGE_OUTLIER_SLICE_COUNTS_PATH,  # Path to the SQL file counting the votes of every slice
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    STAGE_OUTLIER_SLICE_WEEKLY_COUNTS_PATH,  # Path to the SQL file reading the weekly totals from the aggregate
+)
 from coffeebeans_dataeng_exercise.constants.constants import (
     SchemaType,  # Enumeration of schema types
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    StorageType,  # Enumeration of storage backends
+)
+from coffeebeans_dataeng_exercise.db.data_version import DataVersion
+from coffeebeans_dataeng_exercise.db.db import DatabaseConnection
+from coffeebeans_dataeng_exercise.db.parquet_storage import ParquetVotesStorage
 from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+from coffeebeans_dataeng_exercise.outlier_jobs.outlier_rules import (
+    OutlierRule,
+    parse_dimension,
+    slice_counts_expressions,
+)
 
 
 # Factory Method Pattern: Concrete implementation of the outlier detection process
@@ -21,15 +67,53 @@ class CalculateOutlier(BatchJob):
     Inherits from BatchJob and implements the transformation process for outlier detection.
     """
 
-    def __init__(self, db_file=DB_FILE, schemas=[SchemaType.VOTES, SchemaType.OUTLIER]):
+    def __init__(self, db_file=DB_FILE, schemas=[SchemaType.VOTES, SchemaType.OUTLIER],
+                 materialized=False, refresh=False, storage=StorageType.DUCKDB, parquet_root=PARQUET_ROOT,
+                 pool=None, metrics_file=None, profile=False, rules=None, dimensions=None, rule_threads=None,
+                 coordinator=None):
         """
         Initialize the CalculateOutlier job with database file and schema types.
 
         Args:
             db_file (str): Path to the database file. Defaults to DB_FILE from constants.
             schemas (list): List of schema types. Defaults to [SchemaType.VOTES, SchemaType.OUTLIER].
+            materialized (bool): Compute the view from the weekly vote counts aggregate, which the
+                ingestion keeps up to date, instead of from the votes table. Defaults to False.
+            refresh (bool): In materialized mode, recompute the aggregate from the votes table,
+                e.g. after the votes table was changed outside of the ingestion. Defaults to False.
+            storage (StorageType): Where the votes are read from: the DuckDB votes table, or the view
+                over the Parquet storage. Defaults to StorageType.DUCKDB.
+            parquet_root (str): Root directory of the Parquet storage. Defaults to PARQUET_ROOT.
+            pool (ConnectionPool, optional): Pool to borrow the connection from. Defaults to None,
+                which opens a connection for the job.
+            metrics_file (str, optional): File the metrics of the run are written to (JSON, or a
+                Prometheus textfile for a ".prom" file). Defaults to None.
+            profile (bool): Record the DuckDB profile of every query in the metrics. Defaults to False.
+            rules (list[OutlierRule], optional): Additional outlier rules, each writing its outliers
+                to its own tables. The votes are counted once for all of them. Defaults to None, or
+                to the rule of the outlier_weeks view (named "weeks") when dimensions are given.
+            dimensions (list[str], optional): Columns of the votes the rules are also evaluated
+                on, one slice per value, e.g. ["VoteTypeId", "PostId:100"] where ":100" only keeps
+                the 100 values with the most votes. Defaults to None, the weekly totals only.
+            rule_threads (int, optional): Number of rule and slice pairs evaluated in parallel.
+                Defaults to None, one per core.
+            coordinator (WarehouseCoordinator, optional): Take the writer lease of the database and
+                publish a snapshot for the readers after the run. Defaults to None.
         """
-        super().__init__(db_file, schemas)  # Initialize the parent BatchJob with the database file and schemas
+        if materialized and SchemaType.WEEKLY_COUNTS not in schemas:
+            # The aggregate table is needed to read the weekly counts from
+            schemas = schemas + [SchemaType.WEEKLY_COUNTS]
+        if storage == StorageType.PARQUET and SchemaType.PARTITIONS not in schemas:
+            # The Parquet storage keeps the row count of each partition
+            schemas = schemas + [SchemaType.PARTITIONS]
+        super().__init__(db_file, schemas, pool, metrics_file, profile, coordinator)  # Initialize the parent BatchJob with the database file and schemas
+        self.materialized = materialized
+        self.refresh = refresh
+        self.storage = storage
+        self.parquet_root = parquet_root
+        self.dimensions = [parse_dimension(dimension) for dimension in dimensions or []]
+        self.rules = rules or ([OutlierRule("weeks")] if self.dimensions else [])
+        self.rule_threads = rule_threads
 
     def transform(self, file_path):
         """
@@ -41,23 +125,181 @@ class CalculateOutlier(BatchJob):
         start_time = datetime.now()  # Record the start time of the outlier detection process
         logging.info(f"Started outlier detection for file: {file_path}")
 
-        # Read the SQL query for creating the outlier view and format it with source and sink schema/table names
-        create_outlier_view_query = Reader.read(CREATE_OUTLIER_VIEW_PATH).format(
-            # Schema name for the source table
-            source_schema=self.schema_managers[SchemaType.VOTES].schema,
-            # Table name for the source table
-            source_table=self.schema_managers[SchemaType.VOTES].table,
-            # Schema name for the sink table (outliers view)
-            sink_schema=self.schema_managers[SchemaType.OUTLIER].schema,
-            # Table name for the sink table (outliers view)
-            sink_table=self.schema_managers[SchemaType.OUTLIER].table
-        )
+        if self.materialized:
+            create_outlier_view_query = self.materialized_view_query()
+        else:
+            source_schema, source_table = self.source()
+            # Read the SQL query for creating the outlier view and format it with source and sink schema/table names
+            create_outlier_view_query = Reader.format(
+                CREATE_OUTLIER_VIEW_PATH,
+                # Schema name for the source table
+                source_schema=source_schema,
+                # Table name for the source table
+                source_table=source_table,
+                # Schema name for the sink table (outliers view)
+                sink_schema=self.schema_managers[SchemaType.OUTLIER].schema,
+                # Table name for the sink table (outliers view)
+                sink_table=self.schema_managers[SchemaType.OUTLIER].table
+            )
 
         # Execute the SQL query to create the outlier view in the database
-        self.db_connection.execute(create_outlier_view_query)
+        with self.db_connection.stage("view_creation"):
+            self.db_connection.execute(create_outlier_view_query)
+
+        if self.rules:
+            with self.db_connection.stage("rules"):
+                self.evaluate_rules()
+
+        # The outlier view and tables were replaced: the cached query results computed before are dropped
+        DataVersion(self.db_connection).bump()
 
         end_time = datetime.now()  # Record the end time of the outlier detection process
         # Calculate the total time taken
         total_time = (end_time - start_time).total_seconds()
         logging.info(
             f"Completed outlier detection for file: {file_path} in {total_time:.2f} seconds")  # Log the completion time
+
+    def evaluate_rules(self):
+        """
+        Count the votes of every week once, in total and per value of every dimension, then
+        write the outliers of every rule on every slice to its table from these counts. The
+        rule and slice pairs are evaluated in parallel, each on its own cursor, into new tables
+        that replace the tables of the previous run in one transaction once all of them are
+        written: a failed run leaves every rule table as it was.
+        """
+        votes_columns = {name for name, _ in self.schema_managers[SchemaType.VOTES].column_types()}
+        for column, _ in self.dimensions:
+            if column not in votes_columns:
+                raise ValueError(f"Unknown outlier dimension: {column}")
+        counts_schema = self.schema_managers[SchemaType.OUTLIER].schema
+        tasks = [(rule, dimension) for rule in self.rules
+                 for dimension in [None] + [column for column, _ in self.dimensions]]
+        tables = [rule.table(dimension) for rule, dimension in tasks]
+
+        try:
+            with self.db_connection.transaction():
+                self.db_connection.execute(self.slice_counts_query(counts_schema))
+                delete_minor_dimension_values_query = Reader.format(
+                    DELETE_MINOR_DIMENSION_VALUES_PATH, schema=counts_schema, counts_table=OUTLIER_SLICE_COUNTS_TABLE)
+                for column, top in self.dimensions:
+                    if top is not None:
+                        self.db_connection.execute(delete_minor_dimension_values_query, [column, column, top])
+
+            threads = self.rule_threads or min(len(tasks), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                # Consume the results so that the error of any evaluation is raised here
+                list(executor.map(lambda task: self.evaluate_rule(counts_schema, *task), tasks))
+
+            with self.db_connection.transaction():
+                for table in tables:
+                    self.db_connection.execute(Reader.format(
+                        REPLACE_TABLE_PATH, schema=counts_schema, table=table,
+                        new_table=table + OUTLIER_RULE_STAGED_SUFFIX))
+        finally:
+            # The new tables of a failed run, and the counts they were computed from
+            for table in [table + OUTLIER_RULE_STAGED_SUFFIX for table in tables] + [OUTLIER_SLICE_COUNTS_TABLE]:
+                self.db_connection.execute(Reader.format(DROP_TABLE_PATH, schema=counts_schema, table=table))
+        logging.info(f"Evaluated {len(self.rules)} outlier rule(s) on {len(tasks)} slice(s) with {threads} "
+                     f"thread(s): {', '.join(f'{counts_schema}.{table}' for table in tables)}")
+
+    def evaluate_rule(self, counts_schema, rule, dimension):
+        """
+        Write the outliers of one rule on the weekly totals, or on the slices of one dimension,
+        to the new table that replaces the table of the rule once every evaluation succeeded.
+        Runs on a worker thread, with its own cursor on the database of the job.
+
+        Args:
+            counts_schema (str): Schema of the weekly counts table.
+            rule (OutlierRule): The rule.
+            dimension (str | None): The dimension column, or None for the weekly totals.
+
+        Returns:
+            str: The new table written.
+        """
+        sink_schema = self.schema_managers[SchemaType.OUTLIER].schema
+        sink_table = rule.table(dimension) + OUTLIER_RULE_STAGED_SUFFIX
+        create_outlier_rule_table_query = Reader.format(
+            CREATE_OUTLIER_RULE_TABLE_PATH, sink_schema=sink_schema, sink_table=sink_table,
+            counts_schema=counts_schema, counts_table=OUTLIER_SLICE_COUNTS_TABLE,
+            **rule.query_parameters(dimension))
+        cursor = DatabaseConnection(self.db_connection.db_file, con=self.db_connection.con.cursor())
+        try:
+            cursor.execute(create_outlier_rule_table_query)
+        finally:
+            cursor.close()
+        return f"{sink_schema}.{sink_table}"
+
+    def slice_counts_query(self, counts_schema):
+        """
+        Build the query counting the votes the rules read. In materialized mode, rules on the
+        weekly totals only read the weekly counts aggregate instead of the votes.
+
+        Args:
+            counts_schema (str): Schema of the weekly counts table.
+
+        Returns:
+            str: The SQL query creating the weekly counts table.
+        """
+        if self.materialized and not self.dimensions:
+            weekly_counts = self.schema_managers[SchemaType.WEEKLY_COUNTS]
+            return Reader.format(
+                STAGE_OUTLIER_SLICE_WEEKLY_COUNTS_PATH, schema=counts_schema, counts_table=OUTLIER_SLICE_COUNTS_TABLE,
+                weekly_schema=weekly_counts.schema, weekly_table=weekly_counts.table)
+        source_schema, source_table = self.source()
+        return Reader.format(
+            STAGE_OUTLIER_SLICE_COUNTS_PATH, schema=counts_schema, counts_table=OUTLIER_SLICE_COUNTS_TABLE,
+            source_schema=source_schema, source_table=source_table,
+            **slice_counts_expressions([column for column, _ in self.dimensions]))
+
+    def source(self):
+        """
+        The relation the votes are read from: the votes table, or the view over the Parquet
+        storage, which is (re)created so that it covers every partition.
+
+        Returns:
+            tuple[str, str]: The schema and name of the relation.
+        """
+        votes = self.schema_managers[SchemaType.VOTES]
+        if self.storage == StorageType.PARQUET:
+            storage = self.parquet_storage()
+            storage.create_view()
+            return votes.schema, storage.view
+        return votes.schema, votes.table
+
+    def parquet_storage(self):
+        """
+        Build the Parquet storage of the votes.
+
+        Returns:
+            ParquetVotesStorage: The storage under `parquet_root`.
+        """
+        return ParquetVotesStorage(self.db_connection, self.schema_managers[SchemaType.VOTES],
+                                   self.schema_managers[SchemaType.PARTITIONS], self.parquet_root)
+
+    def materialized_view_query(self):
+        """
+        Make sure the weekly vote counts aggregate is filled and build the query creating the
+        outlier view on top of it, so that reading the view costs O(weeks) instead of O(votes).
+
+        Returns:
+            str: The SQL query creating the outlier view.
+        """
+        source_schema, source_table = self.source()
+        weekly_counts = self.schema_managers[SchemaType.WEEKLY_COUNTS]
+
+        if self.refresh or weekly_counts.created:
+            # One full scan of the votes; the ingestion maintains the aggregate incrementally afterwards
+            rebuild_weekly_counts_query = Reader.format(
+                REBUILD_WEEKLY_COUNTS_PATH, source_schema=source_schema, source_table=source_table,
+                sink_schema=weekly_counts.schema, sink_table=weekly_counts.table)
+            with self.db_connection.stage("aggregate_refresh"), self.db_connection.transaction():
+                self.db_connection.execute(rebuild_weekly_counts_query)
+            logging.info(f"Rebuilt weekly vote counts: {weekly_counts.schema}.{weekly_counts.table}")
+
+        # Read the SQL query for creating the outlier view over the aggregate
+        return Reader.format(
+            CREATE_MATERIALIZED_OUTLIER_VIEW_PATH, weekly_schema=weekly_counts.schema,
+            weekly_table=weekly_counts.table,
+            sink_schema=self.schema_managers[SchemaType.OUTLIER].schema,
+            sink_table=self.schema_managers[SchemaType.OUTLIER].table
+        )
@@ -0,0 +1,187 @@
+import re
+
+from coffeebeans_dataeng_exercise.constants.constants import (
+    OUTLIER_RULE_TABLE_PREFIX,  # Prefix of the tables holding the weeks flagged by each rule
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    OutlierBaseline,  # Enumeration of the baselines of the outlier rules
+)
+from coffeebeans_dataeng_exercise.constants.constants import (
+    OutlierMethod,  # Enumeration of the scoring methods of the outlier rules
+)
+
+# Threshold of each method when a rule does not give one
+DEFAULT_THRESHOLDS = {
+    OutlierMethod.RELATIVE: 0.2,
+    OutlierMethod.ZSCORE: 3.0,
+    OutlierMethod.MAD: 3.5,
+}
+# Aggregate giving the baseline, dispersion measured around it and score of each method
+METHOD_EXPRESSIONS = {
+    OutlierMethod.RELATIVE: ("avg", "stddev_pop(vote_count)", "ABS(1.0 - vote_count / baseline)"),
+    OutlierMethod.ZSCORE: ("avg", "stddev_pop(vote_count)", "ABS(vote_count - baseline) / NULLIF(spread, 0)"),
+    # 1.4826 scales the median absolute deviation to the standard deviation of a normal distribution
+    OutlierMethod.MAD: ("median", "1.4826 * mad(vote_count)", "ABS(vote_count - baseline) / NULLIF(spread, 0)"),
+}
+# Number of the week since the Monday 1970-01-05, contiguous across years, of a year and strftime('%W')
+# week number: the weeks without votes, which have no row, still count in a rolling baseline. Week 0 of
+# a year starts on the Monday before the first one, and is the same week as the last week of the previous year
+WEEK_ORDINAL_EXPRESSION = ("CAST(ceil(date_diff('day', DATE '1970-01-05', make_date(CAST(year AS BIGINT), 1, 1)) / 7) AS BIGINT)"
+                           " + CAST(week_number AS INTEGER) - 1")
+# Names of the rules, used in the name of their table
+RULE_NAME_PATTERN = re.compile(r"^[a-z_][a-z0-9_]*$")
+# Upper case letters starting a word of a column name, e.g. VoteTypeId -> vote_type_id
+CAMEL_CASE_PATTERN = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+def parse_dimension(spec):
+    """
+    Read a grouping dimension from its command line form: a column of the votes, optionally
+    followed by the number of its values with the most votes to keep, e.g. "PostId:100".
+
+    Args:
+        spec (str): The dimension.
+
+    Returns:
+        tuple[str, int | None]: The column and the number of values kept, None for every value.
+
+    Raises:
+        ValueError: If the number of values is not a positive integer.
+    """
+    column, separator, top = spec.partition(":")
+    if not separator:
+        return column, None
+    if not top.isdigit() or int(top) == 0:
+        raise ValueError(f"Invalid number of values in dimension {spec!r}")
+    return column, int(top)
+
+
+def slice_counts_expressions(columns):
+    """
+    The expressions of the STAGE_OUTLIER_SLICE_COUNTS_PATH template for the given dimensions:
+    the weekly totals are always counted, then one grouping set per dimension.
+
+    Args:
+        columns (list[str]): The dimension columns.
+
+    Returns:
+        dict[str, str]: The dimension_name, dimension_value and grouping_sets placeholders.
+    """
+    if not columns:
+        return {"dimension_name": "CAST(NULL AS VARCHAR)", "dimension_value": "CAST(NULL AS VARCHAR)",
+                "grouping_sets": "(year_week)"}
+    dimension_name = " ".join(f"WHEN GROUPING({column}) = 0 THEN '{column}'" for column in columns)
+    dimension_value = " ".join(f"WHEN GROUPING({column}) = 0 THEN CAST({column} AS VARCHAR)" for column in columns)
+    return {"dimension_name": f"CASE {dimension_name} END",
+            "dimension_value": f"CASE {dimension_value} END",
+            "grouping_sets": ", ".join(["(year_week)"] + [f"(year_week, {column})" for column in columns])}
+
+
+class OutlierRule:
+    """
+    One outlier rule: which weeks a week is compared with, how its deviation is scored and the
+    score above which it is an outlier. A rule is evaluated on the weekly totals and on every
+    slice of the grouping dimensions of the job, each writing its outliers to its own table.
+    """
+
+    def __init__(self, name, method=OutlierMethod.RELATIVE, baseline=OutlierBaseline.GLOBAL, weeks=4,
+                 threshold=None):
+        """
+        Initialize the OutlierRule.
+
+        Args:
+            name (str): Name of the rule, in lowercase letters, digits and underscores; its outliers
+                are written to the table OUTLIER_RULE_TABLE_PREFIX + name, and to one table per
+                dimension suffixed with "_by_" and the dimension in snake case.
+            method (OutlierMethod): How a week is scored. Defaults to OutlierMethod.RELATIVE.
+            baseline (OutlierBaseline): Weeks the week is compared with. Defaults to OutlierBaseline.GLOBAL.
+            weeks (int): Number of previous weeks of a rolling baseline. Defaults to 4.
+            threshold (float, optional): Score above which a week is an outlier. Defaults to None,
+                the threshold of the method in DEFAULT_THRESHOLDS.
+
+        Raises:
+            ValueError: If the name, method or baseline is not valid.
+        """
+        if not RULE_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid outlier rule name: {name}")
+        if method not in METHOD_EXPRESSIONS:
+            raise ValueError(f"Unknown outlier method: {method}")
+        if baseline not in (OutlierBaseline.GLOBAL, OutlierBaseline.YEAR, OutlierBaseline.ROLLING):
+            raise ValueError(f"Unknown outlier baseline: {baseline}")
+        self.name = name
+        self.method = method
+        self.baseline = baseline
+        self.weeks = int(weeks)
+        self.threshold = float(DEFAULT_THRESHOLDS[method] if threshold is None else threshold)
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        Build a rule from its command line form, e.g.
+        "name=weekly_spikes,method=zscore,baseline=rolling,weeks=8,threshold=3".
+
+        Args:
+            spec (str): Comma separated key=value options of the rule.
+
+        Returns:
+            OutlierRule: The rule.
+
+        Raises:
+            ValueError: If an option is malformed or unknown.
+        """
+        options = {}
+        for item in spec.split(","):
+            key, separator, value = item.partition("=")
+            if not separator:
+                raise ValueError(f"Invalid outlier rule option {item!r} in {spec!r}")
+            options[key.strip()] = value.strip()
+        try:
+            return cls(**options)
+        except TypeError as error:
+            raise ValueError(f"Invalid outlier rule {spec!r}: {error}")
+
+    def table(self, dimension=None):
+        """
+        Name of the table holding the outliers of the rule on the weekly totals, or on the slices
+        of one dimension.
+
+        Args:
+            dimension (str, optional): The dimension column. Defaults to None, the weekly totals.
+
+        Returns:
+            str: The table name, e.g. outliers_spikes_by_vote_type_id.
+        """
+        if dimension is None:
+            return OUTLIER_RULE_TABLE_PREFIX + self.name
+        return f"{OUTLIER_RULE_TABLE_PREFIX}{self.name}_by_{CAMEL_CASE_PATTERN.sub('_', dimension).lower()}"
+
+    def baseline_window(self):
+        """
+        The window of the weeks a week is compared with, within its slice.
+
+        Returns:
+            str: The window specification.
+        """
+        if self.baseline == OutlierBaseline.YEAR:
+            return "PARTITION BY dimension_value, year"
+        if self.baseline == OutlierBaseline.ROLLING:
+            # The calendar weeks before the week itself, so that a spike does not raise its own baseline
+            return (f"PARTITION BY dimension_value ORDER BY {WEEK_ORDINAL_EXPRESSION} "
+                    f"RANGE BETWEEN {self.weeks} PRECEDING AND 1 PRECEDING")
+        return "PARTITION BY dimension_value"
+
+    def query_parameters(self, dimension=None):
+        """
+        The values of the placeholders of the rule in the CREATE_OUTLIER_RULE_TABLE_PATH template.
+
+        Args:
+            dimension (str, optional): The dimension column of the slices. Defaults to None, the
+                weekly totals.
+
+        Returns:
+            dict[str, str]: The placeholders of the template, apart from the tables.
+        """
+        center, spread, score = METHOD_EXPRESSIONS[self.method]
+        return {"center": center, "spread": spread, "score": score, "threshold": repr(self.threshold),
+                "dimension": "NULL" if dimension is None else f"'{dimension}'",
+                "baseline_window": self.baseline_window()}
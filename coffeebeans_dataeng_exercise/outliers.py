@@ -1,29 +1,99 @@
+import argparse
 import logging
 import os
 
 from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.constants.constants import (
+    DB_FILE,  # Default path to the database file
+)
 from coffeebeans_dataeng_exercise.constants.constants import (
     FILE_PATH,  # Path to the data file to be processed
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    BackendType,  # Enumeration of execution backends (e.g., DASK)
+)
 from coffeebeans_dataeng_exercise.constants.constants import (
     OperationType,  # Enumeration of operation types (e.g., OUTLIER)
 )
 from coffeebeans_dataeng_exercise.constants.constants import (
     SchemaType,  # Enumeration of schema types (e.g., VOTES, OUTLIER)
 )
+from coffeebeans_dataeng_exercise.constants.constants import (
+    StorageType,  # Enumeration of storage backends (e.g., PARQUET)
+)
+from coffeebeans_dataeng_exercise.db.warehouse_coordinator import WarehouseCoordinator
+from coffeebeans_dataeng_exercise.outlier_jobs.outlier_rules import OutlierRule
 
 # Configure logging to display INFO level messages and above, with a specific format
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+
+def parse_args():
+    """
+    Parses the command-line arguments of the outlier detection script.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Create the outlier_weeks view.")
+    # Read the weekly counts from the aggregate maintained by the ingestion
+    parser.add_argument("--materialized", action="store_true",
+                        help="Compute the view from the maintained weekly vote counts.")
+    # Recompute the aggregate from the votes table
+    parser.add_argument("--refresh", action="store_true",
+                        help="Rebuild the weekly vote counts from the votes table.")
+    # Read the votes from the DuckDB table or from the Parquet files
+    parser.add_argument("--storage", choices=[StorageType.DUCKDB, StorageType.PARQUET],
+                        default=StorageType.DUCKDB, help="Storage backend of the votes.")
+    # Additional outlier rules, each written to its own table
+    parser.add_argument("--rule", action="append", default=[], type=OutlierRule.parse, dest="rules",
+                        metavar="name=NAME[,method=relative|zscore|mad][,baseline=global|year|rolling]"
+                                "[,weeks=N][,threshold=X]",
+                        help="Write the weeks flagged by this rule to blog_analysis.outliers_NAME.")
+    # Slices the rules are also evaluated on, all counted in the same scan of the votes
+    parser.add_argument("--dimension", action="append", default=[], dest="dimensions", metavar="COLUMN[:TOP]",
+                        help="Also evaluate the rules per value of this column, e.g. VoteTypeId or PostId:100 "
+                             "for the 100 posts with the most votes.")
+    parser.add_argument("--rule-threads", type=int, default=None,
+                        help="Number of rule slices evaluated in parallel (defaults to one per core).")
+    # Own the database through the writer lease and publish a snapshot for the concurrent readers
+    parser.add_argument("--publish-snapshot", action="store_true",
+                        help="Wait for the other writers and publish a read-only snapshot for run-query after the run.")
+    # Stage timings, row counts and bytes read of the run, for monitoring
+    parser.add_argument("--metrics-file", default=None,
+                        help="Write the metrics of the run to this file: a Prometheus textfile for *.prom, JSON otherwise.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Add the DuckDB profile of every query to the metrics.")
+    # Run the job in this process or on the workers of a Dask cluster
+    parser.add_argument("--backend", choices=[BackendType.DUCKDB, BackendType.DASK],
+                        default=BackendType.DUCKDB, help="Execution backend of the job.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of Dask worker processes (defaults to one per core).")
+    parser.add_argument("--scheduler", default=None,
+                        help="Address of an existing Dask scheduler instead of a local cluster.")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
     """
     Main entry point of the script. Creates and runs an outlier detection batch job.
     """
+    args = parse_args()
+
     # Create an instance of the batch job for outlier detection based on the operation type (OUTLIER)
     # and schema types (VOTES and OUTLIER)
+    # The Dask jobs also take the cluster to run on
+    backend_options = {}
+    if args.backend == BackendType.DASK:
+        backend_options = {"n_workers": args.workers, "scheduler_address": args.scheduler}
+
     outlier_detection = BatchFactory.operation(
-        OperationType.OUTLIER, [SchemaType.VOTES, SchemaType.OUTLIER])
+        OperationType.OUTLIER, [SchemaType.VOTES, SchemaType.OUTLIER], backend=args.backend,
+        materialized=args.materialized, refresh=args.refresh, storage=args.storage,
+        metrics_file=args.metrics_file, profile=args.profile, rules=args.rules,
+        dimensions=args.dimensions, rule_threads=args.rule_threads,
+        coordinator=WarehouseCoordinator(DB_FILE) if args.publish_snapshot else None, **backend_options)
 
     # Check if the data file exists at the specified path
     if os.path.exists(FILE_PATH):
@@ -10,12 +10,14 @@ For example
     poetry run exercise ingest-data
     poetry run exercise detect-outliers
     poetry run exercise test
+    poetry run exercise bench --rows 1M --rows 10M
 
 """
+import logging
 import subprocess
 from pathlib import Path
+from typing import List, Optional
 
-import duckdb
 import typer
 
 app = typer.Typer()
@@ -53,10 +55,35 @@ def ingest_data():
 
 
 @app.command()
-def run_query(query: str):
-    conn = duckdb.connect("warehouse.db")
-    result = conn.sql(query)
-    result.show()
+def run_query(
+    query: str,
+    no_rollups: bool = typer.Option(False, help="Always scan the votes table instead of a matching rollup."),
+    cache_dir: Optional[Path] = typer.Option(None, help="Cache the results as Parquet files in this directory, "
+                                                        "until the data changes; the warehouse is opened read-only."),
+    cache_size: int = typer.Option(256, help="Megabytes of results kept in the cache directory."),
+):
+    from coffeebeans_dataeng_exercise.db.rollup_rewriter import rewrite_query
+
+    from coffeebeans_dataeng_exercise.db.warehouse_coordinator import WarehouseCoordinator
+
+    # Read-only: the snapshot published by a running writer, or the database when none is running
+    coordinator = WarehouseCoordinator("warehouse.db")
+    if cache_dir:
+        from coffeebeans_dataeng_exercise.db.query_cache import QueryCache
+
+        cache = QueryCache("warehouse.db", max_bytes=cache_size * 1024 * 1024, cache_dir=str(cache_dir),
+                           rewrite=None if no_rollups else rewrite_query, coordinator=coordinator)
+        cache.query(query).show()
+        cache.close()
+        return
+
+    with coordinator.reader() as db_connection:
+        conn = db_connection.con
+        rewritten = None if no_rollups else rewrite_query(conn, query)
+        if rewritten:
+            typer.echo(f"Answered from a rollup: {rewritten}", err=True)
+        result = conn.sql(rewritten or query)
+        result.show()
 
 
 @app.command()
@@ -64,6 +91,11 @@ def detect_outliers():
     run_cmd("python -m coffeebeans_dataeng_exercise.outliers")
 
 
+@app.command()
+def compact():
+    run_cmd("python -m coffeebeans_dataeng_exercise.maintenance")
+
+
 @app.command()
 def check_ingestion():
     run_cmd(f"pytest {Path('tests') / 'exercise_tests' / 'test_ingestion.py'}")
@@ -74,6 +106,34 @@ def check_outliers():
     run_cmd(f"pytest {Path('tests') / 'exercise_tests' / 'test_outliers.py'}")
 
 
+@app.command()
+def bench(
+    rows: List[str] = typer.Option(["1M"], help="Rows of the generated files: 1M, 10M, 100M or a number."),
+    duplicate_rate: float = typer.Option(0.05, help="Share of the rows updating an earlier vote."),
+    date_skew: float = typer.Option(0.0, help="Skew of the vote dates towards the end of the period."),
+    work_dir: Path = typer.Option(Path("uncommitted") / "bench", help="Directory of the files and databases."),
+    output: Path = typer.Option(Path("bench_results.json"), help="JSON file receiving the results."),
+    baseline: Optional[Path] = typer.Option(None, help="JSON results to compare with."),
+):
+    from coffeebeans_dataeng_exercise.bench.benchmark import run_isolated, save_results
+    from coffeebeans_dataeng_exercise.bench.votes_generator import BENCH_SIZES
+
+    logging.basicConfig(level=logging.WARNING)
+    runs = []
+    for size in rows:
+        row_count = BENCH_SIZES.get(size.upper()) or int(size)
+        run = run_isolated(row_count, str(work_dir), duplicate_rate=duplicate_rate, date_skew=date_skew)
+        runs.append(run)
+        for stage, metrics in run["stages"].items():
+            typer.echo(f"{row_count:>12} rows  {stage:<14} {metrics}")
+
+    results = save_results(runs, str(output), str(baseline) if baseline else None)
+    for entry in results.get("comparison", []):
+        typer.echo(f"{entry['rows']:>12} rows  {entry['stage']:<14} {entry['seconds']:.3f}s "
+                   f"vs {entry['baseline_seconds']:.3f}s (x{entry['ratio']})")
+    typer.echo(f"Results saved to {output}")
+
+
 def main():
     app()
 
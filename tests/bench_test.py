@@ -0,0 +1,54 @@
+import json
+import os
+import unittest
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.bench.benchmark import STAGES, compare_with_baseline, run_benchmark, save_results
+from coffeebeans_dataeng_exercise.bench.votes_generator import generate_votes
+from tests.warehouse_test_case import WarehouseTestCase
+
+
+class BenchTest(WarehouseTestCase):
+
+    def test_generated_votes(self):
+        file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+        generate_votes(file_path, 10000, duplicate_rate=0.2, start_date='2022-01-01', days=70)
+        rows, ids, first, last = duckdb.connect().execute(
+            f"SELECT COUNT(*), COUNT(DISTINCT Id), MIN(CreationDate), MAX(CreationDate) "
+            f"FROM read_json('{file_path}');").fetchone()
+        self.assertEqual(rows, 10000)
+        self.assertLess(ids, 8500)
+        self.assertGreater(ids, 7500)
+        self.assertGreaterEqual(str(first), '2022-01-01')
+        self.assertLess(str(last), '2022-03-13')
+
+    def test_generated_votes_are_reproducible(self):
+        paths = [os.path.join(self.tmp_dir, f'votes_{i}.jsonl') for i in range(2)]
+        for path in paths:
+            generate_votes(path, 1000, seed=7)
+        with open(paths[0]) as first, open(paths[1]) as second:
+            self.assertEqual(first.read(), second.read())
+
+    def test_run_and_compare(self):
+        run = run_benchmark(2000, self.tmp_dir)
+        self.assertEqual(list(run['stages']), STAGES)
+        self.assertGreater(run['stages']['ingest']['rows_per_second'], 0)
+
+        baseline_path = os.path.join(self.tmp_dir, 'baseline.json')
+        save_results([run], baseline_path)
+        results = save_results([run], os.path.join(self.tmp_dir, 'results.json'), baseline_path)
+        self.assertEqual([entry['ratio'] for entry in results['comparison']], [1.0] * len(STAGES))
+        with open(baseline_path) as baseline_file:
+            self.assertEqual(json.load(baseline_file)['runs'][0]['rows'], 2000)
+
+    def test_compare_ignores_other_runs(self):
+        run = {'rows': 10, 'duplicate_rate': 0.05, 'date_skew': 0.0, 'stages': {'ingest': {'seconds': 2.0}}}
+        other = dict(run, rows=20)
+        comparison = compare_with_baseline({'runs': [run]}, {'runs': [other, dict(run, stages={'ingest': {'seconds': 1.0}})]})
+        self.assertEqual(comparison, [{'rows': 10, 'stage': 'ingest', 'seconds': 2.0,
+                                       'baseline_seconds': 1.0, 'ratio': 2.0}])
+
+
+if __name__ == "__main__":
+    unittest.main()
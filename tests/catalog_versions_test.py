@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from tests.warehouse_test_case import WarehouseTestCase
+
+
+class CatalogVersionsTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+        with open(self.file_path, 'w') as data:
+            data.write('{"Id":"1","UserId":"1","PostId":"1","VoteTypeId":"2",'
+                       '"BountyAmount":"0","CreationDate":"2022-01-03T00:00:00.000"}\n')
+
+    def setup_queries(self, **options):
+        return self.ingest(self.file_path, **options).metrics.stages['schema_setup']['queries']
+
+    def test_up_to_date_catalog_skips_ddl(self):
+        self.assertGreater(self.setup_queries(), 1)
+        # Only the markers are read
+        self.assertEqual(self.setup_queries(), 1)
+        self.assertEqual(self.query("SELECT table_name, version FROM blog_analysis.catalog_versions"),
+                         [('votes', '2')])
+
+    def test_dropped_table_is_created_again(self):
+        self.setup_queries()
+        self.query("DROP TABLE blog_analysis.votes")
+        self.assertGreater(self.setup_queries(), 1)
+        self.assertEqual(self.query("SELECT count(*) FROM blog_analysis.votes"), [(1,)])
+
+    def test_new_version_runs_ddl(self):
+        self.setup_queries()
+        self.assertGreater(self.setup_queries(typed=True), 1)
+        self.assertEqual(self.query("SELECT version FROM blog_analysis.catalog_versions"), [('2-typed',)])
+        self.assertEqual(self.query("SELECT data_type FROM information_schema.columns "
+                                    "WHERE table_name = 'votes' AND column_name = 'Id'"), [('BIGINT',)])
+
+    def test_factory_imports_jobs_lazily(self):
+        code = ("import sys; import coffeebeans_dataeng_exercise.batch.batch_factory; "
+                "print('coffeebeans_dataeng_exercise.ingest_jobs.ingest_data' in sys.modules)")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import unittest
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.constants.constants import OperationType, SchemaType
+from coffeebeans_dataeng_exercise.maintenance_jobs.compact_votes import CompactVotes
+from tests.warehouse_test_case import WarehouseTestCase
+
+VOTES = "SELECT * EXCLUDE (year_week) FROM blog_analysis.votes ORDER BY Id;"
+
+
+# Votes with Ids 0 to count - 1, spread over 100 days from the offset, in decreasing date order
+GENERATE_VOTES = ("COPY (SELECT CAST(i AS VARCHAR) AS Id, CAST(i % 97 AS VARCHAR) AS UserId, "
+                  "CAST(i % 13 AS VARCHAR) AS PostId, '2' AS VoteTypeId, "
+                  "strftime(DATE '2022-01-01' + CAST({day_offset} + 99 - i % 100 AS INTEGER), '%Y-%m-%dT%H:%M:%S.000') "
+                  "AS CreationDate FROM range({count}) t(i)) TO '{file_path}' (FORMAT JSON);")
+
+
+class CompactVotesTest(WarehouseTestCase):
+
+    def compact(self, **options):
+        job = BatchFactory.operation(OperationType.MAINTENANCE, [SchemaType.VOTES], self.db_file, **options)
+        job.run(None)
+        return job
+
+    def test_factory_returns_the_maintenance_job(self):
+        self.assertIsInstance(self.compact(), CompactVotes)
+
+    def test_votes_rewritten_in_creation_date_order(self):
+        self.ingest('tests/resources/votes.jsonl')
+        votes = self.query(VOTES)
+        self.compact()
+        self.assertEqual(self.query(VOTES), votes)
+        stored_dates = [date for date, in self.query("SELECT CreationDate FROM blog_analysis.votes ORDER BY rowid;")]
+        self.assertEqual(stored_dates, sorted(stored_dates))
+        # Still upserted into after the rewrite, the primary key being kept
+        self.ingest('tests/resources/votes.jsonl')
+        self.assertEqual(self.query(VOTES), votes)
+
+    def test_report_of_a_compaction_after_upserts(self):
+        file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+        for day_offset in (0, 10):
+            # Every vote updated: the previous versions of the rows leave free blocks behind
+            duckdb.execute(GENERATE_VOTES.format(day_offset=day_offset, count=20000, file_path=file_path))
+            self.ingest(file_path)
+        votes = self.query(VOTES)
+        job = self.compact()
+        before, after = job.report["before"], job.report["after"]
+        self.assertEqual(set(before), {"size_bytes", "wal_bytes", "row_groups", "used_blocks", "free_blocks"})
+        self.assertLess(after["size_bytes"], before["size_bytes"])
+        self.assertEqual(after["free_blocks"], 0)
+        self.assertEqual(after["wal_bytes"], 0)
+        self.assertEqual(after["size_bytes"], os.path.getsize(self.db_file))
+        self.assertEqual(job.metrics.gauges["row_groups_after"], after["row_groups"])
+        self.assertEqual(self.query(VOTES), votes)
+        self.assertFalse(os.path.exists(self.db_file + '.compacted'))
+
+    def test_rewrite_without_compacting_the_file(self):
+        self.ingest('tests/resources/votes.jsonl')
+        job = self.compact(compact_file=False)
+        self.assertEqual(job.report["after"]["wal_bytes"], 0)
+        with self.assertRaises(ValueError):
+            CompactVotes(self.db_file, pool=object())
+
+    def test_ingestion_checkpoints_after_the_rows_written(self):
+        wal_file = self.db_file + '.wal'
+        job = BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file, checkpoint_rows=10)
+        job.setup()
+        job.transform('tests/resources/votes.jsonl')
+        # The 16 votes were written in one transaction, checkpointed after its commit
+        self.assertEqual(job.metrics.counters["checkpoints"], 1)
+        self.assertFalse(os.path.exists(wal_file) and os.path.getsize(wal_file) > 0)
+        job.close_connection()
+
+        job = BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file,
+                                     checkpoint_rows=1000, chunk_size=512)
+        job.setup()
+        job.transform('tests/resources/votes.jsonl')
+        # Below the threshold: the chunks are left in the WAL
+        self.assertNotIn("checkpoints", job.metrics.counters)
+        self.assertGreater(os.path.getsize(wal_file), 0)
+        job.close_connection()
+
+
+if __name__ == "__main__":
+    unittest.main()
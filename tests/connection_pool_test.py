@@ -0,0 +1,53 @@
+import threading
+import unittest
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.constants.constants import OperationType, SchemaType
+from coffeebeans_dataeng_exercise.db.connection_pool import ConnectionPool
+from tests.warehouse_test_case import WarehouseTestCase
+
+
+class ConnectionPoolTest(WarehouseTestCase):
+
+    def test_jobs_borrow_connection(self):
+        pool = ConnectionPool(self.db_file, threads=2, memory_limit='512MB', preserve_insertion_order=False)
+        try:
+            BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file,
+                                   pool=pool).run('tests/resources/votes.jsonl')
+            BatchFactory.operation(OperationType.OUTLIER, [SchemaType.VOTES, SchemaType.OUTLIER], self.db_file,
+                                   pool=pool).run(None)
+            # The connection of the thread is still open and shared by both jobs
+            connection = pool.connection()
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM blog_analysis.outlier_weeks;").fetchone()[0], 6)
+            self.assertEqual(connection.execute("SELECT current_setting('threads');").fetchone()[0], 2)
+            self.assertFalse(connection.execute(
+                "SELECT current_setting('preserve_insertion_order');").fetchone()[0])
+        finally:
+            pool.close()
+
+    def test_connection_per_thread(self):
+        pool = ConnectionPool(self.db_file)
+        try:
+            connections = []
+            thread = threading.Thread(target=lambda: connections.append(pool.connection()))
+            thread.start()
+            thread.join()
+            self.assertIs(pool.connection(), pool.connection())
+            self.assertIsNot(connections[0], pool.connection())
+        finally:
+            pool.close()
+
+    def test_read_only_pool(self):
+        duckdb.connect(self.db_file).close()
+        pool = ConnectionPool(self.db_file, read_only=True)
+        try:
+            with self.assertRaises(duckdb.Error):
+                pool.connection().execute("CREATE TABLE t (x INTEGER);")
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import unittest
+from unittest import mock
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.constants.constants import BackendType, OperationType, SchemaType, StorageType
+from coffeebeans_dataeng_exercise.dask_jobs.shards import (dedup_shard, merge_weekly_counts, split_shards,
+                                                           weekly_partial_counts)
+from tests.warehouse_test_case import WarehouseTestCase
+
+
+class DaskJobsTest(WarehouseTestCase):
+
+    expected_outliers = [(2022, '00', 1), (2022, '01', 3), (2022, '02', 3),
+                         (2022, '05', 1), (2022, '06', 1), (2022, '08', 1)]
+
+    def write_votes(self, file_path, count):
+        with open(file_path, 'w') as data:
+            for i in range(count):
+                data.write(f'{{"Id":"{i % 40}","UserId":"1","PostId":"{i}","VoteTypeId":"2",'
+                           f'"BountyAmount":"0","CreationDate":"2022-0{i % 3 + 1}-{i % 28 + 1:02d}T00:00:00.000"}}\n')
+
+    def test_shards_cover_every_line_once(self):
+        file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+        self.write_votes(file_path, 50)
+        shards = split_shards([file_path], 700)
+        self.assertGreater(len(shards), 1)
+        columns = "{'Id': 'VARCHAR', 'UserId': 'VARCHAR', 'PostId': 'VARCHAR', 'VoteTypeId': 'VARCHAR', " \
+                  "'BountyAmount': 'VARCHAR', 'CreationDate': 'VARCHAR'}"
+        results = [dedup_shard(path, start, end, os.path.join(self.tmp_dir, f'shard_{index}.parquet'), columns)
+                   for index, (path, start, end) in enumerate(shards)]
+        con = duckdb.connect()
+        files = [output_path for output_path, row_count in results if row_count]
+        post_ids = con.execute(f"SELECT PostId FROM read_parquet({files})").fetchall()
+        self.assertEqual(sorted(int(post_id) for post_id, in post_ids), list(range(50)))
+
+    def test_merge_weekly_counts(self):
+        merged = merge_weekly_counts([[(2022, '01', 2), (2022, '02', 1)], [(2022, '01', 3)]])
+        self.assertEqual(sorted(merged), [(2022, '01', 5), (2022, '02', 1)])
+
+    def test_weekly_partial_counts_with_and_without_partition_keys(self):
+        con = duckdb.connect()
+        con.execute("CREATE TABLE votes AS SELECT Id, CAST(CreationDate AS TIMESTAMP) AS CreationDate "
+                    "FROM read_json_auto('tests/resources/votes.jsonl');")
+        expected = con.execute("SELECT EXTRACT(year FROM CreationDate), strftime('%W', CreationDate :: date), "
+                               "COUNT(*) FROM votes GROUP BY 1, 2 ORDER BY ALL;").fetchall()
+        flat_file = os.path.join(self.tmp_dir, 'votes.parquet')
+        partitioned_dir = os.path.join(self.tmp_dir, 'partitioned')
+        con.execute(f"COPY votes TO '{flat_file}' (FORMAT PARQUET);")
+        con.execute(f"COPY (SELECT *, EXTRACT(year FROM CreationDate) AS year, "
+                    f"CAST(strftime('%W', CreationDate :: date) AS INTEGER) AS week FROM votes) "
+                    f"TO '{partitioned_dir}' (FORMAT PARQUET, PARTITION_BY (year, week));")
+        con.close()
+        partitioned_files = [os.path.join(root, name) for root, _, names in os.walk(partitioned_dir) for name in names]
+        self.assertEqual(sorted(weekly_partial_counts(flat_file)), expected)
+        self.assertEqual(sorted(merge_weekly_counts([weekly_partial_counts(path) for path in partitioned_files])),
+                         expected)
+
+    def test_dask_jobs_match_duckdb_jobs(self):
+        file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+        self.write_votes(file_path, 200)
+        BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file, backend=BackendType.DASK,
+                               n_workers=2, shard_size=2000).run(file_path)
+        with mock.patch('coffeebeans_dataeng_exercise.dask_jobs.dask_outlier.dask_client') as dask_client:
+            BatchFactory.operation(OperationType.OUTLIER, [SchemaType.VOTES, SchemaType.OUTLIER], self.db_file,
+                                   backend=BackendType.DASK, n_workers=2).run(None)
+        # The votes table is counted by DuckDB, without exporting it for the workers
+        dask_client.assert_not_called()
+        votes = self.query("SELECT * FROM blog_analysis.votes ORDER BY Id;")
+        outliers = self.query("SELECT * FROM blog_analysis.outlier_weeks;")
+        self.assertEqual(len(votes), 40)
+
+        os.remove(self.db_file)
+        BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file).run(file_path)
+        BatchFactory.operation(OperationType.OUTLIER, [SchemaType.VOTES, SchemaType.OUTLIER], self.db_file).run(None)
+        self.assertEqual(votes, self.query("SELECT * FROM blog_analysis.votes ORDER BY Id;"))
+        self.assertEqual(outliers, self.query("SELECT * FROM blog_analysis.outlier_weeks;"))
+
+    def test_dask_outliers_from_parquet_storage(self):
+        parquet_root = os.path.join(self.tmp_dir, 'parquet', 'votes')
+        BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file, backend=BackendType.DASK,
+                               n_workers=2, storage=StorageType.PARQUET,
+                               parquet_root=parquet_root).run('tests/resources/votes.jsonl')
+        BatchFactory.operation(OperationType.OUTLIER, [SchemaType.VOTES, SchemaType.OUTLIER], self.db_file,
+                               backend=BackendType.DASK, n_workers=2, storage=StorageType.PARQUET,
+                               parquet_root=parquet_root).run(None)
+        self.assertEqual(self.query("SELECT * FROM blog_analysis.outlier_weeks;"), self.expected_outliers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import time
+import unittest
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.ingest_jobs.ingest_daemon import IngestDaemon
+from tests.warehouse_test_case import WarehouseTestCase
+
+VOTE = '{{"Id":"{vote_id}","UserId":"7","PostId":"1","VoteTypeId":"2","BountyAmount":"0","CreationDate":"2022-01-03T00:00:00.000"}}\n'
+
+
+class IngestDaemonTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.landing_dir = os.path.join(self.tmp_dir, 'landing')
+        os.makedirs(self.landing_dir)
+
+    def land(self, name, vote_ids, mode='w'):
+        file_path = os.path.join(self.landing_dir, name)
+        with open(file_path, mode) as data:
+            for vote_id in vote_ids:
+                data.write(VOTE.format(vote_id=vote_id))
+        return file_path
+
+    def vote_ids(self):
+        con = duckdb.connect(self.db_file)
+        try:
+            return [row[0] for row in con.execute("SELECT Id FROM blog_analysis.votes ORDER BY Id::INT;").fetchall()]
+        finally:
+            con.close()
+
+    def test_files_are_committed_once_stable(self):
+        daemon = IngestDaemon(self.landing_dir, self.db_file, max_latency=0)
+        try:
+            first = self.land('a.jsonl', [1, 2])
+            # Only seen once: the file may still be written
+            self.assertEqual(daemon.poll_once(), [])
+            self.assertEqual(daemon.poll_once(), [os.path.normpath(first)])
+            # Unchanged files are not committed again
+            self.assertEqual(daemon.poll_once(), [])
+            self.land('a.jsonl', [3], mode='a')
+            self.land('b.jsonl', [4])
+            daemon.poll_once()
+            self.assertEqual(len(daemon.poll_once()), 2)
+        finally:
+            daemon.close()
+        self.assertEqual(self.vote_ids(), ['1', '2', '3', '4'])
+        self.assertEqual(daemon.metrics.counters['batches'], 2)
+        self.assertEqual(daemon.metrics.counters['files_ingested'], 3)
+
+    def test_micro_batch_thresholds(self):
+        daemon = IngestDaemon(self.landing_dir, self.db_file, max_batch_bytes=1024 * 1024, max_latency=60)
+        try:
+            self.land('a.jsonl', [1])
+            landed_at = os.path.getmtime(os.path.join(self.landing_dir, 'a.jsonl'))
+            daemon.poll_once(now=landed_at)
+            # Ready, but below the size threshold and landed less than max_latency ago
+            self.assertEqual(daemon.poll_once(now=landed_at + 1), [])
+            self.assertEqual(len(daemon.pending), 1)
+            self.assertEqual(len(daemon.poll_once(now=landed_at + 60)), 1)
+
+            daemon.max_batch_bytes = 1
+            self.land('b.jsonl', [2])
+            daemon.poll_once(now=landed_at)
+            self.assertEqual(len(daemon.poll_once(now=landed_at)), 1)
+        finally:
+            daemon.close()
+        self.assertEqual(self.vote_ids(), ['1', '2'])
+
+    def test_run_forever_exports_freshness(self):
+        metrics_file = os.path.join(self.tmp_dir, 'metrics.json')
+        daemon = IngestDaemon(self.landing_dir, self.db_file, max_latency=0, poll_interval=0.01,
+                              metrics_file=metrics_file)
+        self.land('a.jsonl', [1, 2, 3])
+        thread = threading.Thread(target=daemon.run_forever, kwargs={"max_batches": 1})
+        thread.start()
+        thread.join(timeout=30)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(self.vote_ids()), 3)
+        with open(metrics_file) as data:
+            metrics = json.load(data)
+        self.assertEqual(metrics['counters']['batches'], 1)
+        self.assertGreaterEqual(metrics['gauges']['freshness_seconds'], 0)
+        self.assertLessEqual(metrics['gauges']['last_commit_timestamp_seconds'], time.time())
+
+    def test_failed_batch_is_retried(self):
+        daemon = IngestDaemon(self.landing_dir, self.db_file, max_latency=0)
+        try:
+            broken = os.path.join(self.landing_dir, 'a.jsonl')
+            with open(broken, 'w') as data:
+                data.write('{"Id": \n')
+            daemon.poll_once()
+            self.assertEqual(daemon.poll_once(), [])
+            # Fixed in place: committed once stable again
+            self.land('a.jsonl', [1])
+            daemon.poll_once()
+            self.assertEqual(daemon.poll_once(), [os.path.normpath(broken)])
+        finally:
+            daemon.close()
+        self.assertEqual(self.vote_ids(), ['1'])
+
+
+if __name__ == "__main__":
+    unittest.main()
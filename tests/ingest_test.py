@@ -2,13 +2,32 @@ import unittest
 import logging
 import duckdb
 import os
+import gzip
+import importlib.util
+import json
+import shutil
 from datetime import datetime
+from decimal import Decimal
 from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
 from coffeebeans_dataeng_exercise.constants.constants import SchemaType, OperationType, FILE_PATH
+from coffeebeans_dataeng_exercise.constants.constants import CompressionType, StorageType, WriteStrategy
+from coffeebeans_dataeng_exercise.ingest_jobs.compression import detect_compression
+from coffeebeans_dataeng_exercise.ingest_jobs.file_chunks import iter_line_chunks
+from coffeebeans_dataeng_exercise.ingest_jobs.input_files import resolve_input_files
+from tests.warehouse_test_case import WarehouseTestCase
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Week of every vote as computed per row before the week key was stored
+STRFTIME_WEEKS = ("SELECT Id, EXTRACT(year FROM CreationDate) * 100 + CAST(strftime('%W', CreationDate :: date) AS INTEGER) "
+                  "FROM blog_analysis.votes ORDER BY Id;")
+
+
+def read_records(file_path):
+    with open(file_path) as data:
+        return [json.loads(line) for line in data]
+
 class IngestTest(unittest.TestCase):
 
     @classmethod
@@ -75,9 +94,557 @@ class IngestTest(unittest.TestCase):
     def test_correct_column_names(self):
         con = duckdb.connect(self.db_file)
         result = con.execute(f"DESCRIBE {self.schema}.{self.table};").fetchall()
-        expected_columns = ['Id', 'UserId', 'PostId', 'VoteTypeId', 'BountyAmount','CreationDate']
+        expected_columns = ['Id', 'UserId', 'PostId', 'VoteTypeId', 'BountyAmount','CreationDate', 'year_week']
         self.assertEqual([row[0] for row in result], expected_columns)
         con.close()
 
+
+class InputFilesTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.landing_dir = os.path.join(self.tmp_dir, 'landing')
+        os.makedirs(self.landing_dir)
+        with open('tests/resources/votes.jsonl') as data:
+            lines = data.read().splitlines()
+        # Split the sample file in two daily drops sharing one duplicated record
+        self.write('votes-2022-01-01.jsonl', lines[:10])
+        self.write('votes-2022-01-02.jsonl', lines[9:])
+        self.write('notes.txt', ['not a vote file'])
+
+    def write(self, name, lines):
+        with open(os.path.join(self.landing_dir, name), 'w') as data:
+            data.write('\n'.join(lines) + '\n')
+
+    def test_resolve_directory(self):
+        files = resolve_input_files(self.landing_dir)
+        self.assertEqual([os.path.basename(f) for f in files],
+                         ['votes-2022-01-01.jsonl', 'votes-2022-01-02.jsonl'])
+
+    def test_resolve_glob_and_list_deduplicates(self):
+        pattern = os.path.join(self.landing_dir, 'votes-*.jsonl')
+        first_file = os.path.join(self.landing_dir, 'votes-2022-01-01.jsonl')
+        files = resolve_input_files([first_file, pattern])
+        self.assertEqual(len(files), 2)
+        self.assertEqual(files[0], first_file)
+
+    def test_resolve_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            resolve_input_files(os.path.join(self.landing_dir, 'missing.jsonl'))
+
+    def test_ingest_directory(self):
+        self.ingest(self.landing_dir)
+        result = self.query("SELECT COUNT(*), COUNT(DISTINCT Id) FROM blog_analysis.votes;")
+        self.assertEqual(result, [(16, 16)])
+
+
+class IngestManifestTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+        # Every record carries every column, so that any slice of the file has the same schema
+        self.lines = [
+            f'{{"Id":"{i}","UserId":"{i % 3}","PostId":"{i % 5}","VoteTypeId":"2","BountyAmount":"0",'
+            f'"CreationDate":"2022-01-{i + 1:02d}T00:00:00.000"}}'
+            for i in range(16)
+        ]
+        with open(self.file_path, 'w') as data:
+            data.write('\n'.join(self.lines[:10]) + '\n')
+
+    def ingest(self, file_path, **options):
+        return super().ingest(file_path, incremental=True, **options)
+
+    def test_manifest_records_file(self):
+        self.ingest(self.file_path)
+        result = self.query("SELECT file_path, file_size, high_water_mark FROM blog_analysis.ingest_manifest;")
+        size = os.path.getsize(self.file_path)
+        self.assertEqual(result, [(os.path.abspath(self.file_path), size, size)])
+
+    def test_unchanged_file_is_skipped(self):
+        self.ingest(self.file_path)
+        # Rows removed behind the manifest's back are not reloaded for an unchanged file
+        self.query("DELETE FROM blog_analysis.votes;")
+        self.ingest(self.file_path)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;")[0][0], 0)
+
+    def test_appended_tail_is_ingested(self):
+        self.ingest(self.file_path)
+        self.query("DELETE FROM blog_analysis.votes;")
+        with open(self.file_path, 'a') as data:
+            data.write('\n'.join(self.lines[10:]) + '\n')
+        self.ingest(self.file_path)
+        # Only the appended lines were read
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;")[0][0], len(self.lines) - 10)
+        result = self.query("SELECT file_size, high_water_mark FROM blog_analysis.ingest_manifest;")
+        self.assertEqual(result, [(os.path.getsize(self.file_path),) * 2])
+
+    def test_rewritten_file_is_ingested_again(self):
+        self.ingest(self.file_path)
+        self.query("DELETE FROM blog_analysis.votes;")
+        with open(self.file_path, 'w') as data:
+            data.write('\n'.join(self.lines[5:]) + '\n')
+        self.ingest(self.file_path)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;")[0][0], len(self.lines) - 5)
+
+    def test_rewritten_file_records_its_last_newline(self):
+        self.ingest(self.file_path)
+        with open(self.file_path, 'w') as data:
+            # Longer than the ingested prefix, which no longer matches
+            data.write('\n'.join(reversed(self.lines)) + '\n' + self.lines[0][:20])
+        self.ingest(self.file_path)
+        with open(self.file_path, 'rb') as data:
+            last_newline = data.read().rfind(b'\n') + 1
+        result = self.query("SELECT file_size, high_water_mark FROM blog_analysis.ingest_manifest;")
+        self.assertEqual(result, [(os.path.getsize(self.file_path), last_newline)])
+        # The prefix up to the high-water mark matches on the next run: only the new lines are read
+        self.query("DELETE FROM blog_analysis.votes;")
+        with open(self.file_path, 'a') as data:
+            data.write(self.lines[0][20:] + '\n')
+        self.ingest(self.file_path)
+        self.assertEqual(self.query("SELECT Id FROM blog_analysis.votes;"), [('0',)])
+
+    def test_truncated_last_line_is_left_for_the_next_run(self):
+        with open(self.file_path, 'a') as data:
+            # A record still being written
+            data.write(self.lines[10][:30])
+        self.ingest(self.file_path)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;")[0][0], 10)
+        with open(self.file_path, 'a') as data:
+            # Completed without a trailing newline: a whole record, read as well
+            data.write(self.lines[10][30:] + '\n' + self.lines[11])
+        self.ingest(self.file_path)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;")[0][0], 12)
+        result = self.query("SELECT file_size, high_water_mark FROM blog_analysis.ingest_manifest;")
+        self.assertEqual(result, [(os.path.getsize(self.file_path),) * 2])
+
+    def test_copied_file_is_skipped(self):
+        self.ingest(self.file_path)
+        self.query("DELETE FROM blog_analysis.votes;")
+        copy_path = os.path.join(self.tmp_dir, 'votes-copy.jsonl')
+        shutil.copyfile(self.file_path, copy_path)
+        self.ingest(copy_path)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;")[0][0], 0)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.ingest_manifest;")[0][0], 2)
+
+
+class TypedVotesTest(WarehouseTestCase):
+
+    file_path = 'tests/resources/votes.jsonl'
+
+    def assert_typed(self):
+        result = self.query("DESCRIBE blog_analysis.votes;")
+        self.assertEqual([row[:2] for row in result],
+                         [('Id', 'BIGINT'), ('UserId', 'BIGINT'), ('PostId', 'BIGINT'),
+                          ('VoteTypeId', 'SMALLINT'), ('BountyAmount', 'DECIMAL(18,2)'),
+                          ('CreationDate', 'TIMESTAMP'), ('year_week', 'INTEGER')])
+        result = self.query("SELECT * FROM blog_analysis.votes WHERE Id = 1;")
+        self.assertEqual(result, [(1, 1, 1, 2, Decimal('50.00'), datetime(2022, 1, 2, 0, 0), 202200)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;")[0][0], 16)
+
+    def test_ingest_typed(self):
+        self.ingest(self.file_path, typed=True)
+        self.assert_typed()
+
+    def test_migrate_string_table(self):
+        self.ingest(self.file_path)
+        self.assertEqual(self.query("SELECT typeof(Id) FROM blog_analysis.votes LIMIT 1;")[0][0], 'VARCHAR')
+        self.ingest(self.file_path, typed=True)
+        self.assert_typed()
+
+    def test_outliers_on_typed_table(self):
+        self.ingest(self.file_path, typed=True)
+        self.detect_outliers()
+        self.assertEqual(len(self.query("SELECT * FROM blog_analysis.outlier_weeks;")), 6)
+
+
+class StreamingIngestTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+
+    def write_votes(self, records):
+        with open(self.file_path, 'w') as data:
+            for vote_id, post_id, day in records:
+                data.write(f'{{"Id":"{vote_id}","UserId":"1","PostId":"{post_id}","VoteTypeId":"2",'
+                           f'"BountyAmount":"0","CreationDate":"2022-01-{day:02d}T00:00:00.000"}}\n')
+
+    def test_chunks_split_on_line_boundaries(self):
+        self.write_votes([(i, i, 1) for i in range(10)])
+        with open(self.file_path, 'rb') as data:
+            lines = data.read().splitlines(keepends=True)
+        chunk_path = os.path.join(self.tmp_dir, 'chunk.jsonl')
+        chunks = []
+        first_lines = []
+        for chunk, first_line in iter_line_chunks(self.file_path, 250, chunk_path):
+            with open(chunk, 'rb') as data:
+                chunks.append(data.read())
+            first_lines.append(first_line)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(first_lines[1], chunks[0].count(b'\n') + 1)
+        self.assertTrue(all(chunk.endswith(b'\n') for chunk in chunks))
+        self.assertEqual(b''.join(chunks), b''.join(lines))
+
+    def test_line_longer_than_chunk(self):
+        self.write_votes([(1, 1, 1), (2, 2, 2)])
+        with open(self.file_path, 'ab') as data:
+            data.write(b'{"Id":"3"}')  # Last line without newline
+        chunk_path = os.path.join(self.tmp_dir, 'chunk.jsonl')
+        chunks = []
+        for chunk, _ in iter_line_chunks(self.file_path, 16, chunk_path):
+            with open(chunk, 'rb') as data:
+                chunks.append(data.read())
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[-1], b'{"Id":"3"}')
+
+    def test_streaming_matches_batch_ingestion(self):
+        self.write_votes([(i % 25, i, i % 28 + 1) for i in range(100)])
+        self.ingest(self.file_path, chunk_size=1000)
+        streamed = self.query("SELECT * FROM blog_analysis.votes ORDER BY Id;")
+        self.assertEqual(len(streamed), 25)
+        os.remove(self.db_file)
+        self.ingest(self.file_path)
+        self.assertEqual(streamed, self.query("SELECT * FROM blog_analysis.votes ORDER BY Id;"))
+
+    def test_latest_record_wins_across_chunks(self):
+        # The newer version of Id 1 comes first, in another chunk than the older one
+        self.write_votes([(1, 20, 9)] + [(i, i, 1) for i in range(2, 10)] + [(1, 10, 1)])
+        self.ingest(self.file_path, chunk_size=200, memory_limit='256MB',
+                    temp_directory=os.path.join(self.tmp_dir, 'spill'))
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;")[0][0], 9)
+        self.assertEqual(self.query("SELECT PostId FROM blog_analysis.votes WHERE Id = '1';"), [('20',)])
+
+
+class ExplicitSchemaTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+
+    def test_file_without_optional_columns(self):
+        with open(self.file_path, 'w') as data:
+            data.write('{"Id":"1","PostId":"1","VoteTypeId":"2","CreationDate":"2022-01-02T00:00:00.000"}\n')
+        self.ingest(self.file_path)
+        self.assertEqual(self.query("SELECT Id, UserId, BountyAmount FROM blog_analysis.votes;"), [('1', None, None)])
+
+    def test_typed_parse(self):
+        self.ingest('tests/resources/votes.jsonl', typed=True)
+        result = self.query("SELECT Id, BountyAmount, CreationDate FROM blog_analysis.votes WHERE Id = 1;")
+        self.assertEqual(result[0][0], 1)
+        self.assertEqual(str(result[0][1]), '50.00')
+        self.assertEqual(str(result[0][2]), '2022-01-02 00:00:00')
+
+    def test_malformed_file_fails_fast(self):
+        with open(self.file_path, 'w') as data:
+            data.write('{"Id":"1","PostId":"1","VoteTypeId":"2","CreationDate":"2022-01-02T00:00:00.000"}\n')
+            data.write('{"Id":"two","PostId":"1","VoteTypeId":"2","CreationDate":"2022-01-02T00:00:00.000"}\n')
+        with self.assertRaises(duckdb.Error):
+            self.ingest(self.file_path, typed=True)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;"), [(0,)])
+
+    def test_chunks_missing_columns(self):
+        # Chunks of the sample file lack UserId and BountyAmount: the explicit schema still applies
+        self.ingest('tests/resources/votes.jsonl', chunk_size=300)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;"), [(16,)])
+
+
+class WriteStrategyTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.updates_path = os.path.join(self.tmp_dir, 'updates.jsonl')
+        with open(self.updates_path, 'w') as data:
+            # A changed vote, an unchanged vote and a new vote
+            data.write('{"Id":"2","PostId":"9","VoteTypeId":"2","CreationDate":"2022-01-09T00:00:00.000"}\n')
+            data.write('{"Id":"4","PostId":"1","VoteTypeId":"2","CreationDate":"2022-01-09T00:00:00.000"}\n')
+            data.write('{"Id":"100","PostId":"1","VoteTypeId":"2","CreationDate":"2022-01-09T00:00:00.000"}\n')
+
+    def post_ids(self, table='votes'):
+        return self.query(f"SELECT Id, PostId FROM blog_analysis.{table} WHERE Id IN ('2', '4', '100') ORDER BY Id;")
+
+    def test_insert_new_only(self):
+        self.ingest('tests/resources/votes.jsonl')
+        self.ingest(self.updates_path, write_strategy=WriteStrategy.INSERT_NEW_ONLY)
+        # The stored vote 2 is kept, the new vote 100 is added
+        self.assertEqual(self.post_ids(), [('100', '1'), ('2', '1'), ('4', '1')])
+
+    def test_merge_changed_only(self):
+        self.ingest('tests/resources/votes.jsonl')
+        self.ingest(self.updates_path, write_strategy=WriteStrategy.MERGE_CHANGED_ONLY)
+        self.assertEqual(self.post_ids(), [('100', '1'), ('2', '9'), ('4', '1')])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;"), [(17,)])
+
+    def test_replay_keeps_weekly_counts(self):
+        self.ingest('tests/resources/votes.jsonl')
+        self.detect_outliers(materialized=True)
+        counts = self.query("SELECT * FROM blog_analysis.weekly_vote_counts ORDER BY ALL;")
+        for strategy in [WriteStrategy.INSERT_NEW_ONLY, WriteStrategy.MERGE_CHANGED_ONLY]:
+            self.ingest('tests/resources/votes.jsonl', write_strategy=strategy)
+        self.assertEqual(self.query("SELECT * FROM blog_analysis.weekly_vote_counts ORDER BY ALL;"), counts)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;"), [(16,)])
+
+    def test_parquet_replay_rewrites_nothing(self):
+        parquet_root = os.path.join(self.tmp_dir, 'parquet', 'votes')
+        self.ingest('tests/resources/votes.jsonl', storage=StorageType.PARQUET, parquet_root=parquet_root)
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(parquet_root) for name in names)
+        mtimes = [os.path.getmtime(path) for path in files]
+        self.ingest('tests/resources/votes.jsonl', storage=StorageType.PARQUET, parquet_root=parquet_root,
+                    write_strategy=WriteStrategy.MERGE_CHANGED_ONLY)
+        self.assertEqual([os.path.getmtime(path) for path in files], mtimes)
+        self.ingest(self.updates_path, storage=StorageType.PARQUET, parquet_root=parquet_root,
+                    write_strategy=WriteStrategy.MERGE_CHANGED_ONLY)
+        self.assertEqual(self.post_ids('votes_parquet'), [('100', '1'), ('2', '9'), ('4', '1')])
+
+
+class TolerantIngestTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+
+    @staticmethod
+    def vote(vote_id, creation_date="2022-01-03T00:00:00.000"):
+        return (f'{{"Id":"{vote_id}","UserId":"1","PostId":"{vote_id}","VoteTypeId":"2",'
+                f'"BountyAmount":"0","CreationDate":"{creation_date}"}}')
+
+    def write_lines(self, lines):
+        with open(self.file_path, 'w') as data:
+            data.write("\n".join(lines) + "\n")
+
+    def write_malformed_batch(self):
+        self.write_lines([
+            self.vote(1),
+            '{"Id":"2","PostId":',
+            self.vote(3, creation_date="not a date"),
+            '{"PostId":"4"}',
+            self.vote(5),
+        ])
+
+    def test_malformed_records_are_rejected(self):
+        self.write_malformed_batch()
+        self.ingest(self.file_path, tolerant=True)
+        self.assertEqual(self.query("SELECT Id FROM blog_analysis.votes ORDER BY Id"), [('1',), ('5',)])
+        rejects = self.query("SELECT file_path, line_number, reason FROM blog_analysis.votes_rejects "
+                             "ORDER BY line_number")
+        self.assertEqual([row[1] for row in rejects], [2, 3, 4])
+        self.assertTrue(all(row[0] == self.file_path for row in rejects))
+        self.assertTrue(all(row[2] for row in rejects))
+
+    def test_malformed_date_is_counted_before_the_cast(self):
+        self.write_lines([self.vote(1), self.vote(2, creation_date="2022-13-45T00:00:00.000")])
+        job = BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file, tolerant=True)
+        try:
+            self.assertEqual(job.count_invalid_votes([self.file_path]), 1)
+        finally:
+            job.close_connection()
+        self.ingest(self.file_path, tolerant=True)
+        self.assertEqual(self.query("SELECT Id FROM blog_analysis.votes"), [('1',)])
+        self.assertEqual(self.query("SELECT line_number, reason FROM blog_analysis.votes_rejects"),
+                         [(2, "invalid CreationDate: '2022-13-45T00:00:00.000'")])
+
+    def test_rejects_are_numbered_across_chunks(self):
+        self.write_lines([self.vote(vote_id) for vote_id in range(1, 20)] + ['not json'])
+        self.ingest(self.file_path, tolerant=True, chunk_size=300)
+        self.assertEqual(self.query("SELECT count(*) FROM blog_analysis.votes"), [(19,)])
+        self.assertEqual(self.query("SELECT line_number, line FROM blog_analysis.votes_rejects"),
+                         [(20, 'not json')])
+
+    def test_valid_batch_has_no_rejects(self):
+        self.write_lines([self.vote(1), self.vote(2)])
+        self.ingest(self.file_path, tolerant=True)
+        self.assertEqual(self.query("SELECT count(*) FROM blog_analysis.votes"), [(2,)])
+        self.assertEqual(self.query("SELECT count(*) FROM blog_analysis.votes_rejects"), [(0,)])
+
+    def test_strict_mode_fails_on_malformed_records(self):
+        self.write_malformed_batch()
+        with self.assertRaises(duckdb.Error):
+            self.ingest(self.file_path)
+
+
+class CompressedInputTest(WarehouseTestCase):
+
+    @staticmethod
+    def votes(vote_ids):
+        return "".join(f'{{"Id":"{vote_id}","UserId":"1","PostId":"{vote_id}","VoteTypeId":"2",'
+                       f'"BountyAmount":"0","CreationDate":"2022-01-03T00:00:00.000"}}\n'
+                       for vote_id in vote_ids).encode()
+
+    def write_gzip_members(self, name, *members):
+        file_path = os.path.join(self.tmp_dir, name)
+        with open(file_path, 'wb') as data:
+            for member in members:
+                data.write(gzip.compress(self.votes(member)))
+        return file_path
+
+    def write_zstd(self, name, vote_ids):
+        # DuckDB writes the zstd file, so that the test does not need a zstd package
+        plain_path = os.path.join(self.tmp_dir, name + '.plain')
+        with open(plain_path, 'wb') as data:
+            data.write(self.votes(vote_ids))
+        file_path = os.path.join(self.tmp_dir, name)
+        con = duckdb.connect()
+        try:
+            columns = {column: 'VARCHAR' for column in
+                       ('Id', 'UserId', 'PostId', 'VoteTypeId', 'BountyAmount', 'CreationDate')}
+            con.execute(f"COPY (SELECT * FROM read_json('{plain_path}', columns = {columns})) "
+                        f"TO '{file_path}' (FORMAT json, COMPRESSION zstd)")
+        finally:
+            con.close()
+        os.remove(plain_path)
+        return file_path
+
+    def vote_ids(self):
+        return [row[0] for row in self.query("SELECT Id FROM blog_analysis.votes ORDER BY Id")]
+
+    def test_detects_compression_from_magic_bytes(self):
+        gzip_path = self.write_gzip_members('votes.data', [1])
+        zstd_path = self.write_zstd('votes.jsonl.zst', [1])
+        plain_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+        with open(plain_path, 'wb') as data:
+            data.write(self.votes([1]))
+        self.assertEqual(detect_compression(gzip_path), CompressionType.GZIP)
+        self.assertEqual(detect_compression(zstd_path), CompressionType.ZSTD)
+        self.assertEqual(detect_compression(plain_path), CompressionType.NONE)
+
+    def test_directory_picks_up_compressed_files(self):
+        self.write_gzip_members('a.jsonl.gz', [1])
+        self.write_zstd('b.jsonl.zst', [2])
+        self.assertEqual([os.path.basename(path) for path in resolve_input_files(self.tmp_dir)],
+                         ['a.jsonl.gz', 'b.jsonl.zst'])
+
+    def test_ingests_concatenated_gzip_members(self):
+        file_path = self.write_gzip_members('votes.jsonl.gz', [1, 2], [3])
+        self.ingest(file_path)
+        self.assertEqual(self.vote_ids(), ['1', '2', '3'])
+
+    def test_ingests_zstd_and_unnamed_gzip_in_one_batch(self):
+        zstd_path = self.write_zstd('votes.jsonl.zst', [1, 2])
+        gzip_path = self.write_gzip_members('votes.export', [3])
+        self.ingest([zstd_path, gzip_path])
+        self.assertEqual(self.vote_ids(), ['1', '2', '3'])
+
+    def test_streams_gzip_in_chunks(self):
+        file_path = self.write_gzip_members('votes.jsonl.gz', range(10), range(10, 20))
+        self.ingest(file_path, chunk_size=500)
+        self.assertEqual(len(self.vote_ids()), 20)
+
+    def test_incremental_reads_appended_members(self):
+        file_path = self.write_gzip_members('votes.jsonl.gz', [1])
+        self.ingest(file_path, incremental=True)
+        with open(file_path, 'ab') as data:
+            data.write(gzip.compress(self.votes([2])))
+        self.ingest(file_path, incremental=True)
+        self.assertEqual(self.vote_ids(), ['1', '2'])
+
+
+class RecordIngestTest(WarehouseTestCase):
+
+    def job(self, db_file=None, **options):
+        return BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], db_file or self.db_file, **options)
+
+    def votes(self, db_file=None):
+        con = duckdb.connect(db_file or self.db_file)
+        try:
+            return con.execute("SELECT * FROM blog_analysis.votes ORDER BY Id;").fetchall()
+        finally:
+            con.close()
+
+    def test_dicts_match_file_ingestion(self):
+        file_db = os.path.join(self.tmp_dir, 'file.db')
+        self.job(file_db).run('tests/resources/votes.jsonl')
+        # A generator, staged and committed 5 records at a time
+        records = (record for record in read_records('tests/resources/votes.jsonl'))
+        self.job().run_records(records, batch_size=5)
+        self.assertEqual(self.votes(), self.votes(file_db))
+
+    def test_latest_record_wins_across_batches(self):
+        records = [
+            {"Id": "1", "PostId": "1", "VoteTypeId": "2", "CreationDate": "2022-01-09T00:00:00.000"},
+            {"Id": "1", "PostId": "1", "VoteTypeId": "3", "CreationDate": "2022-01-02T00:00:00.000"},
+            {"Id": "2", "PostId": "1", "VoteTypeId": "2", "CreationDate": "2022-01-03T00:00:00.000"},
+        ]
+        self.job().run_records(records, batch_size=1)
+        votes = self.votes()
+        self.assertEqual([vote[0] for vote in votes], ['1', '2'])
+        # The older record of the second batch does not replace the stored one; missing keys are NULL
+        self.assertEqual(votes[0][3], '2')
+        self.assertIsNone(votes[0][1])
+
+    def test_typed_dicts(self):
+        records = read_records('tests/resources/votes.jsonl')
+        self.job(typed=True).run_records(records)
+        votes = self.votes()
+        self.assertEqual(len(votes), 16)
+        self.assertIsInstance(votes[0][0], int)
+
+    @unittest.skipUnless(importlib.util.find_spec("pandas"), "pandas is not installed")
+    def test_dataframe(self):
+        import pandas
+
+        frame = pandas.DataFrame(read_records('tests/resources/votes.jsonl'), dtype=object)
+        self.job().run_records(frame)
+        self.assertEqual(len(self.votes()), 16)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_arrow_table_and_batches(self):
+        import pyarrow
+
+        table = pyarrow.Table.from_pylist(read_records('tests/resources/votes.jsonl'))
+        self.job().run_records(table)
+        self.assertEqual(len(self.votes()), 16)
+
+        batch_db = os.path.join(self.tmp_dir, 'batches.db')
+        self.job(batch_db).run_records(table.to_batches()[0])
+        self.assertEqual(self.votes(batch_db), self.votes())
+
+
+class YearWeekTest(WarehouseTestCase):
+
+    def assert_week_keys(self):
+        self.assertEqual(self.query("SELECT Id, year_week FROM blog_analysis.votes ORDER BY Id;"),
+                         self.query(STRFTIME_WEEKS))
+
+    def test_week_key_computed_at_load(self):
+        self.ingest('tests/resources/votes.jsonl')
+        self.assert_week_keys()
+        updates_path = os.path.join(self.tmp_dir, 'updates.jsonl')
+        with open(updates_path, 'w') as data:
+            # Move vote 1 to another year
+            data.write('{"Id":"1","UserId":"7","PostId":"1","VoteTypeId":"3","BountyAmount":"0","CreationDate":"2023-02-27T00:00:00.000"}\n')
+        self.ingest(updates_path)
+        self.assert_week_keys()
+        self.assertEqual(self.query("SELECT year_week FROM blog_analysis.votes WHERE Id = '1';"), [(202309,)])
+
+    def test_existing_table_is_migrated_in_week_order(self):
+        con = duckdb.connect(self.db_file)
+        try:
+            # A table left by a version without the week key
+            con.execute("CREATE SCHEMA blog_analysis;")
+            con.execute("CREATE TABLE blog_analysis.votes (Id STRING PRIMARY KEY, UserId STRING, PostId STRING, "
+                        "VoteTypeId STRING, BountyAmount STRING, CreationDate TIMESTAMP);")
+            con.execute("INSERT INTO blog_analysis.votes VALUES "
+                        "('103', '1', '1', '2', '0', '2022-03-01'), ('101', '1', '1', '2', '0', '2021-06-01'), "
+                        "('102', '1', '1', '2', '0', NULL);")
+        finally:
+            con.close()
+        self.ingest('tests/resources/votes.jsonl')
+        self.assert_week_keys()
+        # The migrated rows are stored ordered by their week key, the votes of the batch after them
+        self.assertEqual(self.query("SELECT Id, year_week FROM blog_analysis.votes LIMIT 3;"),
+                         [('101', 202122), ('103', 202209), ('102', None)])
+
+    def test_outlier_view_matches_strftime_weeks(self):
+        self.ingest('tests/resources/votes.jsonl')
+        self.detect_outliers()
+        weeks = self.query("SELECT EXTRACT(year FROM CreationDate) AS year, strftime('%W', CreationDate :: date) AS week_number, "
+                           "COUNT(*) FROM blog_analysis.votes GROUP BY 1, 2;")
+        average = sum(count for _, _, count in weeks) / len(weeks)
+        expected = sorted(week for week in weeks if abs(1.0 - week[2] / average) > 0.2)
+        result = self.query("SELECT * FROM blog_analysis.outlier_weeks;")
+        self.assertEqual(result, expected)
+        self.assertEqual([type(value) for value in result[0]], [int, str, int])
+
+
 if __name__ == "__main__":
     unittest.main()
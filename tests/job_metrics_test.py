@@ -0,0 +1,62 @@
+import json
+import os
+import unittest
+
+from coffeebeans_dataeng_exercise.batch.job_metrics import JobMetrics
+from tests.warehouse_test_case import WarehouseTestCase
+
+
+class JobMetricsTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+        with open(self.file_path, 'w') as data:
+            for vote_id in [1, 2, 2, 3]:
+                data.write(f'{{"Id":"{vote_id}","UserId":"1","PostId":"{vote_id}","VoteTypeId":"2",'
+                           f'"BountyAmount":"0","CreationDate":"2022-01-03T00:00:00.000"}}\n')
+
+    def test_stages_accumulate_and_nest(self):
+        metrics = JobMetrics('Job')
+        for _ in range(2):
+            with metrics.stage('transform'), metrics.stage('read'):
+                metrics.record_query('-- Read the files\nSELECT 1', 0.5)
+        metrics.record_query('SELECT 2', 0.25)
+        self.assertEqual(metrics.stages['read']['calls'], 2)
+        self.assertEqual(metrics.stages['read']['queries'], 2)
+        self.assertEqual(metrics.stages['read']['query_seconds'], 1.0)
+        self.assertEqual(metrics.stages['transform']['queries'], 0)
+        self.assertEqual(metrics.stages['other']['queries'], 1)
+
+    def test_ingest_records_stages_and_rows(self):
+        metrics = self.ingest(self.file_path).metrics
+        for stage in ['schema_setup', 'transform', 'read', 'upsert', 'commit']:
+            self.assertIn(stage, metrics.stages)
+        self.assertEqual(metrics.counters['rows_staged'], 3)
+        self.assertEqual(metrics.counters['rows_written'], 3)
+        self.assertEqual(metrics.counters['bytes_read'], os.path.getsize(self.file_path))
+
+    def test_writes_json_with_profiles(self):
+        metrics_file = os.path.join(self.tmp_dir, 'metrics', 'ingest.json')
+        self.ingest(self.file_path, metrics_file=metrics_file, profile=True)
+        with open(metrics_file) as data:
+            metrics = json.load(data)
+        self.assertEqual(metrics['job'], 'IngestVotes')
+        self.assertEqual(metrics['counters']['rows_written'], 3)
+        read_profiles = [profile for profile in metrics['profiles'] if profile['stage'] == 'read']
+        self.assertEqual(len(read_profiles), 1)
+        self.assertIn('children', read_profiles[0]['profile'])
+
+    def test_writes_prometheus_textfile(self):
+        metrics_file = os.path.join(self.tmp_dir, 'outliers.prom')
+        self.ingest(self.file_path)
+        self.detect_outliers(metrics_file=metrics_file)
+        with open(metrics_file) as data:
+            lines = data.read().splitlines()
+        self.assertIn('# TYPE exercise_batch_stage_seconds gauge', lines)
+        self.assertTrue(any(line.startswith('exercise_batch_stage_seconds{job="CalculateOutlier",stage="view_creation"} ')
+                            for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
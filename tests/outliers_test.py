@@ -2,8 +2,14 @@ import unittest
 import os
 import duckdb
 import logging
+from datetime import date, timedelta
+from unittest.mock import patch
 from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
 from coffeebeans_dataeng_exercise.constants.constants import SchemaType, OperationType, FILE_PATH
+from coffeebeans_dataeng_exercise.constants.constants import OutlierBaseline, OutlierMethod
+from coffeebeans_dataeng_exercise.outlier_jobs.detect_outlier import CalculateOutlier
+from coffeebeans_dataeng_exercise.outlier_jobs.outlier_rules import OutlierRule
+from tests.warehouse_test_case import WarehouseTestCase
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -107,5 +113,158 @@ class TestOutliers(unittest.TestCase):
         self.assertTrue(len(result) > 0)
         con.close()
 
+
+class MaterializedOutliersTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ingest('tests/resources/votes.jsonl')
+        self.detect_outliers()
+
+    def detect_outliers(self, **options):
+        return super().detect_outliers(materialized=True, **options)
+
+    def test_outliers_from_aggregate(self):
+        expected_outliers = [(2022, '00', 1), (2022, '01', 3), (2022, '02', 3),
+                             (2022, '05', 1), (2022, '06', 1), (2022, '08', 1)]
+        self.assertEqual(self.query("SELECT * FROM blog_analysis.outlier_weeks;"), expected_outliers)
+        self.assertEqual(self.query("SELECT SUM(vote_count) FROM blog_analysis.weekly_vote_counts;")[0][0], 16)
+
+    def test_ingestion_maintains_aggregate(self):
+        updates_path = os.path.join(self.tmp_dir, 'updates.jsonl')
+        with open(updates_path, 'w') as data:
+            # Move vote 1 to another week, replay vote 2 unchanged and add a vote in a new week
+            data.write('{"Id":"1","UserId":"7","PostId":"1","VoteTypeId":"2","BountyAmount":"0","CreationDate":"2022-02-27T00:00:00.000"}\n')
+            data.write('{"Id":"2","UserId":"7","PostId":"1","VoteTypeId":"2","BountyAmount":"0","CreationDate":"2022-01-09T00:00:00.000"}\n')
+            data.write('{"Id":"99","UserId":"7","PostId":"1","VoteTypeId":"2","BountyAmount":"0","CreationDate":"2022-03-07T00:00:00.000"}\n')
+        self.ingest(updates_path)
+
+        maintained = self.query("SELECT year, week_number, vote_count FROM blog_analysis.weekly_vote_counts "
+                                "ORDER BY ALL;")
+        recomputed = self.query("SELECT EXTRACT(year FROM CreationDate), strftime('%W', CreationDate :: date), "
+                                "COUNT(*) FROM blog_analysis.votes GROUP BY 1, 2 ORDER BY ALL;")
+        self.assertEqual(maintained, recomputed)
+        self.assertNotIn((2022, '00'), [row[:2] for row in maintained])
+
+    def test_refresh_rebuilds_aggregate(self):
+        self.query("DELETE FROM blog_analysis.votes WHERE Id = '1';")
+        self.detect_outliers(refresh=True)
+        self.assertEqual(self.query("SELECT SUM(vote_count) FROM blog_analysis.weekly_vote_counts;")[0][0], 15)
+
+
+class OutlierRulesTest(WarehouseTestCase):
+
+    def write_weekly_votes(self, counts):
+        # Week i holds counts[i] votes, cast on the Monday of the week
+        file_path = os.path.join(self.tmp_dir, 'votes.jsonl')
+        first_monday = date(2022, 1, 3)
+        vote_id = 0
+        with open(file_path, 'w') as data:
+            for week, count in enumerate(counts):
+                day = first_monday + timedelta(weeks=week)
+                for _ in range(count):
+                    vote_id += 1
+                    data.write(f'{{"Id":"{vote_id}","UserId":"1","PostId":"1","VoteTypeId":"{vote_id % 2 + 1}",'
+                               f'"BountyAmount":"0","CreationDate":"{day.isoformat()}T00:00:00.000"}}\n')
+        return file_path
+
+    def test_default_rule_matches_outlier_view(self):
+        self.ingest('tests/resources/votes.jsonl')
+        for materialized in (False, True):
+            self.detect_outliers(rules=[OutlierRule('global_mean')], materialized=materialized)
+            self.assertEqual(
+                self.query("SELECT year, week_number, vote_count FROM blog_analysis.outliers_global_mean"),
+                self.query("SELECT * FROM blog_analysis.outlier_weeks"))
+
+    def test_rolling_zscore(self):
+        self.ingest(self.write_weekly_votes([10, 11, 9, 10, 50]))
+        self.detect_outliers(rules=[OutlierRule('spikes', method=OutlierMethod.ZSCORE,
+                                                baseline=OutlierBaseline.ROLLING, weeks=4)])
+        self.assertEqual(self.query("SELECT week_number, vote_count, baseline FROM blog_analysis.outliers_spikes"),
+                         [('05', 50, 10.0)])
+
+    def test_rolling_baseline_counts_weeks_without_votes(self):
+        # Weeks 3 and 4 have no votes: the baseline of week 6 is week 5 alone
+        self.ingest(self.write_weekly_votes([10, 11, 0, 0, 12, 50]))
+        self.detect_outliers(rules=[OutlierRule('spikes', method=OutlierMethod.RELATIVE,
+                                                baseline=OutlierBaseline.ROLLING, weeks=2, threshold=1)])
+        self.assertEqual(self.query("SELECT week_number, vote_count, baseline FROM blog_analysis.outliers_spikes"),
+                         [('06', 50, 12.0)])
+
+    def test_rules_per_year_and_vote_type(self):
+        self.ingest('tests/resources/votes.jsonl')
+        rules = [OutlierRule('per_year', baseline=OutlierBaseline.YEAR),
+                 OutlierRule('robust', method=OutlierMethod.MAD, threshold=0.5)]
+        self.detect_outliers(rules=rules, dimensions=['VoteTypeId'])
+        expected_per_type = self.query("""
+            WITH counts AS (
+                SELECT EXTRACT(year FROM CreationDate) AS year, strftime('%W', CreationDate :: date) AS week_number,
+                       VoteTypeId, COUNT(*) AS vote_count
+                FROM blog_analysis.votes GROUP BY ALL
+            ), scored AS (
+                SELECT *, ABS(vote_count - median(vote_count) OVER (PARTITION BY VoteTypeId))
+                          / NULLIF(1.4826 * mad(vote_count) OVER (PARTITION BY VoteTypeId), 0) AS score
+                FROM counts
+            )
+            SELECT year, week_number, VoteTypeId, vote_count FROM scored WHERE score > 0.5
+            ORDER BY VoteTypeId, year, week_number""")
+        self.assertEqual(self.query("SELECT year, week_number, dimension_value, vote_count "
+                                    "FROM blog_analysis.outliers_robust_by_vote_type_id"), expected_per_type)
+        self.assertGreater(len(expected_per_type), 0)
+        self.assertTrue(all(row[0] is None for row in
+                            self.query("SELECT dimension_value FROM blog_analysis.outliers_per_year")))
+        # The shared counts only live for the duration of the run
+        self.assertEqual(self.query("SELECT count(*) FROM duckdb_tables() WHERE table_name = 'outlier_slice_counts'"),
+                         [(0,)])
+
+    def test_slices_of_several_dimensions(self):
+        self.ingest('tests/resources/votes.jsonl')
+        self.detect_outliers(dimensions=['VoteTypeId', 'PostId:2'], rule_threads=2)
+        self.assertEqual(self.query("SELECT year, week_number, vote_count FROM blog_analysis.outliers_weeks"),
+                         self.query("SELECT * FROM blog_analysis.outlier_weeks"))
+        top_posts = self.query("SELECT CAST(PostId AS VARCHAR) FROM blog_analysis.votes GROUP BY PostId "
+                               "ORDER BY count(*) DESC, CAST(PostId AS VARCHAR) LIMIT 2")
+        flagged_posts = self.query("SELECT DISTINCT dimension_value FROM blog_analysis.outliers_weeks_by_post_id")
+        self.assertTrue(set(flagged_posts) <= set(top_posts))
+        self.assertEqual(self.query("SELECT count(*) FROM duckdb_tables() WHERE table_name LIKE 'outliers_weeks%'"),
+                         [(3,)])
+
+    def test_failed_run_keeps_every_rule_table(self):
+        self.ingest('tests/resources/votes.jsonl')
+        rules = [OutlierRule('first'), OutlierRule('second')]
+        self.detect_outliers(rules=rules)
+        previous = self.query("SELECT * FROM blog_analysis.outliers_first")
+        self.query("DELETE FROM blog_analysis.votes WHERE Id IN ('1', '2', '3')")
+        evaluate_rule = CalculateOutlier.evaluate_rule
+
+        def fail_second(job, counts_schema, rule, dimension):
+            if rule.name == 'second':
+                raise RuntimeError("evaluation failed")
+            return evaluate_rule(job, counts_schema, rule, dimension)
+
+        with patch.object(CalculateOutlier, 'evaluate_rule', fail_second), self.assertRaises(RuntimeError):
+            self.detect_outliers(rules=rules, rule_threads=1)
+        # The table of the first rule was computed again, but not swapped in
+        self.assertEqual(self.query("SELECT * FROM blog_analysis.outliers_first"), previous)
+        self.assertEqual(self.query("SELECT count(*) FROM duckdb_tables() WHERE table_name LIKE '%__staged'"), [(0,)])
+        self.detect_outliers(rules=rules)
+        self.assertNotEqual(self.query("SELECT * FROM blog_analysis.outliers_first"), previous)
+
+    def test_unknown_dimension(self):
+        self.ingest('tests/resources/votes.jsonl')
+        with self.assertRaises(ValueError):
+            self.detect_outliers(dimensions=['Color'])
+
+    def test_parse_rule(self):
+        rule = OutlierRule.parse("name=spikes,method=mad,baseline=rolling,weeks=8")
+        self.assertEqual((rule.table(), rule.table('VoteTypeId'), rule.method, rule.baseline, rule.weeks,
+                          rule.threshold),
+                         ('outliers_spikes', 'outliers_spikes_by_vote_type_id', 'mad', 'rolling', 8, 3.5))
+        with self.assertRaises(ValueError):
+            OutlierRule.parse("name=Drop Table")
+        with self.assertRaises(ValueError):
+            OutlierRule.parse("name=spikes,color=red")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,87 @@
+import glob
+import os
+import unittest
+
+from coffeebeans_dataeng_exercise.constants.constants import StorageType
+from tests.warehouse_test_case import WarehouseTestCase
+
+
+class ParquetStorageTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.parquet_root = os.path.join(self.tmp_dir, 'parquet', 'votes')
+        self.ingest('tests/resources/votes.jsonl')
+
+    def ingest(self, file_path):
+        return super().ingest(file_path, storage=StorageType.PARQUET, parquet_root=self.parquet_root)
+
+    def test_partitions_written(self):
+        partitions = sorted(os.path.relpath(path, self.parquet_root)
+                            for path in glob.glob(os.path.join(self.parquet_root, 'year=*', 'week=*')))
+        self.assertEqual(len(partitions), 9)
+        self.assertIn(os.path.join('year=2022', 'week=1'), partitions)
+        # The DuckDB table is only used for its definition
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes;")[0][0], 0)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes_parquet;")[0][0], 16)
+
+    def test_partition_stats(self):
+        result = self.query("SELECT year, week, row_count FROM blog_analysis.votes_partitions ORDER BY year, week;")
+        self.assertEqual(result[:3], [(2022, 0, 1), (2022, 1, 3), (2022, 2, 3)])
+        self.assertEqual(sum(row[2] for row in result), 16)
+
+    def test_reingest_deduplicates_within_partition(self):
+        updates_path = os.path.join(self.tmp_dir, 'updates.jsonl')
+        with open(updates_path, 'w') as data:
+            data.write('{"Id":"2","UserId":"7","PostId":"9","VoteTypeId":"3","BountyAmount":"0",'
+                       '"CreationDate":"2022-01-09T00:00:00.000"}\n')
+        self.ingest(updates_path)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes_parquet;")[0][0], 16)
+        self.assertEqual(self.query("SELECT PostId FROM blog_analysis.votes_parquet WHERE Id = '2';"), [('9',)])
+        self.assertEqual(self.query("SELECT row_count FROM blog_analysis.votes_partitions "
+                                    "WHERE year = 2022 AND week = 1;"), [(3,)])
+
+    def test_reingest_moves_vote_to_another_week(self):
+        self.detect_outliers(storage=StorageType.PARQUET, parquet_root=self.parquet_root, materialized=True)
+        updates_path = os.path.join(self.tmp_dir, 'updates.jsonl')
+        with open(updates_path, 'w') as data:
+            # Vote 1 is the only vote of 2022 week 0
+            data.write('{"Id":"1","UserId":"7","PostId":"9","VoteTypeId":"3","BountyAmount":"0",'
+                       '"CreationDate":"2022-01-18T00:00:00.000"}\n')
+        self.ingest(updates_path)
+        self.assertEqual(self.query("SELECT year, week, PostId FROM blog_analysis.votes_parquet WHERE Id = '1';"),
+                         [(2022, 3, '9')])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM blog_analysis.votes_parquet;")[0][0], 16)
+        self.assertFalse(os.path.exists(os.path.join(self.parquet_root, 'year=2022', 'week=0')))
+        stats = self.query("SELECT year, week, row_count FROM blog_analysis.votes_partitions ORDER BY year, week;")
+        recounted = self.query("SELECT year, week, COUNT(*) FROM blog_analysis.votes_parquet GROUP BY 1, 2 ORDER BY 1, 2;")
+        self.assertEqual(stats, recounted)
+        maintained = self.query("SELECT year, week_number, vote_count FROM blog_analysis.weekly_vote_counts "
+                                "WHERE vote_count > 0 ORDER BY ALL;")
+        recomputed = self.query("SELECT EXTRACT(year FROM CreationDate), strftime('%W', CreationDate :: date), "
+                                "COUNT(*) FROM blog_analysis.votes_parquet GROUP BY 1, 2 ORDER BY ALL;")
+        self.assertEqual(maintained, recomputed)
+
+    def test_outliers_from_parquet(self):
+        self.detect_outliers(storage=StorageType.PARQUET, parquet_root=self.parquet_root)
+        self.assertEqual(len(self.query("SELECT * FROM blog_analysis.outlier_weeks;")), 6)
+
+    def test_ingestion_maintains_weekly_counts(self):
+        self.detect_outliers(storage=StorageType.PARQUET, parquet_root=self.parquet_root, materialized=True)
+        updates_path = os.path.join(self.tmp_dir, 'updates.jsonl')
+        with open(updates_path, 'w') as data:
+            # Update vote 2 within its week and add a vote in a new week
+            data.write('{"Id":"2","UserId":"7","PostId":"9","VoteTypeId":"3","BountyAmount":"0",'
+                       '"CreationDate":"2022-01-09T00:00:00.000"}\n')
+            data.write('{"Id":"99","UserId":"7","PostId":"1","VoteTypeId":"2","BountyAmount":"0",'
+                       '"CreationDate":"2022-03-07T00:00:00.000"}\n')
+        self.ingest(updates_path)
+        maintained = self.query("SELECT year, week_number, vote_count FROM blog_analysis.weekly_vote_counts "
+                                "ORDER BY ALL;")
+        recomputed = self.query("SELECT EXTRACT(year FROM CreationDate), strftime('%W', CreationDate :: date), "
+                                "COUNT(*) FROM blog_analysis.votes_parquet GROUP BY 1, 2 ORDER BY ALL;")
+        self.assertEqual(maintained, recomputed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import unittest
+
+from coffeebeans_dataeng_exercise.db.data_version import DataVersion
+from coffeebeans_dataeng_exercise.db.db import DatabaseConnection
+from coffeebeans_dataeng_exercise.db.query_cache import QueryCache, normalize_query
+from tests.warehouse_test_case import WarehouseTestCase
+
+COUNT_BY_TYPE = "SELECT VoteTypeId, COUNT(*) AS votes FROM blog_analysis.votes GROUP BY 1 ORDER BY 1"
+
+
+class QueryCacheTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.ingest('tests/resources/votes.jsonl')
+
+    def data_version(self):
+        db_connection = DatabaseConnection(self.db_file)
+        try:
+            return DataVersion(db_connection).current()
+        finally:
+            db_connection.close()
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("SELECT  a,\n  'x   y'  FROM\tt ;  "), "SELECT a, 'x   y' FROM t")
+        self.assertEqual(normalize_query('SELECT "My  Col" FROM t'), 'SELECT "My  Col" FROM t')
+
+    def test_repeated_query_is_served_from_memory(self):
+        cache = QueryCache(self.db_file)
+        try:
+            first = cache.query(COUNT_BY_TYPE).fetchall()
+            second = cache.query(COUNT_BY_TYPE.replace(" ", "  ") + ";").fetchall()
+        finally:
+            cache.close()
+        self.assertEqual(second, first)
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+
+    def test_ingestion_invalidates_results(self):
+        self.assertEqual(self.data_version(), 1)
+        cache = QueryCache(self.db_file)
+        try:
+            self.assertEqual(cache.query("SELECT COUNT(*) FROM blog_analysis.votes").fetchall(), [(16,)])
+            updates_path = os.path.join(self.tmp_dir, 'updates.jsonl')
+            with open(updates_path, 'w') as data:
+                data.write('{"Id":"99","UserId":"7","PostId":"1","VoteTypeId":"2","BountyAmount":"0","CreationDate":"2022-03-07T00:00:00.000"}\n')
+            self.ingest(updates_path)
+            self.assertEqual(cache.query("SELECT COUNT(*) FROM blog_analysis.votes").fetchall(), [(17,)])
+        finally:
+            cache.close()
+        self.assertEqual(self.data_version(), 2)
+        self.assertEqual(cache.misses, 2)
+
+    def test_results_are_shared_on_disk(self):
+        writer = QueryCache(self.db_file, cache_dir=self.cache_dir)
+        try:
+            expected = writer.query(COUNT_BY_TYPE).fetchall()
+        finally:
+            writer.close()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        reader = QueryCache(self.db_file, cache_dir=self.cache_dir)
+        try:
+            self.assertEqual(reader.query(COUNT_BY_TYPE).fetchall(), expected)
+        finally:
+            reader.close()
+        self.assertEqual((reader.misses, reader.hits), (0, 1))
+
+    def test_least_recently_used_results_are_evicted(self):
+        cache = QueryCache(self.db_file, max_bytes=1, cache_dir=self.cache_dir)
+        try:
+            cache.query("SELECT * FROM blog_analysis.votes")
+            expected = cache.query(COUNT_BY_TYPE).fetchall()
+            # Only the latest result is kept, in memory and on disk
+            self.assertEqual(len(cache.entries), 1)
+            self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+            self.assertEqual(cache.query(COUNT_BY_TYPE).fetchall(), expected)
+        finally:
+            cache.close()
+        self.assertEqual((cache.misses, cache.hits), (2, 1))
+
+    def test_only_queries_are_cached(self):
+        cache = QueryCache(self.db_file)
+        try:
+            with self.assertRaises(ValueError):
+                cache.query("DELETE FROM blog_analysis.votes")
+        finally:
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from coffeebeans_dataeng_exercise.constants.constants import CREATE_SCHEMA_PATH
+from coffeebeans_dataeng_exercise.db.db import QUERY_LOG_LIMIT, DatabaseConnection
+from coffeebeans_dataeng_exercise.db.sql.reader import Reader
+
+
+class ReaderTest(unittest.TestCase):
+
+    def test_read_from_any_working_directory(self):
+        expected = Reader.read(CREATE_SCHEMA_PATH)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            try:
+                Reader.templates.pop(CREATE_SCHEMA_PATH)
+                self.assertEqual(Reader.read(CREATE_SCHEMA_PATH), expected)
+            finally:
+                os.chdir(cwd)
+
+    def test_template_read_once(self):
+        Reader.read(CREATE_SCHEMA_PATH)
+        with patch('coffeebeans_dataeng_exercise.db.sql.reader.resources.files') as mock_files:
+            Reader.read(CREATE_SCHEMA_PATH)
+            mock_files.assert_not_called()
+
+    def test_formatted_statement_cached(self):
+        first = Reader.format(CREATE_SCHEMA_PATH, schema='cached_schema')
+        self.assertIn('cached_schema', first)
+        self.assertIs(Reader.format(CREATE_SCHEMA_PATH, schema='cached_schema'), first)
+        self.assertNotIn('cached_schema', Reader.format(CREATE_SCHEMA_PATH, schema='other_schema'))
+
+    @patch('coffeebeans_dataeng_exercise.db.db.duckdb.connect')
+    def test_query_text_logged_at_debug_with_cap(self, mock_connect):
+        mock_connect.return_value = MagicMock()
+        db_conn = DatabaseConnection()
+        query = "-- Long query\nSELECT " + "1, " * QUERY_LOG_LIMIT + "1"
+        with self.assertLogs(level=logging.DEBUG) as logs:
+            db_conn.execute(query)
+        info = [record.getMessage() for record in logs.records if record.levelno == logging.INFO]
+        debug = [record.getMessage() for record in logs.records if record.levelno == logging.DEBUG]
+        self.assertEqual(len(info), 1)
+        self.assertIn('ms: -- Long query', info[0])
+        self.assertNotIn('SELECT', info[0])
+        self.assertLess(len(debug[0]), QUERY_LOG_LIMIT + 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
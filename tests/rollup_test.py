@@ -0,0 +1,105 @@
+import os
+import unittest
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.constants.constants import OperationType, SchemaType, StorageType
+from coffeebeans_dataeng_exercise.db.rollup_rewriter import rewrite_query
+from tests.warehouse_test_case import WarehouseTestCase
+
+# Vote counts of every grain, recomputed from the votes table
+RECOMPUTED_COUNTS = ("SELECT CAST(date_trunc('{grain}', CreationDate) AS DATE), VoteTypeId, COUNT(*) "
+                     "FROM blog_analysis.votes GROUP BY 1, 2 ORDER BY ALL;")
+
+
+class RollupTest(WarehouseTestCase):
+
+    def assert_rollups_match_votes(self):
+        for grain in ['day', 'week', 'month']:
+            maintained = self.query(f"SELECT period, VoteTypeId, vote_count FROM blog_analysis.votes_rollup_{grain} "
+                                    "ORDER BY ALL;")
+            self.assertEqual(maintained, self.query(RECOMPUTED_COUNTS.format(grain=grain)), grain)
+
+    def test_rollups_built_from_existing_votes(self):
+        self.ingest('tests/resources/votes.jsonl')
+        # The first run with the rollups builds them from the votes already stored
+        self.ingest('tests/resources/votes.jsonl', rollups=True)
+        self.assert_rollups_match_votes()
+        self.assertEqual(self.query("SELECT SUM(vote_count) FROM blog_analysis.votes_rollup_month;")[0][0], 16)
+
+    def test_ingestion_maintains_rollups(self):
+        self.ingest('tests/resources/votes.jsonl', rollups=True)
+        updates_path = os.path.join(self.tmp_dir, 'updates.jsonl')
+        with open(updates_path, 'w') as data:
+            # Move vote 1 to another month and type, replay vote 2 unchanged and add a vote in a new day
+            data.write('{"Id":"1","UserId":"7","PostId":"1","VoteTypeId":"3","BountyAmount":"0","CreationDate":"2022-02-27T00:00:00.000"}\n')
+            data.write('{"Id":"2","UserId":"7","PostId":"1","VoteTypeId":"2","BountyAmount":"0","CreationDate":"2022-01-09T00:00:00.000"}\n')
+            data.write('{"Id":"99","UserId":"7","PostId":"1","VoteTypeId":"2","BountyAmount":"0","CreationDate":"2022-03-07T00:00:00.000"}\n')
+        # Once created, the rollups are maintained by every ingestion
+        self.ingest(updates_path)
+        self.assert_rollups_match_votes()
+
+    def test_dropped_rollup_table_is_rebuilt(self):
+        self.ingest('tests/resources/votes.jsonl', rollups=True)
+        self.query("DROP TABLE blog_analysis.votes_rollup_week;")
+        # The catalog markers cover every grain: the missing table is created and filled again
+        self.ingest('tests/resources/votes.jsonl', rollups=True)
+        self.assert_rollups_match_votes()
+
+    def test_rewritten_queries_match_the_votes(self):
+        self.ingest('tests/resources/votes.jsonl', rollups=True)
+        queries = [
+            "SELECT date_trunc('week', CreationDate) AS week, COUNT(*) FROM blog_analysis.votes GROUP BY 1 ORDER BY 1",
+            "select VoteTypeId, count(*) as n from blog_analysis.votes group by VoteTypeId order by n desc, VoteTypeId",
+            "SELECT CAST(CreationDate AS DATE), VoteTypeId, COUNT(*) FROM blog_analysis.votes GROUP BY ALL ORDER BY ALL",
+            "SELECT date_trunc('year', CreationDate), COUNT(Id) FROM blog_analysis.votes "
+            "GROUP BY date_trunc('year', CreationDate);",
+            "SELECT COUNT(*) FROM blog_analysis.votes",
+        ]
+        con = duckdb.connect(self.db_file)
+        try:
+            for query in queries:
+                rewritten = rewrite_query(con, query)
+                self.assertIsNotNone(rewritten, query)
+                self.assertNotIn('blog_analysis.votes ', rewritten + ' ')
+                original, answered = con.sql(query), con.sql(rewritten)
+                self.assertEqual(answered.columns, original.columns)
+                self.assertEqual(answered.types, original.types)
+                self.assertEqual(answered.fetchall(), original.fetchall())
+        finally:
+            con.close()
+
+    def test_unsupported_queries_are_not_rewritten(self):
+        self.ingest('tests/resources/votes.jsonl', rollups=True)
+        queries = [
+            "SELECT PostId, COUNT(*) FROM blog_analysis.votes GROUP BY 1",
+            "SELECT date_trunc('week', CreationDate), COUNT(*) FROM blog_analysis.votes WHERE VoteTypeId = '2' GROUP BY 1",
+            "SELECT date_trunc('week', CreationDate), COUNT(*) FROM blog_analysis.votes GROUP BY 1, VoteTypeId",
+            "SELECT date_trunc('week', CreationDate), date_trunc('month', CreationDate), COUNT(*) "
+            "FROM blog_analysis.votes GROUP BY 1, 2",
+            "SELECT VoteTypeId, COUNT(DISTINCT PostId) FROM blog_analysis.votes GROUP BY 1",
+        ]
+        con = duckdb.connect(self.db_file)
+        try:
+            for query in queries:
+                self.assertIsNone(rewrite_query(con, query), query)
+        finally:
+            con.close()
+
+    def test_no_rewrite_without_rollups(self):
+        self.ingest('tests/resources/votes.jsonl')
+        con = duckdb.connect(self.db_file)
+        try:
+            self.assertIsNone(rewrite_query(con, "SELECT VoteTypeId, COUNT(*) FROM blog_analysis.votes GROUP BY 1"))
+        finally:
+            con.close()
+
+    def test_rollups_require_duckdb_storage(self):
+        with self.assertRaises(ValueError):
+            BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file,
+                                   storage=StorageType.PARQUET, rollups=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
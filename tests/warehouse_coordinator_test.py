@@ -0,0 +1,144 @@
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.constants.constants import OperationType, SchemaType
+from coffeebeans_dataeng_exercise.db.db import DatabaseConnection
+from coffeebeans_dataeng_exercise.db.query_cache import QueryCache
+from coffeebeans_dataeng_exercise.db.warehouse_coordinator import WarehouseCoordinator
+from coffeebeans_dataeng_exercise.ingest_jobs.ingest_daemon import IngestDaemon
+from tests.warehouse_test_case import WarehouseTestCase
+
+COUNT_VOTES = "SELECT COUNT(*) FROM blog_analysis.votes"
+
+
+class WarehouseCoordinatorTest(WarehouseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.coordinator = WarehouseCoordinator(self.db_file)
+
+    def tearDown(self):
+        self.coordinator.release_writer()
+        super().tearDown()
+
+    def count_votes(self):
+        with self.coordinator.reader() as db_connection:
+            return db_connection.execute(COUNT_VOTES).fetchone()[0]
+
+    def test_single_writer(self):
+        self.coordinator.acquire_writer()
+        other = WarehouseCoordinator(self.db_file)
+        with self.assertRaises(TimeoutError):
+            other.acquire_writer(timeout=0.1)
+        self.coordinator.release_writer()
+        other.acquire_writer(timeout=0)
+        self.assertTrue(other.is_writer)
+        other.release_writer()
+
+    def test_lease_released_when_the_database_cannot_be_opened(self):
+        # A directory in place of the database file
+        os.makedirs(self.db_file)
+        coordinator = WarehouseCoordinator(self.db_file)
+        with self.assertRaises(duckdb.Error):
+            BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file, coordinator=coordinator)
+        self.assertFalse(coordinator.is_writer)
+        self.coordinator.acquire_writer(timeout=0)
+
+    def test_lease_released_when_the_run_fails(self):
+        coordinator = WarehouseCoordinator(self.db_file)
+        job = BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file, coordinator=coordinator)
+        with self.assertRaises(FileNotFoundError):
+            job.run(os.path.join(self.tmp_dir, 'nonexistent.jsonl'))
+        self.assertFalse(coordinator.is_writer)
+        self.coordinator.acquire_writer(timeout=0)
+
+    def test_job_publishes_a_snapshot_read_while_writing(self):
+        self.ingest('tests/resources/votes.jsonl', coordinator=WarehouseCoordinator(self.db_file))
+        self.assertTrue(os.path.exists(self.coordinator.snapshot_file))
+        # A writer owns the database: the readers are served the snapshot, in any process
+        self.coordinator.acquire_writer()
+        writer = DatabaseConnection(self.db_file)
+        try:
+            writer.execute("DELETE FROM blog_analysis.votes;")
+            self.assertEqual(self.count_votes(), 16)
+            reader = subprocess.run(
+                [sys.executable, '-c', 'import duckdb, sys; '
+                 'print(duckdb.connect(sys.argv[1], read_only=True).execute(sys.argv[2]).fetchone()[0])',
+                 self.coordinator.snapshot_file, COUNT_VOTES],
+                capture_output=True, text=True, check=True)
+            self.assertEqual(reader.stdout.strip(), '16')
+        finally:
+            writer.close()
+
+    def test_reader_of_the_database_holds_back_writers(self):
+        # Written without the coordinator: no snapshot, the database itself is read
+        self.ingest('tests/resources/votes.jsonl')
+        with self.coordinator.read_lease() as read_file:
+            self.assertEqual(read_file, self.db_file)
+            with self.assertRaises(TimeoutError):
+                WarehouseCoordinator(self.db_file).acquire_writer(timeout=0.1)
+        self.assertEqual(self.count_votes(), 16)
+
+    def test_no_snapshot_while_writing(self):
+        self.coordinator.acquire_writer()
+        with self.assertRaises(FileNotFoundError):
+            self.count_votes()
+
+    def test_query_cache_reads_the_snapshot(self):
+        self.ingest('tests/resources/votes.jsonl', coordinator=WarehouseCoordinator(self.db_file))
+        self.coordinator.acquire_writer()
+        cache = QueryCache(self.db_file, coordinator=self.coordinator)
+        try:
+            self.assertEqual(cache.query(COUNT_VOTES).fetchall(), [(16,)])
+        finally:
+            cache.close()
+
+    def test_daemon_publishes_after_every_micro_batch(self):
+        landing_dir = os.path.join(self.tmp_dir, 'landing')
+        os.makedirs(landing_dir)
+        shutil.copy('tests/resources/votes.jsonl', landing_dir)
+        daemon = IngestDaemon(landing_dir, self.db_file, max_latency=0, publish_interval=0,
+                              coordinator=WarehouseCoordinator(self.db_file))
+        try:
+            daemon.poll_once()
+            daemon.poll_once()
+            # Read while the daemon keeps the database open
+            self.assertEqual(self.count_votes(), 16)
+        finally:
+            daemon.close()
+
+    def test_daemon_publishes_once_per_interval(self):
+        landing_dir = os.path.join(self.tmp_dir, 'landing')
+        os.makedirs(landing_dir)
+        shutil.copy('tests/resources/votes.jsonl', landing_dir)
+        daemon = IngestDaemon(landing_dir, self.db_file, max_latency=0, publish_interval=3600,
+                              coordinator=WarehouseCoordinator(self.db_file))
+        try:
+            daemon.poll_once()
+            daemon.poll_once()
+            self.assertEqual(self.count_votes(), 16)
+            with open(os.path.join(landing_dir, 'more.jsonl'), 'w') as data:
+                data.write('{"Id":"99","UserId":"7","PostId":"1","VoteTypeId":"2","BountyAmount":"0",'
+                           '"CreationDate":"2022-03-07T00:00:00.000"}\n')
+            daemon.poll_once()
+            self.assertEqual(daemon.poll_once(), [os.path.join(landing_dir, 'more.jsonl')])
+            # Committed, but published at the end of the interval only
+            self.assertEqual(self.count_votes(), 16)
+        finally:
+            daemon.close()
+        # The daemon publishes what it committed when it stops
+        snapshot = duckdb.connect(self.coordinator.snapshot_file, read_only=True)
+        try:
+            self.assertEqual(snapshot.execute(COUNT_VOTES).fetchone()[0], 17)
+        finally:
+            snapshot.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
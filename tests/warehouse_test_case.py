@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import duckdb
+
+from coffeebeans_dataeng_exercise.batch.batch_factory import BatchFactory
+from coffeebeans_dataeng_exercise.constants.constants import OperationType, SchemaType
+
+
+class WarehouseTestCase(unittest.TestCase):
+    """
+    Base class of the tests running the jobs on a warehouse of their own: every test gets an
+    empty temporary directory, holding the database file, removed after the test.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.tmp_dir, 'warehouse.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def ingest(self, file_path, **options):
+        job = BatchFactory.operation(OperationType.INGEST, [SchemaType.VOTES], self.db_file, **options)
+        job.run(file_path)
+        return job
+
+    def detect_outliers(self, **options):
+        job = BatchFactory.operation(OperationType.OUTLIER, [SchemaType.VOTES, SchemaType.OUTLIER], self.db_file,
+                                     **options)
+        job.run(None)
+        return job
+
+    def query(self, sql):
+        con = duckdb.connect(self.db_file)
+        try:
+            return con.execute(sql).fetchall()
+        finally:
+            con.close()